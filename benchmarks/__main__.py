@@ -0,0 +1,14 @@
+import runpy
+import sys
+from pathlib import Path
+
+# python -m benchmarks <name> [args]  ==  python -m benchmarks.<name> [args]
+_AVAILABLE = sorted(p.stem for p in Path(__file__).parent.glob("*.py") if not p.stem.startswith("_") and p.stem != "runner")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in _AVAILABLE:
+        print(f"usage: python -m benchmarks <name> [args]\navailable: {', '.join(_AVAILABLE)}", file=sys.stderr)
+        sys.exit(2)
+    name = sys.argv[1]
+    sys.argv = [f"benchmarks.{name}", *sys.argv[2:]]
+    runpy.run_module(f"benchmarks.{name}", run_name="__main__", alter_sys=True)
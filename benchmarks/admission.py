@@ -0,0 +1,74 @@
+import asyncio
+import statistics
+import time
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode
+from definitions.errors import LLMBusyError, LLMError
+from helpers.fake_ollama import start_fake_ollama
+from rag.admission import get_admission_controller
+from rag.llm_ollama import acall_llm_ollama
+
+# Lastspitze: 80 gleichzeitige Fragen an einen Ollama-Stand-in, der 2 Requests parallel bearbeitet
+# (~280 ms pro Antwort) und den Rest intern einreiht. Timeout pro Frage 3 s.
+# Ohne Zugangskontrolle stauen sich alle Requests in "Ollama"; mit Zugangskontrolle werden
+# überzählige sofort mit "busy" abgelehnt und die angenommenen bleiben unter dem Timeout.
+BURST = 80
+TIMEOUT_S = 3
+MAX_IN_FLIGHT = 2
+MAX_QUEUE = 16
+MAX_WAIT_S = 2.0
+
+custom_settings: AppSettings = get_settings()
+
+
+async def _burst(endpoint: str, max_in_flight: int) -> dict[str, list[float]]:
+    custom_settings.OLLAMA_ENDPOINTS = [endpoint]  # type: ignore[assignment]
+    custom_settings.OLLAMA_MAX_CONCURRENCY = max_in_flight
+    custom_settings.OLLAMA_MAX_QUEUE = MAX_QUEUE
+    custom_settings.OLLAMA_MAX_QUEUE_WAIT_S = MAX_WAIT_S
+    get_admission_controller.cache_clear()
+    outcome: dict[str, list[float]] = {"ok": [], "busy": [], "timeout": []}
+
+    async def ask() -> None:
+        started = time.perf_counter()
+        try:
+            await acall_llm_ollama("question", max_tokens=16, timeout_s=TIMEOUT_S)
+            kind = "ok"
+        except LLMBusyError:
+            kind = "busy"
+        except LLMError:
+            kind = "timeout"
+        outcome[kind].append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(ask() for _ in range(BURST)))
+    return outcome
+
+
+def _report(label: str, outcome: dict[str, list[float]]) -> None:
+    ok = sorted(outcome["ok"])
+    p95 = ok[max(0, int(len(ok) * 0.95) - 1)] if ok else 0.0
+    busy = f"{statistics.median(outcome['busy']):6.1f} ms" if outcome["busy"] else "     -   "
+    print(
+        f"{label:<18}: ok {len(ok):3d} (p50 {statistics.median(ok) if ok else 0:7.1f} ms, p95 {p95:7.1f} ms) | "
+        f"busy {len(outcome['busy']):3d} (p50 {busy}) | timeout {len(outcome['timeout']):3d}"
+    )
+
+
+def main() -> ExitCode:
+    server, endpoint = start_fake_ollama(first_token_ms=200, token_ms=5, parallel=MAX_IN_FLIGHT)
+    try:
+        _report("no admission", asyncio.run(_burst(endpoint, 0)))
+        _report("admission control", asyncio.run(_burst(endpoint, MAX_IN_FLIGHT)))
+        print(f"  {get_admission_controller().stats()}")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        server.shutdown()
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "admission")
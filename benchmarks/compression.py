@@ -0,0 +1,64 @@
+import statistics
+import sys
+import time
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode
+from definitions.custom_types import CtxItem
+from rag.postprocess import postprocess_results
+from rag.qa import build_user_prompt, context_token_budget, retrieve
+from rag.llm_ollama import call_llm_ollama
+from rag.tokens import count_tokens
+from vector_database.embedding import embed_query
+
+# Vergleicht Prompt-Tokens und Latenz mit/ohne extraktive Kontext-Kompression.
+# Mit `--llm` wird zusätzlich Ollama aufgerufen (End-to-End-Latenz inkl. Prefill/Generierung).
+QUESTIONS = [
+    "How do I define my first FastAPI endpoint with @app.get?",
+    "How do I start a FastAPI server with uvicorn?",
+    "How do I set default values for query parameters?",
+    "How do I create a request model with Pydantic?",
+    "How do I set the HTTP status code of a response?",
+    "How do I define a dependency with Depends()?",
+    "How do I raise an HTTPException with status code and detail?",
+    "How do I use background tasks with BackgroundTasks?",
+    "How do I configure CORS settings?",
+    "How do I use FastAPI with Docker?",
+]
+
+
+def _run(question: str, compress: bool, with_llm: bool) -> tuple[int, float]:
+    started = time.perf_counter()
+    embedding = embed_query(question)
+    raw = retrieve(question, query_embedding=embedding)
+    ctx: list[CtxItem] = postprocess_results(
+        raw, question, max_ctx_tokens=context_token_budget(question), compress_with=embedding if compress else None
+    )
+    prompt = build_user_prompt(question, ctx)
+    if with_llm:
+        call_llm_ollama(user_prompt=prompt)
+    return count_tokens(prompt), (time.perf_counter() - started) * 1000
+
+
+def main() -> ExitCode:
+    with_llm = "--llm" in sys.argv
+    rows: list[str] = []
+    try:
+        for compress in (False, True):
+            tokens: list[int] = []
+            latencies: list[float] = []
+            for q in QUESTIONS:
+                n, ms = _run(q, compress, with_llm)
+                tokens.append(n)
+                latencies.append(ms)
+            rows.append(f"{'on' if compress else 'off':>8} | {statistics.mean(tokens):>11.0f} | {statistics.median(latencies):>8.1f}")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    print(f"compress | avg tokens  | p50 ms ({'end-to-end' if with_llm else 'retrieval + prompt'})")
+    print("\n".join(rows))
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "compression")
@@ -0,0 +1,83 @@
+import statistics
+import time
+from typing import Any
+from loguru import logger
+from benchmarks.runner import run_benchmark
+import rag.qa as qa
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ChromaQueryKeys, ChunkKeys, ExitCode
+from definitions.errors import LLMError
+from helpers.fake_ollama import start_fake_ollama
+from rag.deadline import EXTRACTIVE_NOTE, get_speed_estimator
+
+# End-to-end-Latenz von `answer_question` gegen einen Ollama-Stand-in, dessen Prefill mit der Prompt-Länge wächst
+# (~1.5 s bei vollem Kontext) und bei 10 % der Requests 4 s länger braucht (Ausreißer).
+# Retrieval liefert feste synthetische Treffer, gemessen wird nur der LLM-Anteil.
+# Ohne Frist bestimmen die Ausreißer p99; mit Frist wird Kontext/Antwort gekürzt und
+# eine zu späte Generierung abgebrochen (Teilantwort bzw. extraktive Antwort).
+QUESTIONS = 40
+DEADLINE_S = 2.5
+
+custom_settings: AppSettings = get_settings()
+
+_SENTENCE = (
+    "FastAPI runs on uvicorn, and the server is started with the uvicorn command followed by module and app name. "
+    "Workers can be configured for production deployments behind a reverse proxy. "
+)
+
+
+def _synthetic_hits(question: str, section: str | None = None, query_embedding: list[float] | None = None) -> dict[str, Any]:
+    n = custom_settings.CHROMA_N_RESULTS
+    return {
+        ChromaQueryKeys.IDS: [[f"c{i}" for i in range(n)]],
+        ChromaQueryKeys.DOCS: [[_SENTENCE * 6 for _ in range(n)]],
+        ChromaQueryKeys.METAS: [[{ChunkKeys.URL: f"https://example.org/doc{i}", ChunkKeys.INDEX: 0} for i in range(n)]],
+        ChromaQueryKeys.DISTS: [[0.2 + i / 100 for i in range(n)]],
+    }
+
+
+def _run(deadline_s: float) -> tuple[list[float], dict[str, int]]:
+    latencies: list[float] = []
+    kinds = {"full": 0, "partial": 0, "extractive": 0, "error": 0}
+    for i in range(QUESTIONS):
+        started = time.perf_counter()
+        try:
+            answer, _ = qa.answer_question(f"How do I start uvicorn? ({i})", use_cache=False, deadline_s=deadline_s)
+            kind = "extractive" if answer.startswith(EXTRACTIVE_NOTE) else "partial" if answer.endswith(" …") else "full"
+        except LLMError:
+            kind = "error"
+        latencies.append((time.perf_counter() - started) * 1000)
+        kinds[kind] += 1
+    return latencies, kinds
+
+
+def _report(label: str, latencies: list[float], kinds: dict[str, int]) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    print(
+        f"{label:<16}: p50 {statistics.median(ordered):7.1f} ms, p99 {p99:7.1f} ms, max {ordered[-1]:7.1f} ms | "
+        + ", ".join(f"{k} {v}" for k, v in kinds.items())
+    )
+
+
+def main() -> ExitCode:
+    server, endpoint = start_fake_ollama(
+        first_token_ms=200, token_ms=25, max_tokens=64, prefill_tps=2000, tail_rate=0.1, tail_ms=4000,
+    )
+    custom_settings.OLLAMA_ENDPOINTS = [endpoint]  # type: ignore[assignment]
+    qa.retrieve = _synthetic_hits  # type: ignore[assignment]
+    qa.embed_query = lambda question: [0.0]  # type: ignore[assignment]
+    try:
+        _report("no deadline", *_run(0))
+        _report(f"deadline {DEADLINE_S}s", *_run(DEADLINE_S))
+        print(f"  speed estimate: {get_speed_estimator().stats()}")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        server.shutdown()
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "deadline")
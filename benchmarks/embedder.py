@@ -0,0 +1,63 @@
+import statistics
+import threading
+import time
+from typing import Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode
+from vector_database.embedding import QueryEmbedder, embed_texts
+from config.settings import AppSettings, get_settings
+
+# Lastbenchmark für Query-Embeddings: N parallele Threads, jeweils eigene (nicht gecachte) Fragen.
+# Vergleicht Batch-1-Inferenz pro Thread mit dem gemeinsamen, bündelnden QueryEmbedder.
+custom_settings: AppSettings = get_settings()
+THREADS = 16
+QUERIES_PER_THREAD = 20
+
+
+def _run(embed: Callable[[str], list[float]]) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def worker(tid: int) -> None:
+        for i in range(QUERIES_PER_THREAD):
+            t0 = time.perf_counter()
+            embed(f"How do I configure feature {tid}-{i} in FastAPI?")
+            with lock:
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def _report(name: str, elapsed: float, latencies: list[float]) -> str:
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    return f"{name:<10} | {len(latencies) / elapsed:>8.1f} q/s | p50 {statistics.median(latencies):>7.1f} ms | p99 {p99:>7.1f} ms"
+
+
+def main() -> ExitCode:
+    try:
+        embed_texts(["warm-up"])  # Modell laden
+        batch1 = _report("batch-1", *_run(lambda q: embed_texts([q])[0]))
+        embedder = QueryEmbedder(
+            cache_size=custom_settings.EMBED_QUERY_CACHE_SIZE,
+            window_ms=custom_settings.EMBED_BATCH_WINDOW_MS,
+            max_batch=custom_settings.EMBED_MAX_BATCH,
+        )
+        batched = _report("batched", *_run(embedder.embed))
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    print(batch1)
+    print(batched)
+    print(embedder.stats())
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "embedder")
@@ -0,0 +1,72 @@
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+import rag.qa as qa
+from benchmarks.deadline import _synthetic_hits
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from helpers.fake_ollama import start_fake_ollama
+from rag.answer_cache import get_answer_cache
+from server.blocking_tasks import ask_async
+from server.job_manager import JobManager
+
+# Ollama-Stand-in mit 2 parallelen Slots (~2 s pro Antwort). ABANDONED Clients stellen eine Frage und
+# trennen nach 0.5 s die Verbindung; danach kommen FRESH neue Fragen. Gemessen wird deren Latenz:
+# ohne Abbruch rechnet das LLM die verwaisten Antworten zu Ende, mit `abandon` sind die Slots sofort frei.
+ABANDONED = 6
+FRESH = 2
+
+custom_settings: AppSettings = get_settings()
+
+
+def _runner(question: str) -> Callable[..., Any]:
+    async def runner(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+        return await ask_async(question=question, deadline_s=0, on_partial=on_partial)
+    return runner
+
+
+def _submit(jobs: JobManager, question: str) -> str:
+    return jobs.submit("ask", _runner(question), stream=True, job_class=JobClass.INTERACTIVE, log_mode=JobLogMode.NONE)
+
+
+async def _scenario(jobs: JobManager, cancel: bool, round_no: int) -> float:
+    abandoned = [_submit(jobs, f"abandoned question {round_no}-{i}") for i in range(ABANDONED)]
+    await asyncio.sleep(0.5)
+    if cancel:
+        for jid in abandoned:
+            jobs.abandon(jid)
+    started = time.perf_counter()
+    fresh = [_submit(jobs, f"fresh question {round_no}-{i}") for i in range(FRESH)]
+    await asyncio.gather(*(jobs.wait(jid, 60.0) for jid in fresh))
+    latency = (time.perf_counter() - started) * 1000
+    # Verwaiste Jobs vor der nächsten Runde auslaufen lassen
+    await asyncio.gather(*(jobs.wait(jid, 60.0) for jid in abandoned))
+    return latency
+
+
+def main() -> ExitCode:
+    server, endpoint = start_fake_ollama(first_token_ms=300, token_ms=30, max_tokens=64, parallel=2)
+    custom_settings.OLLAMA_ENDPOINTS = [endpoint]  # type: ignore[assignment]
+    qa.retrieve = _synthetic_hits  # type: ignore[assignment]
+    qa.embed_query = lambda question: [1.0, 0.0]  # type: ignore[assignment]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = JobManager(logs_dir=Path(tmp))
+            for round_no, (label, cancel) in enumerate((("keep abandoned", False), ("cancel abandoned", True))):
+                get_answer_cache().clear()
+                latency = asyncio.run(_scenario(jobs, cancel, round_no))
+                print(f"{label:<16}: {FRESH} fresh asks done after {latency:7.0f} ms ({ABANDONED} clients gone)")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        server.shutdown()
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_cancel", log_level="ERROR")
@@ -0,0 +1,114 @@
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+import rag.qa as qa
+from benchmarks.deadline import _synthetic_hits
+from benchmarks.runner import run_benchmark
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from helpers.fake_ollama import start_fake_ollama
+from server.blocking_tasks import ask_async
+from server.job_manager import JobManager
+
+# ask-Jobs wie in ask_job (async, Retrieval per asyncio.to_thread, hier 50 ms blockierend; LLM-Stand-in ~300 ms),
+# während 6 Batch-Jobs à 3 s laufen. Eigener Batch-Pool (2 Worker): das Retrieval der Fragen wartet nicht.
+# Batch-Jobs im Pool des Retrievals (wie ein gemeinsamer Pool): jede Frage wartet auf einen freien Worker.
+# Zum Schluss BURST gleichzeitige Fragen: der interaktive Pool begrenzt die parallelen Retrievals.
+WORKERS = {JobClass.INTERACTIVE: 4, JobClass.BATCH: 2}
+BATCH_JOBS = 6
+BATCH_S = 3.0
+QUESTIONS = 6
+RETRIEVAL_S = 0.05
+BURST = 16
+
+custom_settings: AppSettings = get_settings()
+
+_lock = threading.Lock()
+_retrievals = {"active": 0, "peak": 0}
+
+
+def _retrieve(question: str, section: str | None = None, query_embedding: list[float] | None = None) -> dict[str, Any]:
+    with _lock:
+        _retrievals["active"] += 1
+        _retrievals["peak"] = max(_retrievals["peak"], _retrievals["active"])
+    time.sleep(RETRIEVAL_S)  # Embedding + Chroma-Abfrage blockieren den Thread
+    with _lock:
+        _retrievals["active"] -= 1
+    return _synthetic_hits(question, section, query_embedding)
+
+
+def _batch(*, log_path: Path) -> None:
+    time.sleep(BATCH_S)
+
+
+def _runner(question: str) -> Callable[..., Any]:
+    async def runner(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+        return await ask_async(question=question, deadline_s=0, on_partial=on_partial)
+    return runner
+
+
+def _ask(jobs: JobManager, question: str) -> str:
+    return jobs.submit("ask", _runner(question), stream=True, job_class=JobClass.INTERACTIVE, log_mode=JobLogMode.NONE)
+
+
+async def _scenario(jobs: JobManager, batch_class: str | None, tag: str) -> tuple[list[float], int]:
+    batch = [jobs.submit("batch", _batch, job_class=batch_class) for _ in range(BATCH_JOBS)] if batch_class else []
+    await asyncio.sleep(0.1)
+    position = max((jobs.status(jid).get("queue_position", 0) for jid in batch), default=0)
+    latencies: list[float] = []
+    for i in range(QUESTIONS):
+        started = time.perf_counter()
+        await jobs.wait(_ask(jobs, f"question {tag} {i}"), 60.0)
+        latencies.append((time.perf_counter() - started) * 1000)
+    await asyncio.gather(*(jobs.wait(jid, 60.0) for jid in batch))
+    return latencies, position
+
+
+async def _burst(jobs: JobManager) -> float:
+    _retrievals["peak"] = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(jobs.wait(_ask(jobs, f"burst question {i}"), 60.0) for i in range(BURST)))
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> ExitCode:
+    server, endpoint = start_fake_ollama(first_token_ms=250, token_ms=5, max_tokens=16)
+    custom_settings.OLLAMA_ENDPOINTS = [endpoint]  # type: ignore[assignment]
+    qa.retrieve = _retrieve  # type: ignore[assignment]
+    qa.embed_query = lambda question: [1.0, 0.0]  # type: ignore[assignment]
+    custom_settings.RAG_ANSWER_CACHE_ENABLED = False  # jede Frage rechnet (gleiche synthetische Embeddings)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            scenarios = (
+                ("no batch load", None),
+                ("batch in own pool", JobClass.BATCH),
+                ("batch in ask pool", JobClass.INTERACTIVE),
+            )
+            for label, batch_class in scenarios:
+                jobs = JobManager(workers=WORKERS, logs_dir=Path(tmp))
+                latencies, position = asyncio.run(_scenario(jobs, batch_class, label))
+                print(
+                    f"{label:<18}: ask p50 {statistics.median(latencies):7.1f} ms, max {max(latencies):7.1f} ms "
+                    f"(max batch queue_position {position})"
+                )
+            jobs = JobManager(workers=WORKERS, logs_dir=Path(tmp))
+            elapsed = asyncio.run(_burst(jobs))
+            print(
+                f"{BURST} concurrent asks  : done after {elapsed:7.1f} ms, peak parallel retrievals "
+                f"{_retrievals['peak']} (interactive workers {WORKERS[JobClass.INTERACTIVE]})"
+            )
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        server.shutdown()
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_classes")
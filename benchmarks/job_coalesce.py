@@ -0,0 +1,74 @@
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+import rag.qa as qa
+from benchmarks.deadline import _synthetic_hits
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from helpers.fake_ollama import start_fake_ollama
+from rag.answer_cache import get_answer_cache, normalize_question
+from rag.llm_router import get_llm_router
+from server.blocking_tasks import ask_async
+from server.job_manager import JobManager
+
+# Burst von 20 gleichzeitigen ask-Jobs mit derselben Frage (leicht unterschiedlich geschrieben) gegen einen
+# Ollama-Stand-in (2 parallel, ~400 ms pro Antwort). Retrieval liefert feste synthetische Treffer.
+# Ohne Single-Flight rechnet jeder Job selbst; mit Single-Flight teilen sich alle einen Job.
+BURST = 20
+VARIANTS = ["How do I start uvicorn?", "how do i start uvicorn", "  How do I  start uvicorn ?"]
+
+custom_settings: AppSettings = get_settings()
+
+
+def _burst(coalesce: bool, logs_dir: Path) -> tuple[int, int, list[float]]:
+    get_answer_cache().clear()
+    jobs = JobManager(logs_dir=logs_dir)
+    before = sum(ep["requests"] for ep in get_llm_router().stats())
+    started = time.perf_counter()
+    jids = []
+    for i in range(BURST):
+        question = VARIANTS[i % len(VARIANTS)]
+
+        async def runner(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None, q: str = question) -> dict[str, Any]:
+            return await ask_async(question=q, on_partial=on_partial)
+
+        jids.append(jobs.submit(
+            "ask", runner, stream=True, job_class=JobClass.INTERACTIVE, log_mode=JobLogMode.NONE,
+            dedupe_key=("ask", normalize_question(question), None, None) if coalesce else None,
+        ))
+    latencies = []
+    for jid in jids:
+        while not jobs.partial(jid, 0, wait_s=1.0)["done"]:
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+    llm_requests = sum(ep["requests"] for ep in get_llm_router().stats()) - before
+    return llm_requests, len(set(jids)), latencies
+
+
+def main() -> ExitCode:
+    server, endpoint = start_fake_ollama(first_token_ms=300, token_ms=3, parallel=2)
+    custom_settings.OLLAMA_ENDPOINTS = [endpoint]  # type: ignore[assignment]
+    qa.retrieve = _synthetic_hits  # type: ignore[assignment]
+    qa.embed_query = lambda question: [1.0, 0.0]  # type: ignore[assignment]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, coalesce in (("no single-flight", False), ("single-flight", True)):
+                requests, distinct, latencies = _burst(coalesce, Path(tmp))
+                print(
+                    f"{label:<16}: {requests:2d} LLM request(s), {distinct:2d} job(s) for {BURST} asks, "
+                    f"p50 {statistics.median(latencies):7.1f} ms, max {max(latencies):7.1f} ms"
+                )
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        server.shutdown()
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_coalesce", log_level="ERROR")
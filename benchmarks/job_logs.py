@@ -0,0 +1,64 @@
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from helpers.fake_ollama import start_fake_ollama
+from rag.llm_ollama import acall_llm_ollama
+from server.job_manager import JobManager
+
+# 20 gleichzeitige ask-artige Jobs (je 10 Logzeilen + LLM-Aufruf gegen einen Ollama-Stand-in).
+# Gemessen: geschriebene Log-Bytes pro Job und ob jede Logdatei nur Zeilen ihres eigenen Jobs enthält.
+JOBS = 20
+LINES_PER_JOB = 10
+
+custom_settings: AppSettings = get_settings()
+
+
+async def _ask(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+    for i in range(LINES_PER_JOB):
+        logger.info(f"step {i}: retrieval / postprocessing / prompt")
+    answer = await acall_llm_ollama("question", max_tokens=16, on_token=on_partial)
+    return {"answer": answer}
+
+
+def _scenario(log_mode: str, logs_dir: Path) -> tuple[float, float, int]:
+    jobs = JobManager(workers={JobClass.INTERACTIVE: 2, JobClass.BATCH: 1}, logs_dir=logs_dir)
+    started = time.perf_counter()
+    jids = [jobs.submit("ask", _ask, stream=True, job_class=JobClass.INTERACTIVE, log_mode=log_mode) for _ in range(JOBS)]
+    while any(jobs.status(jid)["status"] not in ("success", "error") for jid in jids):
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    time.sleep(0.2)  # gepufferte Sinks leeren
+    files = list(logs_dir.glob("job_*.log"))
+    written = sum(f.stat().st_size for f in files)
+    foreign = sum(
+        1 for jid in jids if (p := jobs.get_log_path(jid)) and any(o not in (jid,) and o in p.read_text() for o in jids)
+    )
+    return written / JOBS, elapsed, foreign
+
+
+def main() -> ExitCode:
+    server, endpoint = start_fake_ollama(first_token_ms=200, token_ms=5)
+    custom_settings.OLLAMA_ENDPOINTS = [endpoint]  # type: ignore[assignment]
+    try:
+        for mode in (JobLogMode.FILE, JobLogMode.MEMORY):
+            with tempfile.TemporaryDirectory() as tmp:
+                per_job, elapsed, foreign = _scenario(mode, Path(tmp))
+                print(
+                    f"log_mode={mode:<7}: {per_job:8.0f} bytes/ask on disk, {elapsed * 1000:7.1f} ms for {JOBS} asks, "
+                    f"{foreign} log file(s) with lines of other jobs"
+                )
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        server.shutdown()
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_logs", log_level="ERROR")
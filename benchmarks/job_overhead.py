@@ -0,0 +1,50 @@
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from server.job_manager import JobManager
+
+# Overhead der Job-Maschinerie allein: ask-Jobs, deren Arbeit nichts kostet (wie ein Treffer im Antwort-Cache).
+# Gemessen von submit() bis Status "success", je Log-Modus; dazu die zurückbleibenden Logdateien.
+ASKS = 1000
+
+
+async def _cached_ask(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+    logger.info("ASK(async job): cached")
+    return {"answer": "cached", "sources": []}
+
+
+def _scenario(log_mode: str, logs_dir: Path) -> tuple[list[float], int]:
+    jobs = JobManager(workers={JobClass.INTERACTIVE: 2, JobClass.BATCH: 1}, logs_dir=logs_dir)
+    samples: list[float] = []
+    for _ in range(ASKS):
+        started = time.perf_counter()
+        jid = jobs.submit("ask", _cached_ask, stream=True, job_class=JobClass.INTERACTIVE, log_mode=log_mode)
+        while not jobs.partial(jid, 0, wait_s=1.0)["done"]:
+            pass
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples, len(list(logs_dir.glob("job_*.log")))
+
+
+def main() -> ExitCode:
+    try:
+        for mode in (JobLogMode.FILE, JobLogMode.MEMORY, JobLogMode.NONE):
+            with tempfile.TemporaryDirectory() as tmp:
+                samples, files = _scenario(mode, Path(tmp))
+                ordered = sorted(samples)
+                print(
+                    f"log_mode={mode:<7}: p50 {statistics.median(ordered):7.0f} µs, "
+                    f"p99 {ordered[int(len(ordered) * 0.99) - 1]:7.0f} µs per ask, {files} log file(s) left"
+                )
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_overhead", log_level="WARNING")
@@ -0,0 +1,57 @@
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from server.job_manager import JobManager
+
+# Soak-Test: 100k ask-Jobs (ohne LLM, ~2 KB Antwort + Quellen) nacheinander durch den JobManager.
+# Mit begrenzter Job-Tabelle bleibt der Speicher flach; ohne Grenze wächst er mit jeder Frage.
+ASKS = 100_000
+REPORT_EVERY = 20_000
+MAX_ENTRIES = 5_000
+
+_ANSWER = "FastAPI answer " * 140
+_SOURCES = [{"url": f"https://example.org/doc{i}", "title": "Doc", "heading": "Run", "distance": 0.2} for i in range(3)]
+
+
+async def _ask(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+    if on_partial is not None:
+        on_partial(_ANSWER)
+    return {"answer": _ANSWER, "sources": _SOURCES}
+
+
+def _soak(label: str, jobs: JobManager) -> None:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    points: list[str] = []
+    for i in range(1, ASKS + 1):
+        jid = jobs.submit("ask", _ask, stream=True, job_class=JobClass.INTERACTIVE, log_mode=JobLogMode.NONE)
+        while not jobs.partial(jid, 0, wait_s=1.0)["done"]:
+            pass
+        if i % REPORT_EVERY == 0:
+            gc.collect()
+            points.append(f"{tracemalloc.get_traced_memory()[0] / 2**20:6.1f}")
+    tracemalloc.stop()
+    print(f"{label:<16}: traced MiB after every {REPORT_EVERY} asks: {' / '.join(points)} "
+          f"({time.perf_counter() - started:.1f}s) {jobs.store_stats()}")
+
+
+def main() -> ExitCode:
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            _soak("unbounded", JobManager(logs_dir=Path(tmp), ttl_s=float("inf"), max_entries=10**9, max_result_bytes=2**62))
+            _soak(f"max {MAX_ENTRIES} jobs", JobManager(logs_dir=Path(tmp), max_entries=MAX_ENTRIES))
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_store", log_level="ERROR")
@@ -0,0 +1,88 @@
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from server.job_manager import JobManager
+
+# Durchsatz der Job-Tabelle: In-Memory-Store vs. SQLite (WAL). Jobs ohne Arbeit (wie ein Cache-Treffer),
+# gemessen werden submit bis success und anschließende status()-Abfragen.
+# Zusätzlich teilen sich PROCESSES Prozesse eine SQLite-Datei (Scale-out auf einem Host).
+JOBS = 3000
+STATUS_CALLS = 20_000
+PROCESSES = 4
+
+
+async def _noop(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+    return {"answer": "cached", "sources": []}
+
+
+def _submit_all(jobs: JobManager, n: int) -> tuple[list[str], float]:
+    started = time.perf_counter()
+    jids = [jobs.submit("ask", _noop, job_class=JobClass.INTERACTIVE, log_mode=JobLogMode.NONE) for _ in range(n)]
+    for jid in jids:
+        while not jobs.partial(jid, 0, wait_s=1.0)["done"]:
+            pass
+    return jids, n / (time.perf_counter() - started)
+
+
+def _status_rate(jobs: JobManager, jids: list[str]) -> float:
+    started = time.perf_counter()
+    for _ in range(STATUS_CALLS):
+        jobs.status(random.choice(jids))
+    return STATUS_CALLS / (time.perf_counter() - started)
+
+
+def _worker(store_path: str, logs_dir: str, n: int, start: Any, out: Any) -> None:
+    logger.remove()
+    jobs = JobManager(logs_dir=Path(logs_dir), store_path=Path(store_path))
+    start.wait()
+    jids, rate = _submit_all(jobs, n)
+    out.put((jids, rate))
+
+
+def main() -> ExitCode:
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, store_path in (("memory", None), ("sqlite", Path(tmp) / "jobs.sqlite3")):
+                jobs = JobManager(logs_dir=Path(tmp), store_path=store_path)
+                jids, submit_rate = _submit_all(jobs, JOBS)
+                print(f"{label:<22}: {submit_rate:8.0f} jobs/s submit->success, {_status_rate(jobs, jids):8.0f} status/s")
+
+            store_path = Path(tmp) / "shared.sqlite3"
+            JobManager(logs_dir=Path(tmp), store_path=store_path)  # Schema anlegen
+            ctx = multiprocessing.get_context("spawn")
+            start, out = ctx.Event(), ctx.Queue()
+            procs = [
+                ctx.Process(target=_worker, args=(str(store_path), tmp, JOBS // PROCESSES, start, out))
+                for _ in range(PROCESSES)
+            ]
+            for p in procs:
+                p.start()
+            time.sleep(3.0)  # Imports der Kindprozesse abwarten
+            started = time.perf_counter()
+            start.set()
+            results = [out.get() for _ in procs]
+            elapsed = time.perf_counter() - started
+            for p in procs:
+                p.join()
+
+            reader = JobManager(logs_dir=Path(tmp), store_path=store_path)
+            all_jids = [jid for jids, _ in results for jid in jids]
+            visible = sum(1 for jid in all_jids if reader.result(jid)["status"] == "success")
+            print(
+                f"sqlite, {PROCESSES} processes   : {len(all_jids) / elapsed:8.0f} jobs/s submit->success (aggregate), "
+                f"{visible}/{len(all_jids)} jobs visible from another process"
+            )
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_store_sqlite", log_level="ERROR")
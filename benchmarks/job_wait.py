@@ -0,0 +1,58 @@
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode, JobClass, JobLogMode
+from server.job_manager import JobManager
+
+# Zeit zwischen Job-Ende und Antwort an den Aufrufer, 50 Fragen mit 100–400 ms Laufzeit:
+# Polling von job_result alle 0.5 s (bisher im Chat-API) vs. wait_job (Future des Jobs).
+ASKS = 50
+POLL_S = 0.5
+
+
+async def _ask(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+    await asyncio.sleep(random.uniform(0.1, 0.4))
+    return {"answer": "answer", "sources": [], "finished_at": time.perf_counter()}
+
+
+async def _poll(jobs: JobManager, jid: str) -> dict[str, Any]:
+    while True:
+        meta = jobs.result(jid)
+        if meta["status"] in ("success", "error"):
+            return meta
+        await asyncio.sleep(POLL_S)
+
+
+async def _run(jobs: JobManager, waiter: Callable[[JobManager, str], Any]) -> list[float]:
+    async def one() -> float:
+        jid = jobs.submit("ask", _ask, stream=True, job_class=JobClass.INTERACTIVE, log_mode=JobLogMode.NONE)
+        meta = await waiter(jobs, jid)
+        return (time.perf_counter() - meta["result"]["finished_at"]) * 1000
+
+    return list(await asyncio.gather(*(one() for _ in range(ASKS))))
+
+
+def main() -> ExitCode:
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = JobManager(logs_dir=Path(tmp))
+            for label, waiter in (
+                (f"poll every {POLL_S}s", _poll),
+                ("wait_job", lambda jm, jid: jm.wait(jid, 30.0)),
+            ):
+                gaps = sorted(asyncio.run(_run(jobs, waiter)))
+                print(f"{label:<16}: added latency p50 {statistics.median(gaps):7.2f} ms, max {gaps[-1]:7.2f} ms")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "job_wait", log_level="ERROR")
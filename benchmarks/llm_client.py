@@ -0,0 +1,107 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+import requests
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode
+from helpers.fake_ollama import start_fake_ollama
+from rag.llm_client import OllamaClient
+from rag.llm_ollama import _build_payload, call_llm_ollama
+
+# 1) Overhead pro Request ohne Modellzeit: neue Verbindung je Request (requests.post) vs. Keep-Alive-Session
+#    vs. asynchroner httpx-Pool.
+# 2) Durchsatz bei vielen gleichzeitigen Fragen mit ~200 ms LLM-Latenz: 3 Job-Worker-Threads (bisher)
+#    vs. ein asyncio-Client mit begrenzter Parallelität.
+ROUNDS = 200
+CONCURRENT = 64
+JOB_WORKERS = 3
+CONCURRENCY = 16
+
+
+def _payload() -> dict:
+    return _build_payload(
+        "question", system_prompt="system", model="fake", temperature=0.0, num_ctx=4096, max_tokens=8, stream=False,
+    )
+
+
+def _time_sequential(call: Callable[[], None]) -> list[float]:
+    samples: list[float] = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def _async_sequential(endpoint: str) -> list[float]:
+    client = OllamaClient()
+    samples: list[float] = []
+    try:
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            await client.chat(endpoint, _payload())
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        await client.aclose()
+    return samples
+
+
+async def _async_concurrent(endpoint: str) -> float:
+    client = OllamaClient()
+    slots = asyncio.Semaphore(CONCURRENCY)
+
+    async def one() -> None:
+        async with slots:
+            await client.chat(endpoint, _payload())
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(CONCURRENT)))
+        return time.perf_counter() - started
+    finally:
+        await client.aclose()
+
+
+def _report(label: str, samples: list[float]) -> None:
+    p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22}: p50 {statistics.median(samples):6.2f} ms | p95 {p95:6.2f} ms")
+
+
+def main() -> ExitCode:
+    fast, fast_endpoint = start_fake_ollama(first_token_ms=0, token_ms=0, max_tokens=8)
+    slow, slow_endpoint = start_fake_ollama(first_token_ms=200, token_ms=0, max_tokens=8)
+    try:
+        # --- Overhead pro Request ---
+        _report("requests.post (new)", _time_sequential(
+            lambda: requests.post(fast_endpoint, json=_payload(), timeout=10).raise_for_status()
+        ))
+        _report("pooled session", _time_sequential(
+            lambda: call_llm_ollama("question", endpoint=fast_endpoint, max_tokens=8)  # type: ignore[arg-type]
+        ))
+        _report("async httpx pool", asyncio.run(_async_sequential(fast_endpoint)))
+
+        # --- Durchsatz bei gleichzeitigen Fragen ---
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=JOB_WORKERS) as pool:
+            list(pool.map(
+                lambda _i: call_llm_ollama("question", endpoint=slow_endpoint, max_tokens=8),  # type: ignore[arg-type]
+                range(CONCURRENT),
+            ))
+        threads_s = time.perf_counter() - started
+        async_s = asyncio.run(_async_concurrent(slow_endpoint))
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        fast.shutdown()
+        slow.shutdown()
+    print(f"{CONCURRENT} questions, {JOB_WORKERS} worker threads : {threads_s:6.2f} s ({CONCURRENT / threads_s:5.1f} req/s)")
+    print(f"{CONCURRENT} questions, asyncio (limit {CONCURRENCY})  : {async_s:6.2f} s ({CONCURRENT / async_s:5.1f} req/s)")
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "llm_client")
@@ -0,0 +1,64 @@
+import asyncio
+import statistics
+import time
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode
+from helpers.fake_ollama import start_fake_ollama
+from rag.llm_ollama import acall_llm_ollama
+from rag.llm_router import get_llm_router
+
+# Drei gesunde Ollama-Stand-ins (100 ms Prefill, 10 % Ausreißer mit +1.5 s) und eine defekte Instanz.
+# Verglichen werden: eine einzelne Instanz, Router ohne Hedging, Router mit Hedging nach 300 ms.
+QUESTIONS = 60
+CONCURRENT = 6
+HEDGE_AFTER_S = 0.3
+
+custom_settings: AppSettings = get_settings()
+
+
+async def _run(endpoints: list[str], hedge_after_s: float) -> list[float]:
+    custom_settings.OLLAMA_ENDPOINTS = endpoints  # type: ignore[assignment]
+    get_llm_router.cache_clear()
+    slots = asyncio.Semaphore(CONCURRENT)
+    samples: list[float] = []
+
+    async def ask() -> None:
+        async with slots:
+            started = time.perf_counter()
+            await acall_llm_ollama("question", max_tokens=8, on_token=lambda _t: None, hedge_after_s=hedge_after_s)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(ask() for _ in range(QUESTIONS)))
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<26}: p50 {statistics.median(ordered):7.1f} ms | p95 {p95:7.1f} ms | max {ordered[-1]:7.1f} ms")
+
+
+def main() -> ExitCode:
+    healthy = [start_fake_ollama(first_token_ms=100, token_ms=2, tail_rate=0.1, tail_ms=1500) for _ in range(3)]
+    broken = start_fake_ollama(error_rate=1.0)
+    servers = [srv for srv, _ in healthy] + [broken[0]]
+    pool = [ep for _, ep in healthy] + [broken[1]]
+    try:
+        _report("single endpoint", asyncio.run(_run(pool[:1], 0.0)))
+        _report("router (4 endpoints)", asyncio.run(_run(pool, 0.0)))
+        _report(f"router + hedge {HEDGE_AFTER_S}s", asyncio.run(_run(pool, HEDGE_AFTER_S)))
+        for row in get_llm_router().stats():
+            print(f"  {row['url']:<36} requests {row['requests']:3d} errors {row['errors']:3d} circuit_open {row['circuit_open']}")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        for srv in servers:
+            srv.shutdown()
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "llm_router")
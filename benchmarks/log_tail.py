@@ -0,0 +1,67 @@
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode
+from server.job_manager import read_from, tail_lines
+
+# Letzte 200 Zeilen eines 1 GB großen Crawl-Logs: ganze Datei lesen (bisher) vs. rückwärts ab Dateiende.
+# Dazu Mitlesen per Offset: ein Poll nach 1 MB neuen Logzeilen liest nur diese.
+# `--skip-full` lässt die speicherhungrige Variante aus.
+LOG_BYTES = 1024**3
+TAIL = 200
+_LINE = "2026-10-19 12:00:00.000 | INFO     | scrapy.core.engine:_next_request:123 - Crawled (200) <GET https://example.org/page>\n"
+
+
+def _write_log(path: Path, size: int) -> None:
+    block = _LINE * (1024 * 1024 // len(_LINE))
+    with path.open("w", encoding="utf-8") as f:
+        written = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+
+
+def _full_read_tail(path: Path, lines: int) -> str:
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    return "".join(text.splitlines(True)[-lines:])
+
+
+def _timed(label: str, fn) -> str:  # type: ignore[no-untyped-def]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    out = fn()
+    elapsed = (time.perf_counter() - started) * 1000
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{label:<28}: {elapsed:9.1f} ms, peak RSS +{(rss_after - rss_before) / 1024:7.1f} MiB")
+    return out
+
+
+def main() -> ExitCode:
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "job_crawl_bench.log"
+            _write_log(path, LOG_BYTES)
+            print(f"log size: {path.stat().st_size / 1024**2:.0f} MiB")
+            _timed(f"tail {TAIL} (seek backward)", lambda: tail_lines(path, TAIL))
+
+            _, offset, _ = read_from(path, path.stat().st_size, 0)
+            with path.open("a", encoding="utf-8") as f:
+                f.write(_LINE * (1024 * 1024 // len(_LINE)))
+            text = _timed("follow (1 MiB new)", lambda: read_from(path, offset, 2 * 1024 * 1024)[0])
+            print(f"  follow returned {len(text.splitlines())} new line(s)")
+
+            if "--skip-full" not in sys.argv:
+                slow = _timed(f"tail {TAIL} (read whole file)", lambda: _full_read_tail(path, TAIL))
+                print(f"  same result: {slow == tail_lines(path, TAIL)}")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "log_tail", log_level="ERROR")
@@ -0,0 +1,120 @@
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+from loguru import logger
+from benchmarks.runner import run_benchmark
+import vector_database.create_chromadb as create_chromadb
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode
+from pipeline.docs_pipeline import run_docs_pipeline
+from pipeline.stages import StageResult
+from vector_database.sharding import shard_names
+
+# Pipeline mit synthetischem Crawl (PAGES Seiten nach CRAWL_S Sekunden), echtem Chunking und echtem Chroma-Ingest.
+# Der erste Lauf bricht im Ingest nach FAIL_AFTER_BATCHES Batches ab. Verglichen wird die Wiederholung ohne
+# Checkpoints (alles neu) mit dem fortgesetzten Lauf; danach ein Lauf ohne Änderungen und ein erzwungener Recrawl
+# mit gleichem Inhalt (chunk und ingest werden über den Inhalts-Digest übersprungen).
+PAGES = 120
+SECTIONS_PER_PAGE = 4
+CRAWL_S = 3.0
+BATCH_SIZE = 50
+FAIL_AFTER_BATCHES = 8
+
+custom_settings: AppSettings = get_settings()
+
+
+def _page(i: int) -> dict[str, Any]:
+    section = custom_settings.SECTION_CATEGORIES[i % len(custom_settings.SECTION_CATEGORIES)]
+    body = "\n\n".join(
+        f"## Topic {i}.{s} {{#topic-{i}-{s}}}\n\n"
+        + " ".join(f"Paragraph {s} of page {i} explains {section} setting number {w}." for w in range(12))
+        for s in range(SECTIONS_PER_PAGE)
+    )
+    return {"url": f"https://docs.example.org/{section}/page-{i}/", "title": f"Page {i}", "text": body}
+
+
+def _synthetic_crawl(feed_dir: Path) -> Callable[[], None]:
+    def crawl() -> None:
+        time.sleep(CRAWL_S)
+        feed_dir.mkdir(parents=True, exist_ok=True)
+        out = feed_dir / f"out_{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.jsonl"
+        with out.open("w", encoding="utf-8") as f:
+            for i in range(PAGES):
+                f.write(json.dumps(_page(i)) + "\n")
+    return crawl
+
+
+def _failing_add_batch(original: Callable[..., None]) -> Callable[..., None]:
+    lock = threading.Lock()
+    done = [0]
+
+    def add_batch(*args: Any, **kwargs: Any) -> None:
+        with lock:
+            if done[0] >= FAIL_AFTER_BATCHES:
+                raise RuntimeError("simulated ingest crash")
+            done[0] += 1
+        original(*args, **kwargs)
+    return add_batch
+
+
+def _run(root: Path, db: str, force: tuple[str, ...] = ()) -> tuple[float, list[StageResult]]:
+    started = time.perf_counter()
+    results = run_docs_pipeline(
+        _synthetic_crawl(root / "feed"),
+        force=force,
+        state_dir=root / "state",
+        feed_dir=root / "feed",
+        chunks_dir=root / "chunks",
+        database_path=root / db,
+    )
+    return time.perf_counter() - started, results
+
+
+def _count(database_path: Path) -> int:
+    client = create_chromadb.init_chroma_client(database_path)
+    return sum(create_chromadb.get_collection(client, name).count() for name in shard_names())
+
+
+def _report(label: str, seconds: float, results: list[StageResult]) -> None:
+    stages = ", ".join(f"{r.name} {'skip' if r.skipped else f'{r.seconds:.1f}s'}" for r in results)
+    print(f"{label:<28}: {seconds:6.1f} s  ({stages})")
+
+
+def main() -> ExitCode:
+    custom_settings.CHROMA_BATCH_SIZE = BATCH_SIZE
+    custom_settings.CHROMA_REMOVE_OLD = False
+    original = create_chromadb._add_batch
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            resumed_root, scratch_root = Path(tmp) / "resumed", Path(tmp) / "scratch"
+            create_chromadb._add_batch = _failing_add_batch(original)  # type: ignore[assignment]
+            started = time.perf_counter()
+            try:
+                _run(resumed_root, "db")
+            except RuntimeError as e:
+                print(f"{'first run':<28}: {time.perf_counter() - started:6.1f} s  (failed in ingest: {e})")
+            finally:
+                create_chromadb._add_batch = original  # type: ignore[assignment]
+
+            # Ohne Checkpoints: dieselbe Arbeit komplett wiederholen
+            _report("rerun without checkpoints", *_run(scratch_root, "db"))
+            _report("rerun with checkpoints", *_run(resumed_root, "db"))
+            chunks = sum(1 for _ in next((resumed_root / "chunks").glob("*.jsonl")).open(encoding="utf-8"))
+            print(f"{'resumed index':<28}: {_count(resumed_root / 'db')}/{chunks} chunks, "
+                  f"scratch index {_count(scratch_root / 'db')}/{chunks}")
+            _report("rerun, nothing changed", *_run(resumed_root, "db"))
+            _report("forced recrawl, same pages", *_run(resumed_root, "db", force=("crawl",)))
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        create_chromadb._add_batch = original  # type: ignore[assignment]
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "pipeline_resume")
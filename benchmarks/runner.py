@@ -0,0 +1,27 @@
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable
+from loguru import logger
+from definitions.custom_enums import ExitCode
+
+# Logs der Benchmarks landen außerhalb des Repos
+BENCH_LOG_DIR = Path(tempfile.gettempdir()) / "rag_benchmarks"
+
+
+def run_benchmark(main: Callable[[], ExitCode], name: str, *, log_level: str = "INFO") -> ExitCode:
+    """
+    Gemeinsamer Rahmen aller Benchmarks: Loguru schreibt nur in `BENCH_LOG_DIR/<name>.log` (ab `log_level`;
+    Benchmarks der Job-Maschinerie nutzen "ERROR", damit globales Logging die Messung nicht verfälscht),
+    der Bericht geht per print auf STDOUT, das Ergebnis samt Logpfad auf STDERR.
+    """
+    BENCH_LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = BENCH_LOG_DIR / f"{name}.log"
+    logger.remove()
+    logger.add(str(log_path), level=log_level)
+    result = main()
+    if result == ExitCode.SUCCESS:
+        print(f"Finished {name} benchmark (log: {log_path})", file=sys.stderr)
+    elif result == ExitCode.ERROR:
+        print(f"{name} benchmark failed, see {log_path}", file=sys.stderr)
+    return result
@@ -0,0 +1,51 @@
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode
+from vector_database.create_chromadb import ingest_chunks_to_chroma
+from vector_database.query_chroma import query_db
+
+# Misst Ingest-Zeit und Query-Latenz für verschiedene Shard-Anzahlen (nutzt die neueste Chunk-Datei)
+SHARD_COUNTS = (1, 2, 4, 8)
+QUERY_ROUNDS = 5
+QUESTIONS = [
+    "How do I define my first FastAPI endpoint with @app.get?",
+    "How do I start a FastAPI server with uvicorn?",
+    "How do I raise an HTTPException with status code and detail?",
+    "How do I use FastAPI with Docker?",
+    "How do I configure CORS settings?",
+]
+
+def main() -> ExitCode:
+    rows: list[str] = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for n in SHARD_COUNTS:
+                db_path = Path(tmp) / f"shards_{n}"
+                started = time.perf_counter()
+                ingest_chunks_to_chroma(database_path=db_path, n_shards=n)
+                ingest_s = time.perf_counter() - started
+
+                query_db(QUESTIONS[0], database_path=db_path)  # Warm-up (Modell laden)
+                latencies: list[float] = []
+                for _ in range(QUERY_ROUNDS):
+                    for q in QUESTIONS:
+                        t0 = time.perf_counter()
+                        query_db(q, database_path=db_path)
+                        latencies.append((time.perf_counter() - t0) * 1000)
+                latencies.sort()
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                rows.append(f"{n:>6} | {ingest_s:>9.2f} | {statistics.median(latencies):>8.1f} | {p95:>8.1f}")
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    print("shards | ingest s | p50 ms | p95 ms")
+    print("\n".join(rows))
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "shards")
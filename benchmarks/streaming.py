@@ -0,0 +1,44 @@
+import statistics
+import time
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from definitions.custom_enums import ExitCode
+from helpers.fake_ollama import start_fake_ollama
+from rag.llm_ollama import call_llm_ollama
+
+# Time-to-first-token mit Streaming vs. Wartezeit bis zur vollständigen Antwort ohne Streaming,
+# gemessen gegen den lokalen Ollama-Stand-in (Prefill 300 ms, 20 ms pro Token).
+ROUNDS = 10
+
+
+def main() -> ExitCode:
+    server, endpoint = start_fake_ollama(first_token_ms=300, token_ms=20)
+    ttft: list[float] = []
+    full_stream: list[float] = []
+    full_blocking: list[float] = []
+    try:
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            first: list[float] = []
+            call_llm_ollama(
+                "question", endpoint=endpoint,  # type: ignore[arg-type]
+                on_token=lambda _t: first.append(time.perf_counter()) if not first else None,
+            )
+            full_stream.append((time.perf_counter() - started) * 1000)
+            ttft.append((first[0] - started) * 1000)
+
+            started = time.perf_counter()
+            call_llm_ollama("question", endpoint=endpoint)  # type: ignore[arg-type]
+            full_blocking.append((time.perf_counter() - started) * 1000)
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    finally:
+        server.shutdown()
+    print(f"stream   : first token p50 {statistics.median(ttft):7.1f} ms | complete p50 {statistics.median(full_stream):7.1f} ms")
+    print(f"blocking : first text  p50 {statistics.median(full_blocking):7.1f} ms (= complete answer)")
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "streaming")
@@ -0,0 +1,70 @@
+import threading
+import time
+from loguru import logger
+from benchmarks.runner import run_benchmark
+from config.settings import AppSettings, get_settings
+from definitions.custom_enums import ExitCode
+from helpers.fake_ollama import start_fake_ollama
+from rag.llm_ollama import call_llm_ollama
+from rag.llm_warmup import get_warmth_stats, preload_model
+
+# Erste Antwort nach Start bzw. nach einer Pause, gegen einen Ollama-Stand-in mit 2 s Modell-Ladezeit.
+# keep_alive ist auf 2 s verkürzt, die Pause dauert 3 s.
+# Ohne Warm-up: erste Frage und Frage nach der Pause sind kalt.
+# Mit Preload + Warm-Ping (1 s): alle Fragen warm.
+LOAD_MS = 2000
+KEEP_ALIVE = "2s"
+IDLE_S = 3.0
+PING_S = 1.0
+
+custom_settings: AppSettings = get_settings()
+
+
+def _first_token_ms(endpoint: str) -> float:
+    started = time.perf_counter()
+    first: list[float] = []
+    call_llm_ollama(
+        "question", endpoint=endpoint, max_tokens=8,  # type: ignore[arg-type]
+        on_token=lambda _t: first.append(time.perf_counter()) if not first else None,
+    )
+    return (first[0] - started) * 1000
+
+
+def _scenario(warm: bool) -> list[float]:
+    server, endpoint = start_fake_ollama(first_token_ms=100, token_ms=5, load_ms=LOAD_MS)
+    stop = threading.Event()
+    try:
+        if warm:
+            preload_model(endpoint)
+
+            def ping() -> None:
+                while not stop.wait(PING_S):
+                    preload_model(endpoint, with_system_prompt=False)
+
+            threading.Thread(target=ping, daemon=True).start()
+        samples = [_first_token_ms(endpoint), _first_token_ms(endpoint)]
+        time.sleep(IDLE_S)
+        samples.append(_first_token_ms(endpoint))
+        return samples
+    finally:
+        stop.set()
+        server.shutdown()
+
+
+def main() -> ExitCode:
+    custom_settings.OLLAMA_KEEP_ALIVE = KEEP_ALIVE
+    try:
+        cold = _scenario(warm=False)
+        warm = _scenario(warm=True)
+    except Exception as e:
+        logger.exception(e)
+        return ExitCode.ERROR
+    labels = "first / second / after idle"
+    print(f"no warm-up        ({labels}): " + " / ".join(f"{ms:7.1f} ms" for ms in cold))
+    print(f"preload + ping    ({labels}): " + " / ".join(f"{ms:7.1f} ms" for ms in warm))
+    print(f"  {get_warmth_stats().stats()}")
+    return ExitCode.SUCCESS
+
+
+if __name__ == "__main__":
+    run_benchmark(main, "warmup")
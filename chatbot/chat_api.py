@@ -1,19 +1,32 @@
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, Response
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
-from typing import Any
+from typing import Any, AsyncIterator
+from contextlib import asynccontextmanager
+import json
 from config.settings import AppSettings, get_settings
 import asyncio
 import httpx
-from server.mcp_server import ask_job, job_result # ask_job und job_result sind async -> await notwendig
+from server.mcp_server import abandon_job, ask_job, job_partial, job_result, start_job_log_sweeper, wait_job # MCP-Tools sind async -> await notwendig
+from rag.llm_warmup import start_llm_warmup
 
 # Nutzung von MCP-Server-Tools im Chat-API-Kontext
 
 custom_settings: AppSettings = get_settings()
 
-app = FastAPI(title="Docs RAG Chat")
+# So oft prüft /chat/ask während des Wartens, ob der Client noch verbunden ist
+DISCONNECT_POLL_S = 0.5
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Modell im Hintergrund vorladen, damit die erste Frage nicht die Ladezeit bezahlt
+    start_llm_warmup()
+    start_job_log_sweeper()
+    yield
+
+app = FastAPI(title="Docs RAG Chat", lifespan=lifespan)
 
 # Vermeide 404 für favicon.ico
 @app.get("/favicon.ico",include_in_schema=False)
@@ -37,35 +50,122 @@ def home():
 
 class AskReq(BaseModel):
     question: str
+    section: str | None = None
     timeout_s: int = custom_settings.OLLAMA_TIMEOUT_S
+    deadline_s: float | None = None
+
+async def _wait_or_disconnect(http: Request, job_id: str, timeout_s: float) -> dict[str, Any] | None:
+    """Wie `wait_job`; trennt der Client vorher die Verbindung, wird der Job aufgegeben und None geliefert."""
+    waiter = asyncio.ensure_future(wait_job(job_id, timeout_s=timeout_s))
+    try:
+        while not waiter.done():
+            if await http.is_disconnected():
+                abandon_job(job_id)
+                return None
+            await asyncio.wait([waiter], timeout=DISCONNECT_POLL_S)
+        return waiter.result()
+    finally:
+        waiter.cancel()
 
-@app.post("/chat/ask")
-async def chat_ask(request: AskReq) -> dict[str, Any]:
+
+@app.post("/chat/ask", response_model=None)
+async def chat_ask(request: AskReq, http: Request) -> dict[str, Any] | Response:
     # 1) Job starten (MCP-Tool direkt als Funktion aufrufen)
-    response = await ask_job(question=request.question)
+    try:
+        response = await ask_job(question=request.question, section=request.section, deadline_s=request.deadline_s)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
     job_id: str = response["job_id"]
 
-    # 2) Polling auf Ergebnis
-
-    deadline = asyncio.get_event_loop().time() + request.timeout_s
+    # 2) Auf Job-Ende warten (ohne Polling); bricht der Client ab, wird auch der Job abgebrochen
     try:
-        while True:
-            meta = await job_result(job_id)  # {"status": "...", "result": {...}|None, "error": ...}
-            if meta["status"] == "success" and meta.get("result"):
-                return meta["result"]            # -> {"answer": "...", "sources": [...]}
-            if meta["status"] == "error":
-                return meta
-            if asyncio.get_event_loop().time() > deadline:
-                raise HTTPException(504, detail="timeout")
-            await asyncio.sleep(custom_settings.POLLING_INTERVAL_S)
+        meta = await _wait_or_disconnect(http, job_id, request.timeout_s)  # {"status": "...", "result": {...}|None, "error": ...}
+        if meta is None:
+            # Client ist weg: Antwort wird nicht mehr gelesen (499 wie bei nginx)
+            return Response(status_code=499)
+        if meta["status"] == "success" and meta.get("result"):
+            return meta["result"]            # -> {"answer": "...", "sources": [...]}
+        if meta["status"] == "error":
+            if meta.get("error_type") == "LLMBusyError":
+                raise HTTPException(503, detail="LLM busy, please retry later", headers={"Retry-After": "5"})
+            return meta
+        if meta["status"] == "cancelled":
+            # Job wurde abgebrochen (abandon/cancel): Konflikt statt Timeout melden
+            raise HTTPException(409, detail=meta.get("error") or "cancelled")
+        # Zeitlimit überschritten: der Job würde sonst ohne Leser weiterlaufen
+        abandon_job(job_id)
+        raise HTTPException(504, detail="timeout")
     except asyncio.CancelledError:
         # Client hat Verbindung abgebrochen
+        abandon_job(job_id)
+        raise
+    except HTTPException:
         raise
     except httpx.ReadTimeout:
+        abandon_job(job_id)
         raise HTTPException(504, detail="upstream timeout")
     except httpx.ConnectTimeout:
+        abandon_job(job_id)
         raise HTTPException(504, detail="upstream connect timeout")
     except httpx.HTTPError as e:
         raise HTTPException(502, detail=f"upstream error: {e}")
     except Exception as e:
-        raise HTTPException(500, detail=f"internal error while polling: {e}")
\ No newline at end of file
+        raise HTTPException(500, detail=f"internal error while waiting for the answer: {e}")
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/chat/stream")
+async def chat_stream(
+    question: str,
+    section: str | None = None,
+    timeout_s: int = custom_settings.OLLAMA_TIMEOUT_S,
+    deadline_s: float | None = None,
+) -> StreamingResponse:
+    """
+    Server-Sent Events: `token` mit Textdeltas sobald das LLM sie liefert, am Ende `done` mit
+    {"answer", "sources"} bzw. `error`.
+    """
+    try:
+        response = await ask_job(question=question, section=section, deadline_s=deadline_s)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    job_id: str = response["job_id"]
+
+    async def events() -> AsyncIterator[str]:
+        deadline = asyncio.get_event_loop().time() + timeout_s
+        offset = 0
+        finished = False
+        try:
+            while True:
+                remaining = deadline - asyncio.get_event_loop().time()
+                if remaining <= 0:
+                    yield _sse("error", {"detail": "timeout"})
+                    return
+                part = await job_partial(job_id, offset=offset, wait_s=min(1.0, remaining))
+                if part["status"] == "unknown":
+                    yield _sse("error", {"detail": part.get("error")})
+                    return
+                if part["text"]:
+                    yield _sse("token", {"text": part["text"]})
+                offset = part["offset"]
+                if part["done"]:
+                    finished = True
+                    meta = await job_result(job_id)
+                    if meta["status"] == "success":
+                        yield _sse("done", meta["result"])
+                    else:
+                        yield _sse("error", {"detail": meta.get("error"), "busy": meta.get("error_type") == "LLMBusyError"})
+                    return
+        finally:
+            if not finished:
+                # Client hat den Stream geschlossen oder die Zeit ist um: Job aufgeben (sofern niemand sonst wartet)
+                abandon_job(job_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -12,6 +12,10 @@
     setBusy(true);
     appendMD('you', q);
     inputEl.value = '';
+    if (window.EventSource) {
+      askStreaming(q);
+      return;
+    }
     try {
       const res = await fetch('/chat/ask', {
         method: 'POST',
@@ -31,6 +35,37 @@
     }
   }
 
+  // Antwort per Server-Sent Events: Tokens erscheinen sofort, Quellen am Ende
+  function askStreaming(q) {
+    const d = createMsg('bot');
+    let text = '';
+    let pending = false;
+    const es = new EventSource('/chat/stream?question=' + encodeURIComponent(q));
+
+    const finish = () => { es.close(); setBusy(false); };
+
+    es.addEventListener('token', ev => {
+      text += JSON.parse(ev.data).text;
+      if (pending) return;
+      pending = true; // höchstens ein Re-Render pro Frame
+      requestAnimationFrame(() => { pending = false; renderMD(d, text); });
+    });
+    es.addEventListener('done', ev => {
+      const data = JSON.parse(ev.data); // {answer, sources}
+      renderMD(d, data.answer, data.sources);
+      finish();
+    });
+    es.addEventListener('error', ev => {
+      let detail = 'Verbindung unterbrochen';
+      try {
+        const data = JSON.parse(ev.data);
+        detail = data.busy ? 'Der Server ist gerade ausgelastet, bitte gleich noch einmal fragen.' : (data.detail || detail);
+      } catch (_) { /* Verbindungsfehler ohne Daten */ }
+      renderMD(d, text ? `${text}\n\nFehler: ${detail}` : `Fehler: ${detail}`);
+      finish();
+    });
+  }
+
   function setBusy(state){
     isAsking = state;
     sendBtn.disabled = state;
@@ -44,10 +79,18 @@
     }
   }
 
-  function appendMD(cls, mdText, sources) {
+  function createMsg(cls) {
     const d = document.createElement('div');
     d.className = 'msg ' + cls;
+    chatEl.insertBefore(d, chatEl.firstChild);
+    return d;
+  }
+
+  function appendMD(cls, mdText, sources) {
+    renderMD(createMsg(cls), mdText, sources);
+  }
 
+  function renderMD(d, mdText, sources) {
     // Markdown -> HTML (falls marked fehlt, fallback auf Text)
     let rawHtml = mdText ?? '';
     if (window.marked) {
@@ -83,9 +126,6 @@
       d.appendChild(ol);
     }
 
-
-    chatEl.insertBefore(d, chatEl.firstChild);
-
     // Syntax-Highlighting
     if (window.hljs) {
       d.querySelectorAll('pre code').forEach(block => { window.hljs.highlightElement(block); });
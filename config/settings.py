@@ -2,6 +2,7 @@ from typing import Annotated
 from pydantic import Field, HttpUrl, TypeAdapter, EmailStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from definitions.custom_enums import JobLogMode, JobStoreBackend, ShardStrategy
 
 _http_url = TypeAdapter(HttpUrl)
 
@@ -21,16 +22,76 @@ class AppSettings(BaseSettings):
         description="Preferred ONNX Runtime providers when using GPU. E.g. ['CUDAExecutionProvider', 'CPUExecutionProvider'] or ['TensorrtExecutionProvider', 'CUDAExecutionProvider', 'CPUExecutionProvider'] if TensorRT is installed."
     )
 
+    # Query-Embeddings: LRU-Cache und Micro-Batching paralleler Anfragen (0 ms = kein Batching)
+    EMBED_QUERY_CACHE_SIZE: int = 2048
+    EMBED_BATCH_WINDOW_MS: float = 3.0
+    EMBED_MAX_BATCH: int = 32
+
     CHUNK_MAX_CHARS: int = 1000
     CHUNK_OVERLAP: int = 100
 
+    # Pipeline-Checkpoints: unveränderte Stages (gleiche Konfiguration und Eingaben) werden übersprungen,
+    # ein abgebrochener Ingest setzt nach dem letzten geschriebenen Batch fort
+    PIPELINE_STATE_DIR: str = "./pipeline_state"
+    # Crawl-Ergebnis gilt so lange als aktuell (Sekunden, 0 = immer neu crawlen)
+    PIPELINE_CRAWL_MAX_AGE_S: float = 24 * 3600
+
     CHROMA_N_RESULTS: int = 3
 
+    # Sharding: 1 = eine Collection "docs" (Standard); >1 verteilt per Hash der URL auf mehrere Collections.
+    # CHROMA_SHARD_BY=section legt stattdessen eine Collection pro Section an.
+    CHROMA_N_SHARDS: int = 1
+    CHROMA_SHARD_BY: ShardStrategy = ShardStrategy.HASH
+    CHROMA_INGEST_WORKERS: int = 4  # parallele Writer beim Ingest
+    CHROMA_QUERY_WORKERS: int = 8   # parallele Shard-Abfragen
+
     SECTION_UNKNOWN: str = "unknown"
     SECTION_CATEGORIES: list[str] = ["tutorial", "advanced", "reference", "alternatives", "deployment", "benchmarks"]
 
-    RAG_MAX_CONTEXT_CHARS: int = 9000
+    # Kontext wird in Tokens budgetiert: num_ctx - OLLAMA_MAX_TOKENS - Prompt-Overhead
+    RAG_TOKENIZER: str | None = None       # tokenizer.json oder HF-Repo des LLMs; sonst Schätzung
+    RAG_CHARS_PER_TOKEN: float = 3.2       # Kalibrierung der Schätzung (konservativ für Text mit Code)
+    RAG_PROMPT_TOKEN_MARGIN: int = 64      # Reserve für Chat-Template und Schätzfehler
     RAG_MAX_CHUNKS_PER_URL: int = 3
+    RAG_STITCH_CHUNKS: bool = True      # benachbarte Chunks einer URL zusammenfügen (ohne Overlap)
+    RAG_FILL_CHUNK_GAPS: bool = False   # fehlenden Nachbarn bei Lücke (i, i+2) aus Chroma nachladen
+    RAG_TERMS_CACHE_SIZE: int = 50_000  # geparste Term-Hashes pro Chunk-ID (Keyword-Scoring)
+
+    # Extraktive Kompression: pro Chunk nur die zur Query passendsten Sätze/Code-Blöcke behalten
+    RAG_COMPRESS_CONTEXT: bool = False
+    RAG_COMPRESS_KEEP_RATIO: float = 0.5
+    RAG_COMPRESS_MIN_UNITS: int = 2
+
+    # Section-Routing: Query wird per Keyword-Regeln auf wahrscheinliche Sections eingeschränkt
+    RAG_SECTION_ROUTING: bool = True
+    RAG_SECTION_MIN_SCORE: int = 2          # Mindestanzahl Keyword-Treffer der besten Section (1 = Zufallstreffer)
+    RAG_SECTION_MIN_MARGIN: int = 1         # Vorsprung der besten Section vor der zweitbesten
+    RAG_SECTION_MIN_CONFIDENCE: float = 0.6 # Anteil der besten Section an allen Treffern
+    # Nur Begriffe, die praktisch nur in ihrer Section vorkommen (kein "https", "workers", "production" o. Ä.)
+    RAG_SECTION_KEYWORDS: dict[str, list[str]] = Field(
+        default_factory=lambda: {
+            "tutorial": ["tutorial", "getting started", "first steps", "beginner"],
+            "advanced": ["advanced", "middleware", "websocket", "websockets", "lifespan", "sub applications", "custom response"],
+            "reference": ["api reference", "signature"],
+            "deployment": ["deploy", "deployment", "docker", "gunicorn", "kubernetes", "uvicorn workers"],
+            "alternatives": ["alternative", "alternatives", "flask", "django", "inspiration"],
+            "benchmarks": ["benchmark", "benchmarks", "performance comparison"],
+        },
+        description="Keywords per section used by the query router (matched on word boundaries, case-insensitive)."
+    )
+
+    # Antwort-Cache (exakt + semantisch über Query-Embeddings), wird nach jedem Ingest invalidiert
+    RAG_ANSWER_CACHE_ENABLED: bool = True
+    RAG_ANSWER_CACHE_SIZE: int = 1000
+    RAG_ANSWER_CACHE_TTL_S: float = 3600
+    RAG_ANSWER_CACHE_SIMILARITY: float = 0.95
+
+    # Latenzziel pro Frage in Sekunden (0 = keins): bei knapper Zeit optionale Stufen überspringen,
+    # Kontext und num_predict kürzen, notfalls extraktive Antwort aus den Treffern
+    RAG_DEADLINE_S: float = 0.0
+    RAG_DEADLINE_SAFETY: float = 0.85        # nur dieser Anteil der Restzeit wird verplant
+    RAG_DEADLINE_MIN_CTX_RATIO: float = 0.25 # Kontext höchstens auf diesen Anteil des Budgets kürzen
+    RAG_DEADLINE_MIN_TOKENS: int = 64        # darunter lohnt der LLM-Aufruf nicht mehr
 
     OLLAMA_MODEL: str = "mistral:7b-instruct"
     OLLAMA_TEMPERATURE: float = 0.1 # 0.0 = deterministic, 1.0 = creative
@@ -42,6 +103,28 @@ class AppSettings(BaseSettings):
         Field(default_factory=lambda: _http_url.validate_python("http://localhost:11434/api/chat"))
     ]
     OLLAMA_TIMEOUT_S: int = 120
+    # Wie lange Ollama das Modell nach dem letzten Request im Speicher hält (Ollama-Dauer, z. B. "30m", "-1" = immer)
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    # Modell beim Serverstart vorladen; optional periodischer Warm-Ping in Sekunden (0 = aus, sollte < KEEP_ALIVE sein)
+    OLLAMA_PRELOAD: bool = True
+    OLLAMA_WARM_PING_S: float = 0.0
+    OLLAMA_CONNECT_TIMEOUT_S: float = 5.0
+    # Verbindungspool (Keep-Alive)
+    OLLAMA_MAX_CONNECTIONS: int = 16
+    OLLAMA_MAX_KEEPALIVE: int = 8
+    # Zugangskontrolle: max. gleichzeitige LLM-Requests pro Prozess (0 = unbegrenzt), Warteschlange davor;
+    # Ablehnung ("busy"), wenn die Queue voll ist oder die (geschätzte) Wartezeit MAX_QUEUE_WAIT_S übersteigt
+    OLLAMA_MAX_CONCURRENCY: int = 8
+    OLLAMA_MAX_QUEUE: int = 32
+    OLLAMA_MAX_QUEUE_WAIT_S: float = 30.0
+    # Mehrere Ollama-Instanzen (leer = nur OLLAMA_ENDPOINT); Routing nach wenigsten offenen Requests
+    OLLAMA_ENDPOINTS: list[HttpUrl] = Field(default_factory=list)
+    OLLAMA_HEALTH_INTERVAL_S: float = 10.0
+    # Circuit Breaker: nach N Fehlern in Folge wird eine Instanz für COOLDOWN Sekunden übersprungen
+    OLLAMA_BREAKER_FAILURES: int = 3
+    OLLAMA_BREAKER_COOLDOWN_S: float = 30.0
+    # Hedging: ohne Antwort (bzw. erstes Token) nach so vielen Sekunden zweite Instanz parallel fragen (0 = aus)
+    OLLAMA_HEDGE_AFTER_S: float = 0.0
 
     # This system prompt is AI generated
     SYSTEM_PROMPT: str = Field(
@@ -78,7 +161,31 @@ class AppSettings(BaseSettings):
 
     API_KEY: str | None = None
 
-    POLLING_INTERVAL_S: float = 0.5
+    # Eigene Worker-Pools: interaktiv = Retrieval von Fragen und search_docs (das Warten auf das LLM belegt keinen
+    # Worker), Batch = crawl/chunk/ingest/pipeline
+    JOBS_INTERACTIVE_WORKERS: int = 4
+    JOBS_BATCH_WORKERS: int = 2
+    # Gleiche Frage bereits in Arbeit: an deren Job anhängen statt neu zu rechnen (Single-Flight)
+    JOBS_COALESCE_ASKS: bool = True
+    # Logs von ask-Jobs: none (nur Traceback bei Fehlern), memory (Ringpuffer) oder file (zum Debuggen)
+    JOBS_ASK_LOG_MODE: JobLogMode = JobLogMode.NONE
+    JOBS_LOG_RING_LINES: int = 500
+    # Job-Logdateien älter als JOBS_LOG_MAX_AGE_S regelmäßig löschen (Intervall 0 = aus)
+    JOBS_LOG_MAX_AGE_S: float = 7 * 24 * 3600
+    JOBS_LOG_SWEEP_INTERVAL_S: float = 3600
+    # Job-Tabelle: abgeschlossene Jobs verfallen nach JOBS_TTL_S; darüber hinaus LRU-Verdrängung
+    JOBS_TTL_S: float = 3600
+    JOBS_MAX_ENTRIES: int = 10_000
+    JOBS_MAX_RESULT_BYTES: int = 64 * 1024 * 1024
+    # Harte Laufzeitgrenze pro Job-Typ in Sekunden ab Start (fehlt/0 = keine); danach Abbruch mit JobTimeoutError
+    JOBS_TIMEOUT_S: dict[str, float] = Field(
+        default_factory=lambda: {"crawl": 6 * 3600, "chunk": 3600, "ingest": 4 * 3600, "pipeline": 12 * 3600, "ask": 300}
+    )
+    # Abbruch von Subprozessen (crawl): so lange nach SIGTERM warten, dann SIGKILL
+    JOBS_CANCEL_GRACE_S: float = 10.0
+    # Job-Tabelle im Prozess (memory) oder in SQLite (für mehrere Serverprozesse, übersteht Neustarts)
+    JOBS_STORE: JobStoreBackend = JobStoreBackend.MEMORY
+    JOBS_STORE_PATH: str = "./job_logs/jobs.sqlite3"
 
     model_config = SettingsConfigDict(
         env_file=".env",
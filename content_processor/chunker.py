@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Dict, Any, List, Final, Tuple  # <- Tuple ergänzt
 from definitions import constants
 from loguru import logger
+from helpers.utils import extract_terms, raise_if_cancelled, serialize_terms
 from config.settings import get_settings
 custom_settings = get_settings()
 
@@ -12,6 +13,8 @@ OVERLAP_CHARS: Final[int] = custom_settings.CHUNK_OVERLAP
 
 DEFAULT_IN_DIR = Path(constants.FEED_PATH)
 DEFAULT_OUT_DIR = Path(constants.CHUNK_PATH)
+# Bei Änderungen am Chunk-Format erhöhen: die Pipeline chunkt dann neu (2: term_hashes statt terms)
+CHUNK_SCHEMA_VERSION = 2
 
 # --- Header-Kommentar & Metadaten ---
 
@@ -159,6 +162,8 @@ def _page_to_chunks(rec: Dict[str, Any]) -> List[Dict[str, Any]]:
                 "heading_path": heading_path,
                 "section": section,
                 "canonical_url": canonical_url,
+                # Einmalig vorberechnet (kompakte Hashes), damit das Keyword-Scoring pro Query keinen Regex braucht
+                "term_hashes": serialize_terms(extract_terms(piece)),
             })
             local_ord += 1
 
@@ -182,6 +187,7 @@ def build_chunks(in_path: Path | None = None, out_dir: Path | None = None) -> Pa
 
     with src.open("r", encoding="utf-8") as fin, out_path.open("w", encoding="utf-8") as fout:
         for line in fin:
+            raise_if_cancelled()
             if not line.strip():
                 continue
             page = json.loads(line)
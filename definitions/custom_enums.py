@@ -18,6 +18,8 @@ class ChunkKeys(StrEnum):
     HEADING_PATH = "heading_path"
     SECTION = "section"
     CANONICAL_URL = "canonical_url"
+    TERMS = "terms"              # ältere Indizes: Terme als leerzeichengetrennter String
+    TERM_HASHES = "term_hashes"  # kompakte Term-Hashes, siehe `helpers.utils.serialize_terms`
 
 class CrawlerOutputKeys(StrEnum):
     URL = "url"
@@ -29,7 +31,28 @@ class Names(StrEnum):
     CHUNK = "*_chunks.jsonl"
 
 
+class JobClass(StrEnum):
+    INTERACTIVE = "interactive"   # Fragen: kurz, Latenz zählt
+    BATCH = "batch"               # crawl/chunk/ingest/pipeline: lang, Durchsatz zählt
+
+
+class JobLogMode(StrEnum):
+    FILE = "file"       # eigene Logdatei pro Job
+    MEMORY = "memory"   # Ringpuffer im Speicher (kurze Jobs wie ask)
+    NONE = "none"       # kein Sink; nur bei Fehlern wird der Traceback als Log festgehalten
+
+class JobStoreBackend(StrEnum):
+    MEMORY = "memory"   # Job-Tabelle im Prozess (ein Serverprozess)
+    SQLITE = "sqlite"   # SQLite-Datei im WAL-Modus, geteilt von mehreren Serverprozessen auf einem Host
+
+
+class ShardStrategy(StrEnum):
+    HASH = "hash"
+    SECTION = "section"
+
+
 class ChromaQueryKeys(StrEnum):
+    IDS = "ids"
     DOCS = "documents"
     METAS = "metadatas"
     DISTS = "distances"
@@ -41,6 +64,7 @@ class CtxKeys(StrEnum):
     SECTION = "section"
     HEADING = "heading"
     HEADING_PATH = "heading_path"
+    ANCHOR = "anchor"
     OVERLAP = "overlap"
     DISTANCE = "distance"
     INDEX = "chunk_index"
@@ -13,6 +13,7 @@ class CtxItem(TypedDict):
     section: str
     heading: str
     heading_path: str
+    anchor: str
     chunk_index: int | None
     distance: float
     overlap: int
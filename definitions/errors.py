@@ -1,5 +1,21 @@
 class LLMError(RuntimeError):
     pass
 
+class LLMBusyError(LLMError):
+    """LLM überlastet: Request wurde von der Zugangskontrolle abgelehnt (später erneut versuchen)."""
+    pass
+
+class DeadlineExceededError(LLMError):
+    """Latenzziel einer Frage erreicht, bevor das LLM fertig war."""
+    pass
+
 class ChromaError(RuntimeError):
-    pass
\ No newline at end of file
+    pass
+
+class JobCancelledError(RuntimeError):
+    """Job wurde abgebrochen (cancel_job oder Client hat die Verbindung getrennt)."""
+    pass
+
+class JobTimeoutError(JobCancelledError):
+    """Job hat die Laufzeitgrenze seines Typs (JOBS_TIMEOUT_S) überschritten und wurde abgebrochen."""
+    pass
@@ -0,0 +1,211 @@
+"""
+Lokaler Stand-in für Ollama's /api/chat und /api/tags (für Benchmarks und Tests ohne Modell).
+
+Start als eigener Prozess:
+    python -m helpers.fake_ollama --port 11435 --first-token-ms 300 --token-ms 20
+
+oder im Prozess (Benchmarks):
+    server, endpoint = start_fake_ollama(first_token_ms=300)
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+ANSWER = (
+    "To start a FastAPI server with uvicorn, run `uvicorn main:app --host 0.0.0.0 --port 80`. "
+    "Replace main with your module and app with your FastAPI instance. Press CTRL+C to quit the server."
+)
+
+
+@dataclass
+class FakeOllamaOptions:
+    first_token_ms: float = 200.0   # Prefill bis zum ersten Token
+    token_ms: float = 15.0          # pro weiterem Token
+    max_tokens: int = 64
+    tail_rate: float = 0.0          # Anteil langsamer Requests (Latenz-Ausreißer) ...
+    tail_ms: float = 0.0            # ... mit so viel zusätzlicher Prefill-Zeit
+    error_rate: float = 0.0         # Anteil Requests mit HTTP 500 (1.0 = Instanz defekt)
+    parallel: int = 0               # gleichzeitig bearbeitete Requests wie OLLAMA_NUM_PARALLEL (0 = unbegrenzt)
+    load_ms: float = 0.0            # Modell-Ladezeit, wenn nicht (mehr) geladen (siehe `keep_alive`)
+    prefill_tps: float = 0.0        # Prompt-Tokens/s zusätzlich zu first_token_ms (0 = Prompt-Länge egal)
+
+
+_DURATION_RE = re.compile(r"^(-?\d+(?:\.\d+)?)([smh]?)$")
+
+
+def parse_keep_alive(value: Any, default_s: float = 300.0) -> float:
+    """Ollama-Dauer ("30m", "10s", 600, -1) in Sekunden; negativ = unbegrenzt."""
+    if value is None:
+        return default_s
+    match = _DURATION_RE.match(str(value).strip())
+    if not match:
+        return default_s
+    number, unit = float(match.group(1)), match.group(2)
+    if number < 0:
+        return float("inf")
+    return number * {"": 1, "s": 1, "m": 60, "h": 3600}[unit]
+
+
+class _ModelState:
+    """Geladen-Zustand des (einen) Modells; läuft nach `keep_alive` ohne Requests ab."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.loaded_until = 0.0
+
+    def ensure_loaded(self, load_ms: float, keep_alive: Any) -> float:
+        """Lädt bei Bedarf (blockierend) und gibt die Ladezeit in Sekunden zurück."""
+        with self.lock:
+            now = time.monotonic()
+            load_s = 0.0
+            if now >= self.loaded_until and load_ms > 0:
+                load_s = load_ms / 1000
+                time.sleep(load_s)
+            self.loaded_until = time.monotonic() + parse_keep_alive(keep_alive)
+            return load_s
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # Keep-Alive wie bei Ollama
+    disable_nagle_algorithm = True  # Header und Body getrennt geschrieben: sonst ~40 ms Delayed-ACK je Request
+    options: FakeOllamaOptions = FakeOllamaOptions()
+    slots: threading.Semaphore | None = None   # weitere Requests warten im Server (wie bei Ollama)
+    model: _ModelState = _ModelState()
+
+    def log_message(self, format: str, *args: Any) -> None:  # keine Ausgabe auf STDOUT/STDERR
+        pass
+
+    def _send_json(self, status: int, body: dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, obj: dict[str, Any]) -> None:
+        data = (json.dumps(obj) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        # Health-Check wie Ollama's Modell-Liste
+        if self.path.rstrip("/") != "/api/tags":
+            self._send_json(404, {"error": "not found"})
+            return
+        if self.options.error_rate >= 1.0:
+            self._send_json(500, {"error": "unavailable"})
+            return
+        self._send_json(200, {"models": [{"name": "fake"}]})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        opts = self.options
+        if random.random() < opts.error_rate:
+            self._send_json(500, {"error": "fake failure"})
+            return
+        if self.slots is None:
+            self._generate(payload)
+            return
+        with self.slots:
+            self._generate(payload)
+
+    def _generate(self, payload: dict[str, Any]) -> None:
+        opts = self.options
+        model = payload.get("model", "fake")
+        load_ns = int(self.model.ensure_loaded(opts.load_ms, payload.get("keep_alive")) * 1e9)
+        if not payload.get("messages"):
+            # Leere Nachrichtenliste: nur laden bzw. keep_alive verlängern (wie Ollama)
+            self._send_json(200, {"model": model, "done": True, "done_reason": "load", "load_duration": load_ns})
+            return
+        num_predict = int((payload.get("options") or {}).get("num_predict") or opts.max_tokens)
+        tokens = [w + " " for w in ANSWER.split(" ")][:max(1, min(num_predict, opts.max_tokens))]
+        prompt_tokens = sum(len(m.get("content", "")) for m in payload["messages"]) // 4
+
+        started = time.perf_counter()
+        prefill_ms = opts.first_token_ms + (opts.tail_ms if random.random() < opts.tail_rate else 0.0)
+        if opts.prefill_tps > 0:
+            prefill_ms += prompt_tokens / opts.prefill_tps * 1000
+        time.sleep(prefill_ms / 1000)
+        timings = {"load_duration": load_ns, "prompt_eval_count": prompt_tokens, "prompt_eval_duration": int(prefill_ms * 1e6)}
+
+        def final() -> dict[str, Any]:
+            eval_ns = int(opts.token_ms * max(1, len(tokens) - 1) * 1e6)
+            total_ns = load_ns + int((time.perf_counter() - started) * 1e9)
+            return {**timings, "eval_count": len(tokens), "eval_duration": eval_ns, "total_duration": total_ns}
+
+        if not payload.get("stream", True):
+            time.sleep(opts.token_ms * (len(tokens) - 1) / 1000)
+            self._send_json(200, {
+                "model": model,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "done": True,
+                **final(),
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, tok in enumerate(tokens):
+            if i:
+                time.sleep(opts.token_ms / 1000)
+            self._write_chunk({"model": model, "message": {"role": "assistant", "content": tok}, "done": False})
+        self._write_chunk({"model": model, "message": {"role": "assistant", "content": ""}, "done": True, **final()})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients schließen Keep-Alive-Verbindungen einfach; kein Traceback auf STDERR
+        pass
+
+
+def start_fake_ollama(port: int = 0, **options: Any) -> tuple[ThreadingHTTPServer, str]:
+    """Startet den Stand-in in einem Daemon-Thread; Rückgabe: (Server, /api/chat-Endpoint)."""
+    opts = FakeOllamaOptions(**options)
+    slots = threading.Semaphore(opts.parallel) if opts.parallel > 0 else None
+    handler = type("FakeOllamaHandler", (_Handler,), {"options": opts, "slots": slots, "model": _ModelState()})
+    server = _QuietServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    host, real_port = server.server_address[:2]
+    return server, f"http://{host}:{real_port}/api/chat"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama /api/chat server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--token-ms", type=float, default=15.0)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, default=0)
+    parser.add_argument("--load-ms", type=float, default=0.0)
+    parser.add_argument("--prefill-tps", type=float, default=0.0)
+    args = parser.parse_args()
+    srv, url = start_fake_ollama(
+        args.port, first_token_ms=args.first_token_ms, token_ms=args.token_ms, max_tokens=args.max_tokens,
+        tail_rate=args.tail_rate, tail_ms=args.tail_ms, error_rate=args.error_rate, parallel=args.parallel,
+        load_ms=args.load_ms, prefill_tps=args.prefill_tps,
+    )
+    print(f"Fake Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -1,6 +1,53 @@
+import base64
+import re
+import threading
+import zlib
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Iterable
+from definitions.errors import JobCancelledError
+
+_TERM_RE = re.compile(r"\w+")
 
     
 def count_lines(path: Path) -> int:
     with path.open("r", encoding="utf-8") as f:
-        return sum(1 for ln in f if ln.strip())
\ No newline at end of file
+        return sum(1 for ln in f if ln.strip())
+
+def extract_terms(text: str) -> set[str]:
+    """Lexikalische Terme (kleingeschrieben, eindeutig) – gleiche Tokenisierung für Chunks und Queries."""
+    return set(_TERM_RE.findall(text.lower()))
+
+
+def hash_terms(terms: Iterable[str]) -> set[int]:
+    """Terme als 24-Bit-Hashes (Kollisionen verschieben den Overlap-Score höchstens um einen Treffer)."""
+    return {zlib.crc32(t.encode("utf-8")) & 0xFFFFFF for t in terms}
+
+
+def serialize_terms(terms: Iterable[str]) -> str:
+    """
+    Kompakte Term-Hashes für die Chroma-Metadaten (nur Skalare erlaubt): sortiert, je 3 Byte, Base64 –
+    4 Zeichen pro Term statt des ganzen Wortes.
+    """
+    return base64.b64encode(b"".join(h.to_bytes(3, "big") for h in sorted(hash_terms(terms)))).decode("ascii")
+
+
+def parse_terms(encoded: str) -> frozenset[int]:
+    """Gegenstück zu `serialize_terms`."""
+    raw = base64.b64decode(encoded)
+    return frozenset(int.from_bytes(raw[i:i + 3], "big") for i in range(0, len(raw), 3))
+
+
+# Abbruch-Signal des laufenden Thread-Jobs (setzt der JobManager; Threads erben es über copy_context)
+cancel_event: ContextVar[threading.Event | None] = ContextVar("cancel_event", default=None)
+
+
+def cancel_requested() -> bool:
+    event = cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def raise_if_cancelled() -> None:
+    """Kooperativer Abbruch langer Schleifen (chunk/ingest): wirft JobCancelledError, wenn der Job abgebrochen wurde."""
+    if cancel_requested():
+        raise JobCancelledError("job cancelled")
@@ -5,13 +5,17 @@ from loguru import logger
 from config.settings import get_settings, AppSettings
 
 # der FastMCP-Server mit den @mcp.tool()-Funktionen (crawl, chunk, build_vector_db)
-from server.mcp_server import mcp
+from server.mcp_server import mcp, start_job_log_sweeper
+from rag.llm_warmup import start_llm_warmup
 
 
 async def _run() -> None:
     # Frühe Sichtprüfung der Settings, damit Fehlkonfig direkt auffällt
     custom_settings:AppSettings = get_settings()
     logger.info(f"Loaded settings: EMAIL={custom_settings.EMAIL}, SCRAPE_URL={len(custom_settings.SCRAPE_URL)} URL(s)")
+    # Modell im Hintergrund vorladen, damit die erste Frage nicht die Ladezeit bezahlt
+    start_llm_warmup()
+    start_job_log_sweeper()
     # MCP-Server über stdio starten (der Dev-Client/Inspector spricht ihn dann an)
     mcp.run()
 
@@ -0,0 +1,116 @@
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+from loguru import logger
+from config.settings import AppSettings, get_settings
+from content_processor.chunker import CHUNK_SCHEMA_VERSION, build_chunks
+from definitions import constants
+from pipeline.stages import Stage, StageResult, read_state, run_stages
+from vector_database.create_chromadb import INGEST_SCHEMA_VERSION, ingest_chunks_to_chroma
+from vector_database.embedding import EMBEDDING_MODEL_NAME
+from vector_database.index_version import INDEX_VERSION_FILE, default_database_path
+
+custom_settings: AppSettings = get_settings()
+
+PIPELINE_STAGES = ("crawl", "chunk", "ingest")
+
+
+def validate_force(force: Iterable[str]) -> tuple[str, ...]:
+    stages = tuple(force)
+    unknown = sorted(set(stages) - {*PIPELINE_STAGES, "all"})
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s) {unknown}, expected some of {[*PIPELINE_STAGES, 'all']}")
+    return stages
+
+
+def docs_pipeline_stages(
+    crawl: Callable[[], None],
+    *,
+    feed_dir: Path = constants.FEED_PATH,
+    chunks_dir: Path = constants.CHUNK_PATH,
+    database_path: Path | None = None,
+) -> list[Stage]:
+    """
+    crawl → chunk → ingest als Stages. `crawl` startet den Crawler (im Prozess oder als Subprozess);
+    sein Artefakt ist die neue Feed-Datei in `feed_dir`.
+    """
+    database_path = database_path or default_database_path()
+
+    def run_crawl(inputs: dict[str, Path], checkpoint: Path) -> Path:
+        started = time.time()
+        crawl()
+        feeds = sorted(feed_dir.glob(constants.CRAWLER_OUTPUT_DYNAMIC_NAME))
+        if not feeds or feeds[-1].stat().st_mtime < started:
+            raise RuntimeError(f"Crawl produced no new output in {feed_dir}")
+        return feeds[-1]
+
+    def run_chunk(inputs: dict[str, Path], checkpoint: Path) -> Path:
+        return build_chunks(in_path=inputs["crawl"], out_dir=chunks_dir)
+
+    def run_ingest(inputs: dict[str, Path], checkpoint: Path) -> Path:
+        ingest_chunks_to_chroma(database_path=database_path, filepath=inputs["chunk"], checkpoint_path=checkpoint)
+        return database_path / INDEX_VERSION_FILE
+
+    return [
+        Stage(
+            "crawl", run_crawl,
+            config=lambda: {"url": str(custom_settings.SCRAPE_URL)},
+            max_age_s=custom_settings.PIPELINE_CRAWL_MAX_AGE_S,
+        ),
+        Stage(
+            "chunk", run_chunk, deps=("crawl",),
+            config=lambda: {
+                "schema": CHUNK_SCHEMA_VERSION,
+                "max_chars": custom_settings.CHUNK_MAX_CHARS,
+                "overlap": custom_settings.CHUNK_OVERLAP,
+                "sections": custom_settings.SECTION_CATEGORIES,
+                "section_unknown": custom_settings.SECTION_UNKNOWN,
+            },
+        ),
+        Stage(
+            "ingest", run_ingest, deps=("chunk",),
+            config=lambda: {
+                "schema": INGEST_SCHEMA_VERSION,
+                "embedding_model": EMBEDDING_MODEL_NAME,
+                "n_shards": custom_settings.CHROMA_N_SHARDS,
+                "shard_by": str(custom_settings.CHROMA_SHARD_BY),
+                "batch_size": custom_settings.CHROMA_BATCH_SIZE,
+            },
+        ),
+    ]
+
+
+def run_docs_pipeline(
+    crawl: Callable[[], None],
+    *,
+    force: Iterable[str] = (),
+    state_dir: Path | None = None,
+    **dirs: Any,
+) -> list[StageResult]:
+    """Führt die Pipeline mit Checkpoints in `state_dir` (Default PIPELINE_STATE_DIR) aus; siehe `run_stages`."""
+    results = run_stages(
+        docs_pipeline_stages(crawl, **dirs),
+        Path(state_dir or custom_settings.PIPELINE_STATE_DIR),
+        force=validate_force(force),
+    )
+    summary = ", ".join(f"{r.name} {'skipped' if r.skipped else f'{r.seconds:.1f}s'}" for r in results)
+    logger.info(f"Pipeline finished: {summary}")
+    return results
+
+
+def pipeline_status(state_dir: Path | None = None) -> dict[str, Any]:
+    """Letzter erfolgreicher Lauf jeder Stage und offene Zwischenstände (abgebrochene Stages)."""
+    state_dir = Path(state_dir or custom_settings.PIPELINE_STATE_DIR)
+    state = read_state(state_dir)
+    return {
+        "stages": {
+            name: {
+                "artifact": entry["artifact"]["path"],
+                "digest": entry["artifact"]["digest"][:12],
+                "finished_at": entry["finished_at"],
+                "seconds": entry["seconds"],
+            }
+            for name, entry in state.items()
+        },
+        "checkpoints": sorted(p.name for p in state_dir.glob("*.ckpt")) if state_dir.exists() else [],
+    }
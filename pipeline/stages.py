@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+from loguru import logger
+from helpers.utils import raise_if_cancelled
+
+STATE_FILE = "state.json"
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def content_digest(path: Path) -> str:
+    """
+    Inhaltsadresse eines Artefakts (sha256). JSONL-Dateien werden zeilenweise und unabhängig von der Reihenfolge
+    gehasht: ein Recrawl mit denselben Seiten in anderer Reihenfolge ergibt denselben Digest.
+    """
+    if path.suffix == ".jsonl":
+        line_hashes: list[bytes] = []
+        with path.open("rb") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    line_hashes.append(hashlib.sha256(line).digest())
+        digest = hashlib.sha256(b"jsonl-set\n")
+        for h in sorted(line_hashes):
+            digest.update(h)
+        return digest.hexdigest()
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while block := f.read(_HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def describe_artifact(path: Path) -> dict[str, Any]:
+    st = path.stat()
+    return {"path": str(path.resolve()), "digest": content_digest(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def artifact_intact(artifact: dict[str, Any]) -> bool:
+    """Artefakt existiert noch mit demselben Inhalt (Größe/mtime unverändert, sonst neu hashen)."""
+    path = Path(artifact["path"])
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size == artifact["size"] and st.st_mtime_ns == artifact["mtime_ns"]:
+        return True
+    return content_digest(path) == artifact["digest"]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Ein Schritt der Pipeline.
+      - `run(inputs, checkpoint)` erhält die Ausgabe-Artefakte seiner `deps` und liefert den Pfad seines Artefakts.
+        `checkpoint` ist eine Datei für Zwischenstände (z. B. bereits geschriebene Batches), die einen
+        abgebrochenen Lauf mit denselben Eingaben fortsetzen lässt.
+      - `config()`: Einstellungen, die das Ergebnis bestimmen (Teil des Stage-Schlüssels).
+      - `max_age_s`: Ergebnis gilt danach als veraltet (für Stages ohne prüfbare Eingabe, z. B. crawl).
+    """
+    name: str
+    run: Callable[[dict[str, Path], Path], Path]
+    deps: tuple[str, ...] = ()
+    config: Callable[[], dict[str, Any]] = field(default=lambda: {})
+    max_age_s: float | None = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    artifact: dict[str, Any]
+    skipped: bool
+    seconds: float
+
+
+def read_state(state_dir: Path) -> dict[str, Any]:
+    """Checkpoints aller Stages ({} ohne bisherigen Lauf)."""
+    try:
+        return json.loads((state_dir / STATE_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        logger.warning(f"Ignoring unreadable pipeline state {state_dir / STATE_FILE}: {e}")
+        return {}
+
+
+def _save_state(state_dir: Path, state: dict[str, Any]) -> None:
+    # Erst vollständig schreiben, dann atomar ersetzen: ein Absturz hinterlässt nie einen halben Checkpoint
+    tmp = state_dir / f"{STATE_FILE}.tmp"
+    tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, state_dir / STATE_FILE)
+
+
+def stage_key(stage: Stage, inputs: dict[str, str]) -> str:
+    """Schlüssel aus Stage-Konfiguration und den Digests ihrer Eingaben."""
+    basis = json.dumps({"stage": stage.name, "config": stage.config(), "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+
+def run_stages(stages: list[Stage], state_dir: Path, force: Iterable[str] = ()) -> list[StageResult]:
+    """
+    Führt die Stages in Reihenfolge aus (Abhängigkeiten müssen vorher stehen) und überspringt jede Stage, deren
+    Schlüssel (Konfiguration + Eingabe-Digests) unverändert ist und deren Artefakt noch intakt ist.
+    Nach jeder Stage wird der Checkpoint geschrieben; ein fehlgeschlagener Lauf setzt bei der ersten Stage fort,
+    die nicht fertig wurde. `force` erzwingt einzelne Stages ("all" = alle); liefert eine erzwungene Stage
+    dasselbe Artefakt wie zuvor, bleiben nachfolgende Stages trotzdem übersprungen.
+    """
+    state_dir.mkdir(parents=True, exist_ok=True)
+    forced = set(force)
+    state = read_state(state_dir)
+    artifacts: dict[str, dict[str, Any]] = {}
+    results: list[StageResult] = []
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in artifacts]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on {missing}, which must come earlier")
+        key = stage_key(stage, {dep: artifacts[dep]["digest"] for dep in stage.deps})
+        prev = state.get(stage.name)
+        fresh = prev is not None and (stage.max_age_s is None or time.time() - prev["finished_at"] < stage.max_age_s)
+        if (
+            stage.name not in forced and "all" not in forced
+            and fresh and prev["key"] == key and artifact_intact(prev["artifact"])
+        ):
+            logger.info(f"Stage {stage.name}: up to date ({prev['artifact']['digest'][:12]}), skipped")
+            artifacts[stage.name] = prev["artifact"]
+            results.append(StageResult(stage.name, prev["artifact"], skipped=True, seconds=0.0))
+            continue
+
+        raise_if_cancelled()
+        checkpoint = state_dir / f"{stage.name}_{key[:16]}.ckpt"
+        if checkpoint.exists():
+            logger.info(f"Stage {stage.name}: resuming from checkpoint {checkpoint.name}")
+        logger.info(f"Stage {stage.name}: running")
+        started = time.perf_counter()
+        path = stage.run({dep: Path(artifacts[dep]["path"]) for dep in stage.deps}, checkpoint)
+        artifact = describe_artifact(path)
+        seconds = time.perf_counter() - started
+        changed = prev is None or prev["artifact"]["digest"] != artifact["digest"]
+        state[stage.name] = {"key": key, "artifact": artifact, "finished_at": time.time(), "seconds": round(seconds, 3)}
+        _save_state(state_dir, state)
+        # Zwischenstände dieser Stage (auch zu älteren Eingaben) werden nicht mehr gebraucht
+        for stale in state_dir.glob(f"{stage.name}_*.ckpt"):
+            stale.unlink(missing_ok=True)
+        logger.info(
+            f"Stage {stage.name}: done in {seconds:.2f}s, artifact {artifact['digest'][:12]}"
+            f"{'' if changed else ' (unchanged)'}"
+        )
+        artifacts[stage.name] = artifact
+        results.append(StageResult(stage.name, artifact, skipped=False, seconds=seconds))
+    return results
@@ -1,29 +1,23 @@
+import argparse
 from loguru import logger
 from definitions.custom_enums import ExitCode
 from crawler.sitemap_crawler import DocsSpider
-from content_processor.chunker import build_chunks
-from vector_database.create_chromadb import ingest_chunks_to_chroma
+from pipeline.docs_pipeline import PIPELINE_STAGES, run_docs_pipeline
 
-def main() -> ExitCode:
+
+def crawl() -> None:
+    web_crawler = DocsSpider()
+    if web_crawler.crawl() == ExitCode.ERROR:
+        raise RuntimeError("Failed to crawl websites")
+
+
+def main(force: list[str]) -> ExitCode:
     logger.add("pipeline.log")
+    # Unveränderte Stages werden übersprungen, ein abgebrochener Ingest setzt beim nächsten Batch fort
     try:
-        web_crawler = DocsSpider()
-        web_crawler.crawl()
-    except Exception as e:
-        logger.error("Failed to crawl websites")
-        logger.exception(e)
-        return ExitCode.ERROR
-    logger.info("Starting to build chunks")
-    try:
-        build_chunks()
-    except Exception as e:
-        logger.error("Failed to build chunks")
-        logger.exception(e)
-        return ExitCode.ERROR
-    try:
-        ingest_chunks_to_chroma()
+        run_docs_pipeline(crawl, force=force)
     except Exception as e:
-        logger.error("Failed to create vector database")
+        logger.error("Pipeline stage failed, rerun to resume")
         logger.exception(e)
         return ExitCode.ERROR
     return ExitCode.SUCCESS
@@ -32,8 +26,13 @@ def main() -> ExitCode:
 
 
 if __name__ == "__main__":
-    result: ExitCode = main()
+    parser = argparse.ArgumentParser(description="Crawl, chunk and ingest with checkpoints")
+    parser.add_argument(
+        "--force", action="append", default=[], choices=[*PIPELINE_STAGES, "all"],
+        help="Stage trotz unveränderter Eingaben neu ausführen (mehrfach angebbar)",
+    )
+    result: ExitCode = main(parser.parse_args().force)
     if result == ExitCode.SUCCESS:
         logger.info("Successfully finished scraping, chunking, and creating vector database")
     elif result == ExitCode.ERROR:
-        logger.info("Pipeline failed")
\ No newline at end of file
+        logger.info("Pipeline failed")
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator
+from loguru import logger
+from definitions.errors import LLMBusyError
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+
+class _Waiter:
+    __slots__ = ("admitted", "event", "loop", "future")
+
+    def __init__(self) -> None:
+        self.admitted = False
+        self.event: threading.Event | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.future: asyncio.Future[None] | None = None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        elif self.loop is not None and self.future is not None:
+            fut = self.future
+            self.loop.call_soon_threadsafe(lambda: None if fut.done() else fut.set_result(None))
+
+
+class AdmissionController:
+    """
+    Zugangskontrolle vor dem LLM (prozessweit, für Threads und Event-Loops):
+      - höchstens `max_in_flight` Requests gleichzeitig bei Ollama,
+      - weitere warten in einer FIFO-Queue mit höchstens `max_queue` Plätzen,
+      - abgelehnt wird sofort (`LLMBusyError`), wenn die Queue voll ist oder die geschätzte Wartezeit
+        (Position × mittlere Bearbeitungszeit / max_in_flight) `max_wait_s` übersteigt,
+      - wer länger als `max_wait_s` wartet, wird ebenfalls abgelehnt.
+    So stauen sich Requests bei Lastspitzen nicht in Ollama, und angenommene Requests bleiben schnell.
+    `max_in_flight <= 0` schaltet die Begrenzung ab.
+    """
+
+    def __init__(self, *, max_in_flight: int, max_queue: int, max_wait_s: float) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max(0, max_queue)
+        self.max_wait_s = max_wait_s
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queue: deque[_Waiter] = deque()
+        self._service_ewma_s = 0.0
+        self._waits: deque[float] = deque(maxlen=500)
+        self._admitted = 0
+        self._rejected_full = 0
+        self._rejected_estimate = 0
+        self._rejected_timeout = 0
+
+    # ---------- intern ----------
+
+    def _enter(self, waiter: _Waiter) -> bool:
+        """True = sofort zugelassen, False = eingereiht; wirft `LLMBusyError` bei Ablehnung."""
+        with self._lock:
+            if self.max_in_flight <= 0 or (self._in_flight < self.max_in_flight and not self._queue):
+                self._in_flight += 1
+                self._admitted += 1
+                self._waits.append(0.0)
+                waiter.admitted = True
+                return True
+            if len(self._queue) >= self.max_queue:
+                self._rejected_full += 1
+                raise LLMBusyError(f"LLM busy: queue full ({len(self._queue)} waiting)")
+            estimate = (len(self._queue) + 1) * self._service_ewma_s / self.max_in_flight
+            if estimate > self.max_wait_s:
+                self._rejected_estimate += 1
+                raise LLMBusyError(f"LLM busy: estimated wait {estimate:.1f}s exceeds {self.max_wait_s:.1f}s")
+            self._queue.append(waiter)
+            return False
+
+    def _give_up(self, waiter: _Waiter, waited_s: float) -> bool:
+        """Nach Timeout/Abbruch: True, wenn der Waiter inzwischen doch zugelassen wurde."""
+        with self._lock:
+            if waiter.admitted:
+                return True
+            self._queue.remove(waiter)
+            self._rejected_timeout += 1
+        logger.warning(f"LLM request rejected after waiting {waited_s:.1f}s in admission queue")
+        return False
+
+    def _admitted_after(self, waited_s: float) -> None:
+        with self._lock:
+            self._waits.append(waited_s)
+
+    def release(self, held_s: float) -> None:
+        with self._lock:
+            if self.max_in_flight > 0:
+                self._service_ewma_s = held_s if not self._service_ewma_s else 0.8 * self._service_ewma_s + 0.2 * held_s
+            self._in_flight = max(0, self._in_flight - 1)
+            while self._queue and (self.max_in_flight <= 0 or self._in_flight < self.max_in_flight):
+                waiter = self._queue.popleft()
+                waiter.admitted = True
+                self._in_flight += 1
+                self._admitted += 1
+                waiter.wake()
+
+    # ---------- public API ----------
+
+    def acquire(self) -> None:
+        waiter = _Waiter()
+        waiter.event = threading.Event()
+        if self._enter(waiter):
+            return
+        started = time.monotonic()
+        if not waiter.event.wait(self.max_wait_s) and not self._give_up(waiter, time.monotonic() - started):
+            raise LLMBusyError(f"LLM busy: no slot within {self.max_wait_s:.1f}s")
+        self._admitted_after(time.monotonic() - started)
+
+    async def acquire_async(self) -> None:
+        waiter = _Waiter()
+        waiter.loop = asyncio.get_running_loop()
+        waiter.future = waiter.loop.create_future()
+        if self._enter(waiter):
+            return
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait_s)
+        except asyncio.TimeoutError:
+            if not self._give_up(waiter, time.monotonic() - started):
+                raise LLMBusyError(f"LLM busy: no slot within {self.max_wait_s:.1f}s") from None
+        except asyncio.CancelledError:
+            if self._give_up(waiter, time.monotonic() - started):
+                self.release(0.0)
+            raise
+        self._admitted_after(time.monotonic() - started)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        await self.acquire_async()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "rejected_queue_full": self._rejected_full,
+                "rejected_estimated_wait": self._rejected_estimate,
+                "rejected_timeout": self._rejected_timeout,
+                "wait_p50_s": round(waits[len(waits) // 2], 3) if waits else 0.0,
+                "wait_p95_s": round(waits[max(0, int(len(waits) * 0.95) - 1)], 3) if waits else 0.0,
+                "service_ewma_s": round(self._service_ewma_s, 3),
+            }
+
+
+# Singleton
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=custom_settings.OLLAMA_MAX_CONCURRENCY,
+        max_queue=custom_settings.OLLAMA_MAX_QUEUE,
+        max_wait_s=custom_settings.OLLAMA_MAX_QUEUE_WAIT_S,
+    )
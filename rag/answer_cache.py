@@ -0,0 +1,212 @@
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+import numpy as np
+from loguru import logger
+from definitions.custom_types import CtxItem
+from vector_database.index_version import current_index_version
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _unit(embedding: list[float]) -> np.ndarray:
+    """Embedding als normierter float32-Vektor (Kosinus-Ähnlichkeit = Skalarprodukt)."""
+    vec = np.asarray(embedding, dtype=np.float32)
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+
+def normalize_question(question: str) -> str:
+    """Kleinschreibung, Whitespace zusammenfassen, Satzzeichen am Ende entfernen."""
+    return _WS_RE.sub(" ", question.strip().lower()).rstrip("?!. ")
+
+
+@dataclass
+class CacheEntry:
+    answer: str
+    ctx_items: list[CtxItem]
+    slot: int            # Zeile in der Embedding-Matrix
+    section: str | None
+    created_at: float
+    llm_seconds: float
+
+
+class AnswerCache:
+    """
+    Antwort-Cache vor `answer_question`:
+      - exakter Treffer über die normalisierte Frage (+ Section),
+      - semantischer Treffer, wenn die Kosinus-Ähnlichkeit der Query-Embeddings >= `similarity` ist.
+    LRU-Verdrängung bei `max_entries`, Ablauf nach `ttl_s`; bei neuer Indexversion (nach Ingest) wird geleert.
+
+    Die (normierten) Embeddings liegen in einer vorab angelegten Matrix mit `max_entries` Zeilen; freie Zeilen
+    werden wiederverwendet. Ein Lookup ist so ein Matrix-Vektor-Produkt ohne Kopie, der Ablauf läuft über
+    eine Queue in Ablaufreihenfolge statt über alle Einträge.
+    """
+
+    def __init__(self, *, max_entries: int, ttl_s: float, similarity: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.similarity = similarity
+        self._entries: OrderedDict[tuple[str, str | None], CacheEntry] = OrderedDict()
+        # (Ablaufzeit, Schlüssel, Eintrag); überschriebene/verdrängte Einträge werden beim Abräumen übersprungen
+        self._deadlines: deque[tuple[float, tuple[str, str | None], CacheEntry]] = deque()
+        self._matrix: np.ndarray | None = None   # max_entries x dim, erst beim ersten Eintrag angelegt
+        self._slot_section = np.full(max_entries, -1, dtype=np.int32)  # Section-Code pro Zeile, -1 = frei
+        self._section_codes: dict[str | None, int] = {}
+        self._slot_keys: list[tuple[str, str | None] | None] = [None] * max_entries
+        self._free: list[int] = []
+        self._used = 0  # Zeilen 0.._used-1 wurden schon vergeben
+        self._lock = threading.Lock()
+        self._index_version: str | None = None
+        self._hits_exact = 0
+        self._hits_semantic = 0
+        self._misses = 0
+        self._saved_llm_s = 0.0
+
+    # ---------- intern ----------
+
+    def _check_index_version(self, version: str) -> None:
+        if version != self._index_version:
+            if self._entries:
+                logger.info(f"Index version changed ({self._index_version!r} -> {version!r}), clearing answer cache")
+            self._reset()
+            self._index_version = version
+
+    def _reset(self) -> None:
+        self._entries.clear()
+        self._deadlines.clear()
+        self._slot_section[:] = -1
+        self._slot_keys = [None] * self.max_entries
+        self._free.clear()
+        self._used = 0
+
+    def _remove(self, key: tuple[str, str | None]) -> None:
+        entry = self._entries.pop(key)
+        self._slot_section[entry.slot] = -1
+        self._slot_keys[entry.slot] = None
+        self._free.append(entry.slot)
+
+    def _expire(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] < now:
+            _, key, entry = self._deadlines.popleft()
+            if self._entries.get(key) is entry:
+                self._remove(key)
+
+    def _alloc_slot(self) -> int:
+        if self._free:
+            return self._free.pop()
+        slot = self._used
+        self._used += 1
+        return slot
+
+    def _hit(self, key: tuple[str, str | None], entry: CacheEntry) -> tuple[str, list[CtxItem]]:
+        self._entries.move_to_end(key)
+        self._saved_llm_s += entry.llm_seconds
+        return entry.answer, entry.ctx_items
+
+    # ---------- public API ----------
+
+    def lookup(self, question: str, embedding: list[float] | None, section: str | None = None) -> tuple[str, list[CtxItem]] | None:
+        key = (normalize_question(question), section)
+        version = current_index_version()
+        q = _unit(embedding) if embedding is not None else None
+        now = time.monotonic()
+        with self._lock:
+            self._check_index_version(version)
+            self._expire(now)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._hits_exact += 1
+                logger.info("Answer cache hit (exact)")
+                return self._hit(key, entry)
+
+            code = self._section_codes.get(section)
+            matrix = self._matrix
+            if q is not None and code is not None and self._used and matrix is not None and matrix.shape[1] == q.shape[0]:
+                sims = matrix[:self._used] @ q
+                sims[self._slot_section[:self._used] != code] = -np.inf
+                best = int(np.argmax(sims))
+                hit_key = self._slot_keys[best]
+                if hit_key is not None and sims[best] >= self.similarity:
+                    self._hits_semantic += 1
+                    logger.info(f"Answer cache hit (semantic, similarity={float(sims[best]):.3f})")
+                    return self._hit(hit_key, self._entries[hit_key])
+
+            self._misses += 1
+            return None
+
+    def store(
+        self,
+        question: str,
+        embedding: list[float],
+        answer: str,
+        ctx_items: list[CtxItem],
+        *,
+        section: str | None = None,
+        llm_seconds: float = 0.0,
+    ) -> None:
+        key = (normalize_question(question), section)
+        version = current_index_version()
+        vec = _unit(embedding)
+        with self._lock:
+            self._check_index_version(version)
+            if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+                # Erster Eintrag oder anderes Embedding-Modell: Matrix (neu) anlegen
+                self._reset()
+                self._matrix = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            slot = self._alloc_slot()
+            entry = CacheEntry(
+                answer=answer,
+                ctx_items=ctx_items,
+                slot=slot,
+                section=section,
+                created_at=time.monotonic(),
+                llm_seconds=llm_seconds,
+            )
+            self._matrix[slot] = vec
+            self._slot_section[slot] = self._section_codes.setdefault(section, len(self._section_codes))
+            self._slot_keys[slot] = key
+            self._entries[key] = entry
+            self._deadlines.append((entry.created_at + self.ttl_s, key, entry))
+            if len(self._deadlines) > 2 * self.max_entries:
+                # Viele überschriebene Einträge: Queue auf die lebenden Einträge verdichten (Reihenfolge bleibt)
+                self._deadlines = deque(d for d in self._deadlines if self._entries.get(d[1]) is d[2])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self._hits_exact + self._hits_semantic
+            total = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits_exact": self._hits_exact,
+                "hits_semantic": self._hits_semantic,
+                "misses": self._misses,
+                "hit_rate": (hits / total) if total else 0.0,
+                "saved_llm_s": round(self._saved_llm_s, 3),
+                "index_version": self._index_version,
+            }
+
+
+# Singleton
+@lru_cache
+def get_answer_cache() -> AnswerCache:
+    return AnswerCache(
+        max_entries=custom_settings.RAG_ANSWER_CACHE_SIZE,
+        ttl_s=custom_settings.RAG_ANSWER_CACHE_TTL_S,
+        similarity=custom_settings.RAG_ANSWER_CACHE_SIMILARITY,
+    )
@@ -0,0 +1,105 @@
+import re
+from math import ceil
+from typing import NamedTuple
+import numpy as np
+from definitions.custom_enums import CtxKeys
+from definitions.custom_types import CtxItem
+from vector_database.embedding import embed_texts
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+_FENCE_RE = re.compile(r"```.*?(?:```|\Z)", re.DOTALL)
+_SENTENCE_RE = re.compile(r"[^\n]+?(?:[.!?](?=\s)|$)|\n+", re.MULTILINE)
+_OMISSION = " […] "
+_OMISSION_BLOCK = "\n[…]\n"  # neben Code-Fences, damit ``` am Zeilenanfang bleibt
+
+
+class Unit(NamedTuple):
+    text: str
+    start: int
+    end: int
+    is_code: bool
+
+
+def split_units(text: str) -> list[Unit]:
+    """
+    Zerlegt einen Chunk in Einheiten: Sätze bzw. Zeilen für Fließtext,
+    Code-Fences bleiben als unteilbare Einheit erhalten. Start/Ende beziehen sich auf `text`.
+    """
+    units: list[Unit] = []
+    pos = 0
+    for m in _FENCE_RE.finditer(text):
+        units.extend(_split_prose(text, pos, m.start()))
+        units.append(Unit(m.group(0), m.start(), m.end(), True))
+        pos = m.end()
+    units.extend(_split_prose(text, pos, len(text)))
+    return units
+
+
+def _split_prose(text: str, start: int, end: int) -> list[Unit]:
+    units: list[Unit] = []
+    for m in _SENTENCE_RE.finditer(text, start, end):
+        raw = m.group(0)
+        if raw.strip():
+            lead = len(raw) - len(raw.lstrip())
+            units.append(Unit(raw.strip(), m.start() + lead, m.start() + lead + len(raw.strip()), False))
+    return units
+
+
+def _cosine(matrix: np.ndarray, q: np.ndarray) -> np.ndarray:
+    return matrix @ q / (np.linalg.norm(matrix, axis=1) * (np.linalg.norm(q) or 1.0) + 1e-12)
+
+
+def compress_context(
+    items: list[CtxItem],
+    query_embedding: list[float],
+    *,
+    keep_ratio: float = custom_settings.RAG_COMPRESS_KEEP_RATIO,
+    min_units: int = custom_settings.RAG_COMPRESS_MIN_UNITS,
+) -> list[CtxItem]:
+    """
+    Query-fokussierte, extraktive Kompression: bewertet alle Einheiten aller Chunks in einem
+    Embedding-Batch gegen die Query und behält pro Chunk die besten (Anteil `keep_ratio` der Zeichen,
+    mindestens `min_units`) in Originalreihenfolge. Code-Fences werden nie zerschnitten.
+    """
+    split = [split_units(x[CtxKeys.DOC.value]) for x in items]
+    todo = [i for i, units in enumerate(split) if len(units) > min_units]
+    if not todo:
+        return items
+
+    texts = [u.text for i in todo for u in split[i]]
+    scores = _cosine(np.asarray(embed_texts(texts), dtype=np.float32), np.asarray(query_embedding, dtype=np.float32))
+
+    out = list(items)
+    offset = 0
+    for i in todo:
+        units = split[i]
+        unit_scores = scores[offset:offset + len(units)]
+        offset += len(units)
+
+        budget = ceil(sum(len(u.text) for u in units) * keep_ratio)
+        keep: set[int] = set()
+        used = 0
+        for j in np.argsort(-unit_scores):
+            j = int(j)
+            if len(keep) >= min_units and used + len(units[j].text) > budget:
+                continue
+            keep.add(j)
+            used += len(units[j].text)
+
+        doc_text = items[i][CtxKeys.DOC.value]
+        parts: list[str] = []
+        prev = -1
+        for j in sorted(keep):
+            if parts:
+                # Direkte Nachbarn behalten ihren Originaltrenner, Auslassungen werden markiert
+                if j == prev + 1:
+                    parts.append(doc_text[units[prev].end:units[j].start])
+                else:
+                    parts.append(_OMISSION_BLOCK if units[j].is_code or units[prev].is_code else _OMISSION)
+            parts.append(units[j].text)
+            prev = j
+        doc = "".join(parts)
+        out[i] = {**items[i], CtxKeys.DOC.value: doc, CtxKeys.N_CHARS.value: len(doc)}
+    return out
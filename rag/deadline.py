@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+from definitions.custom_enums import CtxKeys
+from definitions.custom_types import CtxItem
+from helpers.utils import extract_terms
+from rag.compress import split_units
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+
+class Deadline:
+    """Absolute Frist für eine Frage; `seconds=None` oder <= 0 bedeutet keine Frist."""
+
+    def __init__(self, seconds: float | None) -> None:
+        self.seconds = seconds if seconds and seconds > 0 else None
+        self._end = time.monotonic() + self.seconds if self.seconds else math.inf
+
+    @property
+    def active(self) -> bool:
+        return self.seconds is not None
+
+    def remaining(self) -> float:
+        return max(0.0, self._end - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class SpeedEstimator:
+    """
+    Gleitende Schätzung der LLM-Geschwindigkeit aus Ollama's Timings der letzten Antworten:
+    Prefill (Prompt-Tokens/s), Decode (Antwort-Tokens/s), fester Overhead pro Request und typische Antwortlänge.
+    Startwerte sind konservativ für ein 7B-Modell auf CPU.
+    """
+
+    def __init__(
+        self,
+        prefill_tps: float = 100.0,
+        decode_tps: float = 10.0,
+        overhead_s: float = 0.3,
+        answer_tokens: float = 256.0,
+        alpha: float = 0.2,
+    ) -> None:
+        self.prefill_tps = prefill_tps
+        self.decode_tps = decode_tps
+        self.overhead_s = overhead_s
+        self.answer_tokens = answer_tokens
+        self.alpha = alpha
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def _ewma(self, old: float, new: float) -> float:
+        # Erster Messwert ersetzt den Startwert
+        return new if not self.samples else (1 - self.alpha) * old + self.alpha * new
+
+    def record(self, data: dict[str, Any]) -> None:
+        """`data` ist die letzte Ollama-Antwort (`done=True`); Dauern in Nanosekunden."""
+        prompt_n, prompt_ns = data.get("prompt_eval_count"), data.get("prompt_eval_duration")
+        eval_n, eval_ns = data.get("eval_count"), data.get("eval_duration")
+        total_ns = data.get("total_duration")
+        if not (eval_n and eval_ns):
+            return
+        with self._lock:
+            if prompt_n and prompt_ns:
+                self.prefill_tps = self._ewma(self.prefill_tps, prompt_n / (prompt_ns / 1e9))
+            if total_ns and prompt_ns is not None:
+                self.overhead_s = self._ewma(self.overhead_s, max(0.0, (total_ns - prompt_ns - eval_ns) / 1e9))
+            self.decode_tps = self._ewma(self.decode_tps, eval_n / (eval_ns / 1e9))
+            self.answer_tokens = self._ewma(self.answer_tokens, eval_n)
+            self.samples += 1
+
+    def estimate_s(self, prompt_tokens: int, answer_tokens: int) -> float:
+        with self._lock:
+            return self.overhead_s + prompt_tokens / self.prefill_tps + answer_tokens / self.decode_tps
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "prefill_tps": round(self.prefill_tps, 1),
+                "decode_tps": round(self.decode_tps, 1),
+                "overhead_s": round(self.overhead_s, 3),
+                "answer_tokens": round(self.answer_tokens),
+                "samples": self.samples,
+            }
+
+
+# Singleton
+@lru_cache
+def get_speed_estimator() -> SpeedEstimator:
+    return SpeedEstimator()
+
+
+@dataclass
+class GenerationPlan:
+    ctx_tokens: int                 # Token-Budget für Kontextblöcke
+    max_tokens: int                 # num_predict
+    skip_optional: bool = False     # Lücken-Nachladen und Kompression überspringen
+    extractive: bool = False        # LLM nicht aufrufen, Antwort aus den Treffern
+    steps: list[str] = field(default_factory=list)
+
+
+def plan_generation(
+    deadline: Deadline,
+    *,
+    ctx_tokens: int,
+    max_tokens: int = custom_settings.OLLAMA_MAX_TOKENS,
+    fixed_prompt_tokens: int = 0,
+    speed: SpeedEstimator | None = None,
+) -> GenerationPlan:
+    """
+    Passt Kontext und Antwortlänge an die Restzeit an (Reihenfolge der Stufen):
+      1. alles passt -> unverändert,
+      2. optionale Stufen überspringen und Kontext kürzen (bis RAG_DEADLINE_MIN_CTX_RATIO),
+      3. num_predict kürzen (bis RAG_DEADLINE_MIN_TOKENS),
+      4. reicht auch das nicht: extraktive Antwort ohne LLM.
+    Geplant wird mit der typischen Antwortlänge (nicht mit `max_tokens`); längere Antworten bricht
+    der Aufrufer bei Fristablauf ab. num_ctx bleibt unverändert (sonst lädt Ollama das Modell neu).
+    """
+    if not deadline.active:
+        return GenerationPlan(ctx_tokens, max_tokens)
+    speed = speed or get_speed_estimator()
+    available = deadline.remaining() * custom_settings.RAG_DEADLINE_SAFETY
+    expected_answer = min(max_tokens, int(speed.answer_tokens))
+    if speed.estimate_s(fixed_prompt_tokens + ctx_tokens, expected_answer) <= available:
+        return GenerationPlan(ctx_tokens, max_tokens)
+
+    plan = GenerationPlan(ctx_tokens, max_tokens, skip_optional=True, steps=["skip_optional"])
+    min_ctx = int(ctx_tokens * custom_settings.RAG_DEADLINE_MIN_CTX_RATIO)
+    answer_s = speed.estimate_s(fixed_prompt_tokens, expected_answer)
+    fitting_ctx = int((available - answer_s) * speed.prefill_tps)
+    if fitting_ctx >= min_ctx:
+        plan.ctx_tokens = min(ctx_tokens, fitting_ctx)
+        plan.steps.append(f"ctx_tokens={plan.ctx_tokens}")
+        return plan
+
+    plan.ctx_tokens = min_ctx
+    plan.steps.append(f"ctx_tokens={min_ctx}")
+    prompt_s = speed.estimate_s(fixed_prompt_tokens + min_ctx, 0)
+    fitting_answer = int((available - prompt_s) * speed.decode_tps)
+    if fitting_answer >= custom_settings.RAG_DEADLINE_MIN_TOKENS or not speed.samples:
+        # Ohne Messwerte (nur Startwerte) trotzdem versuchen, sonst lernt die Schätzung nie dazu
+        plan.max_tokens = min(max_tokens, max(fitting_answer, custom_settings.RAG_DEADLINE_MIN_TOKENS))
+        plan.steps.append(f"max_tokens={plan.max_tokens}")
+        return plan
+
+    plan.extractive = True
+    plan.steps.append("extractive")
+    return plan
+
+
+EXTRACTIVE_NOTE = "(Short answer quoted from the documentation; the language model could not answer in time.)"
+
+
+def extractive_answer(question: str, ctx_items: list[CtxItem], max_units: int = 4) -> str:
+    """
+    Antwort ohne LLM: die Sätze/Code-Blöcke der Treffer mit der größten Wortüberschneidung zur Frage,
+    in Dokumentreihenfolge (Quellen zeigt das System wie gewohnt separat an).
+    """
+    q_terms = extract_terms(question)
+    scored: list[tuple[int, int, int, str]] = []   # (-score, item, position, text)
+    for i, item in enumerate(ctx_items):
+        for unit in split_units(item[CtxKeys.DOC.value] or ""):
+            text = unit.text.strip()
+            if not text:
+                continue
+            score = len(q_terms & extract_terms(text))
+            if score:
+                scored.append((-score, i, unit.start, text))
+    if not scored:
+        if not ctx_items:
+            return "I cannot verify that."
+        first = split_units(ctx_items[0][CtxKeys.DOC.value] or "")
+        scored = [(0, 0, u.start, u.text.strip()) for u in first[:max_units] if u.text.strip()]
+    best = sorted(sorted(scored)[:max_units], key=lambda s: (s[1], s[2]))
+    return EXTRACTIVE_NOTE + "\n\n" + "\n\n".join(text for *_, text in best)
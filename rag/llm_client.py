@@ -0,0 +1,91 @@
+import asyncio
+import json
+import time
+import weakref
+from typing import Any, AsyncIterator
+import httpx
+from definitions.errors import LLMError
+from config.settings import AppSettings, get_settings
+from rag.llm_warmup import record_ollama_timings
+
+custom_settings: AppSettings = get_settings()
+
+
+class OllamaClient:
+    """
+    Asynchroner Client für Ollama's /api/chat:
+      - ein gemeinsamer httpx.AsyncClient mit Keep-Alive-Pool (keine neue TCP-Verbindung pro Frage),
+      - Warten auf die Generierung blockiert keinen Worker-Thread.
+    Die Anzahl gleichzeitiger Requests begrenzt die Zugangskontrolle (`rag.admission`).
+    Eine Instanz gehört zu genau einer Event-Loop (siehe `get_llm_client`).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = custom_settings.OLLAMA_MAX_CONNECTIONS,
+        max_keepalive: int = custom_settings.OLLAMA_MAX_KEEPALIVE,
+        connect_timeout_s: float = custom_settings.OLLAMA_CONNECT_TIMEOUT_S,
+        timeout_s: float = custom_settings.OLLAMA_TIMEOUT_S,
+    ) -> None:
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=httpx.Timeout(timeout_s, connect=connect_timeout_s),
+        )
+
+    async def chat(self, endpoint: str, payload: dict[str, Any], *, timeout_s: float | None = None) -> dict[str, Any]:
+        """Nicht-streamender Aufruf; gibt die JSON-Antwort von Ollama zurück."""
+        started = time.perf_counter()
+        try:
+            r = await self._http.post(endpoint, json={**payload, "stream": False}, timeout=timeout_s or httpx.USE_CLIENT_DEFAULT)
+            r.raise_for_status()
+            data = r.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise LLMError(f"Ollama request failed: {e!r}") from e
+        record_ollama_timings(data, time.perf_counter() - started)
+        return data
+
+    async def chat_stream(self, endpoint: str, payload: dict[str, Any], *, timeout_s: float | None = None) -> AsyncIterator[str]:
+        """Streamender Aufruf; liefert Text-Deltas (NDJSON, ein Objekt pro Zeile)."""
+        started = time.perf_counter()
+        first_token_s: float | None = None
+        try:
+            async with self._http.stream(
+                "POST", endpoint, json={**payload, "stream": True}, timeout=timeout_s or httpx.USE_CLIENT_DEFAULT
+            ) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError as e:
+                        raise LLMError(f"Ollama sent a malformed stream frame: {line[:200]!r}") from e
+                    if data.get("error"):
+                        raise LLMError(f"Ollama returned an error: {data['error']}")
+                    delta = data.get("message", {}).get("content", "")
+                    if delta:
+                        if first_token_s is None:
+                            first_token_s = time.perf_counter() - started
+                        yield delta
+                    if data.get("done"):
+                        record_ollama_timings(data, first_token_s or time.perf_counter() - started)
+                        break
+        except httpx.HTTPError as e:
+            raise LLMError(f"Ollama request failed: {e!r}") from e
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+# Ein Client pro Event-Loop (httpx-Verbindungen sind an die Loop gebunden)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OllamaClient]" = weakref.WeakKeyDictionary()
+
+
+def get_llm_client() -> OllamaClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = OllamaClient()
+        _clients[loop] = client
+    return client
@@ -1,44 +1,352 @@
-from definitions.errors import LLMError
+from definitions.errors import DeadlineExceededError, LLMError
 from config.settings import AppSettings, get_settings
+from rag.llm_client import get_llm_client
+from rag.llm_router import Endpoint, get_llm_router
+from rag.admission import get_admission_controller
+from rag.llm_warmup import record_ollama_timings
 from pydantic import HttpUrl
+from functools import lru_cache
+from loguru import logger
+import asyncio
+import json
+import time
 import requests
-from typing import Any
+from requests.adapters import HTTPAdapter
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, TypeVar
 
 custom_settings: AppSettings = get_settings()
 
-def call_llm_ollama(
+T = TypeVar("T")
+
+@lru_cache
+def _session() -> requests.Session:
+    """Gemeinsame Session mit Keep-Alive-Pool für den synchronen Pfad (CLI, Thread-Jobs)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=custom_settings.OLLAMA_MAX_CONNECTIONS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _timeout(timeout_s: float) -> tuple[float, float]:
+    return (custom_settings.OLLAMA_CONNECT_TIMEOUT_S, timeout_s)
+
+def _build_payload(
     user_prompt: str,
     *,
-    system_prompt: str = custom_settings.SYSTEM_PROMPT,
-    model: str = custom_settings.OLLAMA_MODEL,
-    temperature: float = custom_settings.OLLAMA_TEMPERATURE,
-    num_ctx: int = custom_settings.OLLAMA_CONTEXT_WINDOW_TOKENS,
-    max_tokens: int = custom_settings.OLLAMA_MAX_TOKENS,
-    endpoint: HttpUrl = custom_settings.OLLAMA_ENDPOINT,
-    timeout_s: int = custom_settings.OLLAMA_TIMEOUT_S,
-) -> str:
-    """Call Ollama's local /api/chat endpoint."""
-    payload: dict[str,Any]= {
+    system_prompt: str,
+    model: str,
+    temperature: float,
+    num_ctx: int,
+    max_tokens: int,
+    stream: bool,
+) -> dict[str, Any]:
+    # System-Prompt immer zuerst und unverändert, Optionen konstant (ein anderes num_ctx erzwingt bei Ollama
+    # ein Neuladen des Modells): so kann Ollama das Prompt-Präfix aus dem Cache wiederverwenden.
+    return {
         "model": model,
+        "keep_alive": custom_settings.OLLAMA_KEEP_ALIVE,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        "stream": False,
+        "stream": stream,
         "options": {
             "temperature": temperature,
             "num_ctx": num_ctx,
             "num_predict": max_tokens,
         },
     }
-    endpoint_str: str = str(endpoint)
+
+def _stream_chat(endpoint: str, payload: dict[str, Any], timeout_s: float) -> Iterator[str]:
+    started = time.perf_counter()
+    first_token_s: float | None = None
+    try:
+        with _session().post(endpoint, json=payload, timeout=_timeout(timeout_s), stream=True) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    raise LLMError(f"Ollama sent a malformed stream frame: {line[:200]!r}") from e
+                if data.get("error"):
+                    raise LLMError(f"Ollama returned an error: {data['error']}")
+                delta = data.get("message", {}).get("content", "")
+                if delta:
+                    if first_token_s is None:
+                        first_token_s = time.perf_counter() - started
+                    yield delta
+                if data.get("done"):
+                    record_ollama_timings(data, first_token_s or time.perf_counter() - started)
+                    break
+    except requests.RequestException as e:
+        raise LLMError(f"Ollama request failed: {e}") from e
+
+def _post_chat(endpoint: str, payload: dict[str, Any], timeout_s: float) -> str:
+    started = time.perf_counter()
     try:
-        r = requests.post(endpoint_str, json=payload, timeout=timeout_s)
+        r = _session().post(endpoint, json=payload, timeout=_timeout(timeout_s))
         r.raise_for_status()
         data = r.json()
-        msg = data.get("message", {}).get("content", "")
+    except (requests.RequestException, ValueError) as e:
+        raise LLMError(f"Ollama request failed: {e}") from e
+    record_ollama_timings(data, time.perf_counter() - started)
+    msg = data.get("message", {}).get("content", "")
+    if not msg:
+        raise LLMError(f"Ollama returned no content: {data}")
+    return msg.strip()
+
+def _routed_stream(payload: dict[str, Any], timeout_s: float) -> Iterator[str]:
+    """Streamt über die am wenigsten belastete Instanz; Failover nur, solange noch kein Token geliefert wurde."""
+    router = get_llm_router()
+    tried: list[str] = []
+    last_error: LLMError | None = None
+    while (ep := router.pick(exclude=tried)) is not None:
+        tried.append(ep.url)
+        started = time.perf_counter()
+        ok: bool | None = None
+        yielded = False
+        try:
+            for delta in _stream_chat(ep.url, payload, timeout_s):
+                yielded = True
+                yield delta
+            ok = True
+            return
+        except LLMError as e:
+            ok = False
+            if yielded:
+                raise
+            logger.warning(f"LLM endpoint {ep.url} failed, trying next: {e}")
+            last_error = e
+        finally:
+            router.release(ep, ok=ok, latency_s=time.perf_counter() - started)
+    raise LLMError(f"All LLM endpoints failed: {last_error}") from last_error
+
+def _routed_post(payload: dict[str, Any], timeout_s: float) -> str:
+    router = get_llm_router()
+    tried: list[str] = []
+    last_error: LLMError | None = None
+    while (ep := router.pick(exclude=tried)) is not None:
+        tried.append(ep.url)
+        started = time.perf_counter()
+        try:
+            msg = _post_chat(ep.url, payload, timeout_s)
+        except LLMError as e:
+            router.release(ep, ok=False)
+            logger.warning(f"LLM endpoint {ep.url} failed, trying next: {e}")
+            last_error = e
+            continue
+        router.release(ep, ok=True, latency_s=time.perf_counter() - started)
+        return msg
+    raise LLMError(f"All LLM endpoints failed: {last_error}") from last_error
+
+def stream_llm_ollama(
+    user_prompt: str,
+    *,
+    system_prompt: str = custom_settings.SYSTEM_PROMPT,
+    model: str = custom_settings.OLLAMA_MODEL,
+    temperature: float = custom_settings.OLLAMA_TEMPERATURE,
+    num_ctx: int = custom_settings.OLLAMA_CONTEXT_WINDOW_TOKENS,
+    max_tokens: int = custom_settings.OLLAMA_MAX_TOKENS,
+    endpoint: HttpUrl | None = None,
+    timeout_s: float = custom_settings.OLLAMA_TIMEOUT_S,
+) -> Iterator[str]:
+    """
+    Streamt die Antwort von Ollama's /api/chat als Text-Deltas (NDJSON, ein Objekt pro Zeile).
+    Ohne `endpoint` wird über den Endpoint-Router (OLLAMA_ENDPOINTS) verteilt.
+    """
+    payload = _build_payload(
+        user_prompt, system_prompt=system_prompt, model=model, temperature=temperature,
+        num_ctx=num_ctx, max_tokens=max_tokens, stream=True,
+    )
+    with get_admission_controller().slot():
+        if endpoint is not None:
+            yield from _stream_chat(str(endpoint), payload, timeout_s)
+        else:
+            yield from _routed_stream(payload, timeout_s)
+
+def call_llm_ollama(
+    user_prompt: str,
+    *,
+    system_prompt: str = custom_settings.SYSTEM_PROMPT,
+    model: str = custom_settings.OLLAMA_MODEL,
+    temperature: float = custom_settings.OLLAMA_TEMPERATURE,
+    num_ctx: int = custom_settings.OLLAMA_CONTEXT_WINDOW_TOKENS,
+    max_tokens: int = custom_settings.OLLAMA_MAX_TOKENS,
+    endpoint: HttpUrl | None = None,
+    timeout_s: float = custom_settings.OLLAMA_TIMEOUT_S,
+    on_token: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Call Ollama's local /api/chat endpoint.
+    Mit `on_token` wird gestreamt und jedes Text-Delta sofort weitergereicht; Rückgabe ist immer die ganze Antwort.
+    Ohne `endpoint` wird über den Endpoint-Router verteilt (mit Failover auf die nächste Instanz).
+    Jeder Aufruf läuft durch die Zugangskontrolle; bei Überlast `LLMBusyError`.
+    """
+    if on_token is not None:
+        parts: list[str] = []
+        for delta in stream_llm_ollama(
+            user_prompt, system_prompt=system_prompt, model=model, temperature=temperature,
+            num_ctx=num_ctx, max_tokens=max_tokens, endpoint=endpoint, timeout_s=timeout_s,
+        ):
+            parts.append(delta)
+            on_token(delta)
+        msg = "".join(parts)
         if not msg:
-            raise LLMError(f"Ollama returned no content: {data}")
+            raise LLMError("Ollama returned no content (stream)")
         return msg.strip()
-    except requests.RequestException as e:
-        raise LLMError(f"Ollama request failed: {e}") from e
\ No newline at end of file
+
+    payload = _build_payload(
+        user_prompt, system_prompt=system_prompt, model=model, temperature=temperature,
+        num_ctx=num_ctx, max_tokens=max_tokens, stream=False,
+    )
+    with get_admission_controller().slot():
+        if endpoint is not None:
+            return _post_chat(str(endpoint), payload, timeout_s)
+        return _routed_post(payload, timeout_s)
+
+async def _race(
+    attempt: Callable[[str], Awaitable[T]],
+    *,
+    hedge_after_s: float,
+    discard: Callable[[T], Awaitable[None]] | None = None,
+) -> tuple[Endpoint, T, float]:
+    """
+    Startet `attempt(url)` auf der am wenigsten belasteten Instanz. Fehlt nach `hedge_after_s` ein Ergebnis,
+    wird eine zweite Instanz parallel gefragt (Hedging); schlägt ein Versuch fehl, übernimmt die nächste (Failover).
+    Das erste erfolgreiche Ergebnis gewinnt, die übrigen Versuche werden abgebrochen.
+    Rückgabe: (Instanz, Ergebnis, Startzeit) – der Aufrufer gibt die Instanz per `release` frei.
+    """
+    router = get_llm_router()
+    tried: list[str] = []
+    pending: dict[asyncio.Task[T], tuple[Endpoint, float]] = {}
+    last_error: BaseException | None = None
+    hedged = hedge_after_s <= 0
+
+    def launch() -> bool:
+        ep = router.pick(exclude=tried)
+        if ep is None:
+            return False
+        tried.append(ep.url)
+        pending[asyncio.ensure_future(attempt(ep.url))] = (ep, time.perf_counter())
+        return True
+
+    launch()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, timeout=None if hedged else hedge_after_s, return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                hedged = True
+                if launch():
+                    logger.info(f"Hedging LLM request on {tried[-1]} after {hedge_after_s}s")
+                continue
+            winner: tuple[Endpoint, T, float] | None = None
+            for task in done:
+                ep, started = pending.pop(task)
+                if task.exception() is not None:
+                    router.release(ep, ok=False)
+                    last_error = task.exception()
+                    logger.warning(f"LLM endpoint {ep.url} failed: {last_error}")
+                elif winner is None:
+                    winner = (ep, task.result(), started)
+                else:
+                    router.release(ep, ok=None)
+                    if discard is not None:
+                        await discard(task.result())
+            if winner is not None:
+                return winner
+            if not pending:
+                launch()
+    finally:
+        for task, (ep, _started) in pending.items():
+            task.cancel()
+            router.release(ep, ok=None)
+            if discard is not None:
+                # Versuch kann zwischen `wait` und `cancel` fertig geworden sein: Ergebnis trotzdem schließen
+                task.add_done_callback(
+                    lambda t: None if t.cancelled() or t.exception() else asyncio.ensure_future(discard(t.result()))
+                )
+    raise LLMError(f"All LLM endpoints failed: {last_error}") from last_error
+
+async def acall_llm_ollama(
+    user_prompt: str,
+    *,
+    system_prompt: str = custom_settings.SYSTEM_PROMPT,
+    model: str = custom_settings.OLLAMA_MODEL,
+    temperature: float = custom_settings.OLLAMA_TEMPERATURE,
+    num_ctx: int = custom_settings.OLLAMA_CONTEXT_WINDOW_TOKENS,
+    max_tokens: int = custom_settings.OLLAMA_MAX_TOKENS,
+    endpoint: HttpUrl | None = None,
+    timeout_s: float = custom_settings.OLLAMA_TIMEOUT_S,
+    on_token: Callable[[str], None] | None = None,
+    hedge_after_s: float = custom_settings.OLLAMA_HEDGE_AFTER_S,
+) -> str:
+    """
+    Asynchrone Variante von `call_llm_ollama` über den gepoolten Client der laufenden Event-Loop.
+    Ohne `endpoint` wird über den Endpoint-Router verteilt, mit Failover und optionalem Hedging
+    (beim Streaming bis zum ersten Token). Wartet nicht-blockierend in der Zugangskontrolle.
+    """
+    payload = _build_payload(
+        user_prompt, system_prompt=system_prompt, model=model, temperature=temperature,
+        num_ctx=num_ctx, max_tokens=max_tokens, stream=on_token is not None,
+    )
+    async with get_admission_controller().aslot():
+        client = get_llm_client()
+        router = get_llm_router()
+
+        if on_token is not None:
+            async def first_token(url: str) -> tuple[str, AsyncIterator[str]]:
+                stream = client.chat_stream(url, payload, timeout_s=timeout_s)
+                try:
+                    return await anext(stream), stream
+                except StopAsyncIteration:
+                    raise LLMError("Ollama returned no content (stream)")
+                except BaseException:
+                    await stream.aclose()
+                    raise
+
+            async def close_stream(result: tuple[str, AsyncIterator[str]]) -> None:
+                await result[1].aclose()  # type: ignore[attr-defined]
+
+            if endpoint is not None:
+                first, stream = await first_token(str(endpoint))
+                ep, started = None, time.perf_counter()
+            else:
+                ep, (first, stream), started = await _race(first_token, hedge_after_s=hedge_after_s, discard=close_stream)
+            ok: bool | None = None   # Abbruch durch den Aufrufer (Frist, Cancel) zählt nicht als Fehler der Instanz
+            try:
+                parts: list[str] = [first]
+                on_token(first)
+                async for delta in stream:
+                    parts.append(delta)
+                    on_token(delta)
+                ok = True
+            except DeadlineExceededError:
+                raise
+            except LLMError:
+                ok = False
+                raise
+            finally:
+                try:
+                    # Stream schließen, sonst generiert Ollama nach Frist/Abbruch bis zur GC weiter und hält seinen Slot
+                    await stream.aclose()  # type: ignore[attr-defined]
+                finally:
+                    if ep is not None:
+                        router.release(ep, ok=ok, latency_s=time.perf_counter() - started)
+            return "".join(parts).strip()
+
+        async def post(url: str) -> str:
+            data = await client.chat(url, payload, timeout_s=timeout_s)
+            msg = data.get("message", {}).get("content", "")
+            if not msg:
+                raise LLMError(f"Ollama returned no content: {data}")
+            return msg.strip()
+
+        if endpoint is not None:
+            return await post(str(endpoint))
+        ep, msg, started = await _race(post, hedge_after_s=hedge_after_s)
+        router.release(ep, ok=True, latency_s=time.perf_counter() - started)
+        return msg
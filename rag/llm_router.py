@@ -0,0 +1,156 @@
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+import requests
+from loguru import logger
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+
+def health_url(endpoint: str) -> str:
+    """`http://host:port/api/chat` -> `http://host:port/api/tags` (leichtgewichtiger Ollama-Endpunkt)."""
+    parts = urlsplit(endpoint)
+    return f"{parts.scheme}://{parts.netloc}/api/tags"
+
+
+@dataclass
+class Endpoint:
+    url: str
+    outstanding: int = 0        # laufende Requests
+    failures: int = 0           # Fehler in Folge
+    open_until: float = 0.0     # Circuit Breaker offen bis (monotonic)
+    healthy: bool = True        # Ergebnis des letzten Health-Checks
+    requests: int = 0
+    errors: int = 0
+    latency_ewma_s: float = 0.0
+
+
+class EndpointRouter:
+    """
+    Verteilt LLM-Requests auf mehrere Ollama-Instanzen:
+      - Auswahl nach wenigsten offenen Requests (bei Gleichstand: geringere mittlere Latenz),
+      - periodischer Health-Check über `/api/tags` in einem Daemon-Thread,
+      - Circuit Breaker: nach `breaker_failures` Fehlern in Folge wird die Instanz `cooldown_s` übersprungen,
+        danach ist ein Probe-Request erlaubt (half-open).
+    Thread-sicher; wird aus Job-Threads und aus der Event-Loop der async-Jobs genutzt.
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[str],
+        *,
+        breaker_failures: int = custom_settings.OLLAMA_BREAKER_FAILURES,
+        cooldown_s: float = custom_settings.OLLAMA_BREAKER_COOLDOWN_S,
+        health_interval_s: float = custom_settings.OLLAMA_HEALTH_INTERVAL_S,
+    ) -> None:
+        self.endpoints: list[Endpoint] = [Endpoint(url=str(u)) for u in dict.fromkeys(str(u) for u in endpoints)]
+        if not self.endpoints:
+            raise ValueError("At least one Ollama endpoint is required")
+        self.breaker_failures = max(1, breaker_failures)
+        self.cooldown_s = cooldown_s
+        self.health_interval_s = health_interval_s
+        self._lock = threading.Lock()
+        self._health_thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # ---------- intern ----------
+
+    def _available(self, ep: Endpoint, now: float) -> bool:
+        return ep.healthy and ep.open_until <= now
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval_s):
+            self.check_health()
+
+    # ---------- public API ----------
+
+    def start_health_checks(self) -> None:
+        """Startet den Health-Check-Thread (nur bei mehr als einer Instanz und Intervall > 0)."""
+        if len(self.endpoints) < 2 or self.health_interval_s <= 0:
+            return
+        with self._lock:
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(target=self._health_loop, name="llm-health", daemon=True)
+                self._health_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def check_health(self, timeout_s: float = 2.0) -> None:
+        for ep in self.endpoints:
+            try:
+                ok = requests.get(health_url(ep.url), timeout=timeout_s).ok
+            except requests.RequestException:
+                ok = False
+            with self._lock:
+                if ok and not ep.healthy:
+                    logger.info(f"LLM endpoint {ep.url} is healthy again")
+                elif not ok and ep.healthy:
+                    logger.warning(f"LLM endpoint {ep.url} failed health check")
+                ep.healthy = ok
+
+    def pick(self, exclude: Iterable[str] = ()) -> Endpoint | None:
+        """
+        Reserviert die Instanz mit den wenigsten offenen Requests (`outstanding += 1`).
+        Sind alle gesperrt, wird trotzdem die am wenigsten belastete nicht ausgeschlossene gewählt –
+        lieber ein Versuch als sofortiger Fehler. `None`, wenn alle ausgeschlossen sind.
+        """
+        excluded = set(exclude)
+        now = time.monotonic()
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep.url not in excluded]
+            if not candidates:
+                return None
+            available = [ep for ep in candidates if self._available(ep, now)] or candidates
+            ep = min(available, key=lambda e: (e.outstanding, e.latency_ewma_s))
+            ep.outstanding += 1
+            ep.requests += 1
+            return ep
+
+    def release(self, ep: Endpoint, *, ok: bool | None, latency_s: float | None = None) -> None:
+        """Gibt die Reservierung frei. `ok=None`: abgebrochen (z. B. verlorener Hedge), zählt nicht als Fehler."""
+        with self._lock:
+            ep.outstanding = max(0, ep.outstanding - 1)
+            if ok is None:
+                return
+            if ok:
+                ep.failures = 0
+                ep.open_until = 0.0
+                if latency_s is not None:
+                    ep.latency_ewma_s = latency_s if not ep.latency_ewma_s else 0.8 * ep.latency_ewma_s + 0.2 * latency_s
+                return
+            ep.errors += 1
+            ep.failures += 1
+            if ep.failures >= self.breaker_failures:
+                ep.open_until = time.monotonic() + self.cooldown_s
+                logger.warning(f"Circuit open for LLM endpoint {ep.url} ({ep.failures} failures), cooldown {self.cooldown_s}s")
+
+    def stats(self) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": ep.url,
+                    "available": self._available(ep, now),
+                    "healthy": ep.healthy,
+                    "circuit_open": ep.open_until > now,
+                    "outstanding": ep.outstanding,
+                    "requests": ep.requests,
+                    "errors": ep.errors,
+                    "latency_ewma_s": round(ep.latency_ewma_s, 3),
+                }
+                for ep in self.endpoints
+            ]
+
+
+# Singleton
+@lru_cache
+def get_llm_router() -> EndpointRouter:
+    endpoints = [str(u) for u in custom_settings.OLLAMA_ENDPOINTS] or [str(custom_settings.OLLAMA_ENDPOINT)]
+    router = EndpointRouter(endpoints)
+    router.start_health_checks()
+    return router
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any
+import requests
+from loguru import logger
+from config.settings import AppSettings, get_settings
+from rag.llm_router import get_llm_router
+from rag.deadline import get_speed_estimator
+
+custom_settings: AppSettings = get_settings()
+
+# Ab dieser Ladezeit (Ollama `load_duration`) gilt eine Antwort als "kalt" (Modell musste geladen werden)
+COLD_LOAD_S = 0.5
+
+
+class WarmthStats:
+    """Kalte vs. warme Antworten: Latenz bis zum ersten Token (bzw. ganze Antwort ohne Streaming) und Ladezeiten."""
+
+    def __init__(self, window: int = 500) -> None:
+        self._lock = threading.Lock()
+        self._cold: deque[float] = deque(maxlen=window)
+        self._warm: deque[float] = deque(maxlen=window)
+        self._load_s: deque[float] = deque(maxlen=window)
+        self._preloads: dict[str, float] = {}
+        self._last_cold_at: float | None = None
+
+    def record(self, data: dict[str, Any], first_answer_s: float) -> None:
+        """`data` ist die letzte Ollama-Antwort (`done=True`) mit `load_duration` in Nanosekunden."""
+        load_ns = data.get("load_duration")
+        if load_ns is None:
+            return
+        load_s = load_ns / 1e9
+        with self._lock:
+            self._load_s.append(load_s)
+            if load_s >= COLD_LOAD_S:
+                self._cold.append(first_answer_s)
+                self._last_cold_at = time.time()
+            else:
+                self._warm.append(first_answer_s)
+        if load_s >= COLD_LOAD_S:
+            logger.info(f"Cold LLM answer: model load {load_s:.2f}s, first answer after {first_answer_s:.2f}s")
+
+    def record_preload(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._preloads[endpoint] = seconds
+
+    def stats(self) -> dict[str, Any]:
+        def p50(values: deque[float]) -> float:
+            return round(sorted(values)[len(values) // 2], 3) if values else 0.0
+
+        with self._lock:
+            return {
+                "cold": len(self._cold),
+                "warm": len(self._warm),
+                "cold_first_answer_p50_s": p50(self._cold),
+                "warm_first_answer_p50_s": p50(self._warm),
+                "load_p50_s": p50(self._load_s),
+                "last_cold_at": self._last_cold_at,
+                "preload_s": {url: round(s, 3) for url, s in self._preloads.items()},
+                "keep_alive": custom_settings.OLLAMA_KEEP_ALIVE,
+            }
+
+
+# Singleton
+@lru_cache
+def get_warmth_stats() -> WarmthStats:
+    return WarmthStats()
+
+
+def record_ollama_timings(data: dict[str, Any], first_answer_s: float) -> None:
+    """Timings der letzten Ollama-Antwort (`done=True`) an Kalt/Warm-Statistik und Geschwindigkeitsschätzung."""
+    get_warmth_stats().record(data, first_answer_s)
+    get_speed_estimator().record(data)
+
+
+def preload_model(endpoint: str, *, with_system_prompt: bool = True, timeout_s: float = custom_settings.OLLAMA_TIMEOUT_S) -> float:
+    """
+    Lädt `OLLAMA_MODEL` auf einer Instanz und setzt `keep_alive`.
+    Mit `with_system_prompt` wird zusätzlich der (immer gleiche) System-Prompt mit denselben Optionen wie
+    bei echten Fragen ausgewertet, damit Ollama den Prompt-Cache für dieses Präfix schon gefüllt hat.
+    Ohne (Warm-Ping) genügt eine leere Nachrichtenliste: Ollama lädt nur das Modell bzw. verlängert `keep_alive`.
+    Rückgabe: Dauer in Sekunden.
+    """
+    from rag.llm_ollama import _build_payload, _session, _timeout   # vermeidet Import-Zyklus
+
+    payload = _build_payload(
+        "", system_prompt=custom_settings.SYSTEM_PROMPT, model=custom_settings.OLLAMA_MODEL,
+        temperature=custom_settings.OLLAMA_TEMPERATURE, num_ctx=custom_settings.OLLAMA_CONTEXT_WINDOW_TOKENS,
+        max_tokens=1, stream=False,
+    )
+    payload["messages"] = payload["messages"][:1] if with_system_prompt else []
+    started = time.perf_counter()
+    r = _session().post(endpoint, json=payload, timeout=_timeout(timeout_s))
+    r.raise_for_status()
+    return time.perf_counter() - started
+
+
+def _warmup_loop(endpoints: list[str]) -> None:
+    stats = get_warmth_stats()
+    if custom_settings.OLLAMA_PRELOAD:
+        for endpoint in endpoints:
+            try:
+                seconds = preload_model(endpoint)
+                stats.record_preload(endpoint, seconds)
+                logger.info(f"Preloaded {custom_settings.OLLAMA_MODEL} on {endpoint} in {seconds:.2f}s")
+            except requests.RequestException as e:
+                logger.warning(f"Preloading {custom_settings.OLLAMA_MODEL} on {endpoint} failed: {e}")
+    interval = custom_settings.OLLAMA_WARM_PING_S
+    while interval > 0:
+        time.sleep(interval)
+        for endpoint in endpoints:
+            try:
+                preload_model(endpoint, with_system_prompt=False)
+            except requests.RequestException as e:
+                logger.warning(f"Warm ping to {endpoint} failed: {e}")
+
+
+_started = threading.Event()
+
+
+def start_llm_warmup() -> None:
+    """Beim Serverstart: Modell auf allen Instanzen vorladen und optional periodisch warm halten (Daemon-Thread)."""
+    if _started.is_set() or not (custom_settings.OLLAMA_PRELOAD or custom_settings.OLLAMA_WARM_PING_S > 0):
+        return
+    _started.set()
+    endpoints = [ep.url for ep in get_llm_router().endpoints]
+    threading.Thread(target=_warmup_loop, args=(endpoints,), name="llm-warmup", daemon=True).start()
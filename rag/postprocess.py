@@ -1,28 +1,162 @@
 import re
-from typing import Any, DefaultDict
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, DefaultDict
 from definitions.custom_enums import ChromaQueryKeys, ChunkKeys, CtxKeys
 from definitions.custom_types import CtxItem
 from config.settings import AppSettings, get_settings
+from loguru import logger
+from helpers.utils import extract_terms, hash_terms, parse_terms
+from rag.tokens import count_tokens
+from rag.compress import compress_context
 
 custom_settings: AppSettings = get_settings()
 
-def _keyword_overlap_score(query: str, doc: str) -> int:
-    q_terms = set(re.findall(r"\w+", query.lower()))
-    d_terms = set(re.findall(r"\w+", doc.lower()))
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?:])\s+|\n{2,}")
+
+# Chunk-ID -> (gespeicherter Term-String, geparste Hashes): jeder Chunk wird nur einmal pro Prozess geparst.
+# Der String dient als Prüfwert, da die Chunk-ID nach einem Re-Ingest auf neuen Text zeigen kann.
+_terms_cache: "OrderedDict[str, tuple[str, frozenset[int]]]" = OrderedDict()
+_terms_lock = threading.Lock()
+
+
+def _parse_doc_terms(meta: dict[str, Any], doc: str) -> tuple[str, Callable[[], frozenset[int]]]:
+    """Quelle der Terme eines Chunks und ihr Parser; ältere Indizes liefern Klartext-Terme oder gar keine."""
+    encoded = meta.get(ChunkKeys.TERM_HASHES)
+    if encoded:
+        return encoded, lambda: parse_terms(encoded)
+    stored = meta.get(ChunkKeys.TERMS)
+    if stored:
+        return stored, lambda: frozenset(hash_terms(stored.split()))
+    return doc, lambda: frozenset(hash_terms(extract_terms(doc)))
+
+
+def _doc_terms(chunk_id: str | None, meta: dict[str, Any], doc: str) -> frozenset[int]:
+    """Term-Hashes eines Chunks, pro Chunk-ID zwischengespeichert (LRU, `RAG_TERMS_CACHE_SIZE`)."""
+    source, parse = _parse_doc_terms(meta, doc)
+    if chunk_id is None:
+        return parse()
+    with _terms_lock:
+        cached = _terms_cache.get(chunk_id)
+        if cached is not None and cached[0] == source:
+            _terms_cache.move_to_end(chunk_id)
+            return cached[1]
+    terms = parse()
+    with _terms_lock:
+        _terms_cache[chunk_id] = (source, terms)
+        _terms_cache.move_to_end(chunk_id)
+        while len(_terms_cache) > custom_settings.RAG_TERMS_CACHE_SIZE:
+            _terms_cache.popitem(last=False)
+    return terms
+
+def _keyword_overlap_score(q_terms: set[int], d_terms: frozenset[int]) -> int:
     return len(q_terms & d_terms)
+
+
+# (url, fehlende chunk_index-Werte) -> {chunk_index: text}
+NeighbourFetcher = Callable[[str, list[int]], dict[int, str]]
+
+
+def _overlap_len(prev: str, nxt: str, max_overlap: int = custom_settings.CHUNK_OVERLAP) -> int:
+    """
+    Länge des Anfangs von `nxt`, der das Ende von `prev` wiederholt (Overlap aus dem Chunker).
+    Gesucht wird die längste Übereinstimmung bis `max_overlap` Zeichen; sehr kurze Treffer zählen nicht.
+    """
+    for k in range(min(len(prev), len(nxt), max_overlap), 15, -1):
+        if prev.endswith(nxt[:k]):
+            return k
+    return 0
+
+
+def _join_chunks(parts: list[str]) -> str:
+    """Fügt aufeinanderfolgende Chunks ohne den doppelten Overlap zu einer Passage zusammen."""
+    text = parts[0].strip()
+    for part in parts[1:]:
+        part = part.strip()
+        k = _overlap_len(text, part)
+        # Nach dem Overlap bleibt der ursprüngliche Trenner (Absatz oder mitten im Text) erhalten
+        text = text + part[k:] if k else f"{text}\n\n{part}"
+    return text
+
+
+def stitch_adjacent(items: list[CtxItem], fetch_neighbours: NeighbourFetcher | None = None) -> list[CtxItem]:
+    """
+    Fasst Treffer derselben URL mit aufeinanderfolgendem `chunk_index` zu einer Passage zusammen.
+    Mit `fetch_neighbours` werden Lücken von genau einem Chunk (i, i+2) durch Nachladen von i+1 geschlossen.
+    Die Passage übernimmt die beste Distanz und den höchsten Keyword-Score ihrer Teile.
+    """
+    out: list[CtxItem] = []
+    by_url: DefaultDict[str, list[CtxItem]] = defaultdict(list)
+    for x in items:
+        if x[CtxKeys.INDEX.value] is None:
+            out.append(x)
+        else:
+            by_url[x[CtxKeys.URL.value]].append(x)
+
+    for url, grp in by_url.items():
+        grp.sort(key=lambda x: x[CtxKeys.INDEX.value] or 0)
+        idxs = [x[CtxKeys.INDEX.value] or 0 for x in grp]
+
+        fetched: dict[int, str] = {}
+        gaps = [a + 1 for a, b in zip(idxs, idxs[1:]) if b - a == 2]
+        if fetch_neighbours is not None and gaps:
+            try:
+                fetched = fetch_neighbours(url, gaps)
+            except Exception as e:
+                logger.warning(f"Could not fetch neighbour chunks for {url}: {e}")
+
+        # Läufe aufeinanderfolgender Indizes: (index, text, Treffer oder None für nachgeladene Chunks)
+        runs: list[list[tuple[int, str, CtxItem | None]]] = []
+        for idx, x in zip(idxs, grp):
+            if runs:
+                last = runs[-1][-1][0]
+                if idx == last + 2 and (last + 1) in fetched:
+                    runs[-1].append((last + 1, fetched[last + 1], None))
+                    last += 1
+                if idx == last + 1:
+                    runs[-1].append((idx, x[CtxKeys.DOC.value], x))
+                    continue
+            runs.append([(idx, x[CtxKeys.DOC.value], x)])
+
+        for run in runs:
+            hits = [x for _, _, x in run if x is not None]
+            if len(run) == 1:
+                out.append(hits[0])
+                continue
+            doc = _join_chunks([text for _, text, _ in run])
+            out.append({
+                **hits[0],
+                CtxKeys.DOC.value: doc,
+                CtxKeys.DISTANCE.value: min(x[CtxKeys.DISTANCE.value] for x in hits),
+                CtxKeys.OVERLAP.value: max(x[CtxKeys.OVERLAP.value] for x in hits),
+                CtxKeys.N_CHARS.value: len(doc),
+            })
+    return out
+
+
 def postprocess_results(
         raw: dict[str, Any],
         query: str,
         max_per_url: int = custom_settings.RAG_MAX_CHUNKS_PER_URL,
-        max_ctx_chars: int = custom_settings.RAG_MAX_CONTEXT_CHARS
+        max_ctx_tokens: int | None = None,
+        fetch_neighbours: NeighbourFetcher | None = None,
+        compress_with: list[float] | None = None,
 ) -> list[CtxItem]:
+    """
+    Baut aus Chroma-Treffern die Kontext-Snippets: Scoring, max. `max_per_url` pro URL, Zusammenfügen
+    benachbarter Chunks, globales Ranking und Packen ganzer Snippets in `max_ctx_tokens` (None = kein Limit).
+    `fetch_neighbours` lädt optional fehlende Nachbar-Chunks, um Lücken (i, i+2) zu schließen.
+    Mit `compress_with` (Query-Embedding) werden die Snippets vor dem Packen extraktiv gekürzt.
+    """
     docs  = raw.get(ChromaQueryKeys.DOCS,  [[]])[0]
     metas = raw.get(ChromaQueryKeys.METAS, [[]])[0]
     dists = raw.get(ChromaQueryKeys.DISTS, [[]])[0]
+    ids   = raw.get(ChromaQueryKeys.IDS,   [[]])[0] or [None] * len(docs)
 
     items: list[CtxItem] = []
+    q_terms = hash_terms(extract_terms(query))  # einmal pro Anfrage
 
-    for doc, meta, dist in zip(docs, metas, dists):
+    for chunk_id, doc, meta, dist in zip(ids, docs, metas, dists):
         canon = (meta.get(ChunkKeys.CANONICAL_URL) or "").strip()
         url_  = (meta.get(ChunkKeys.URL) or "").strip()
         url   = canon or url_ or "unknown"
@@ -33,14 +167,14 @@ def postprocess_results(
             CtxKeys.SECTION.value: meta.get(ChunkKeys.SECTION) or "",
             CtxKeys.HEADING.value: meta.get(ChunkKeys.HEADING) or "",
             CtxKeys.HEADING_PATH.value: meta.get(ChunkKeys.HEADING_PATH) or "",
+            CtxKeys.ANCHOR.value: meta.get(ChunkKeys.ANCHOR) or "",
             CtxKeys.INDEX.value: meta.get(ChunkKeys.INDEX),
             CtxKeys.DISTANCE.value: float(dist),
-            CtxKeys.OVERLAP.value: _keyword_overlap_score(query, doc or ""),
+            CtxKeys.OVERLAP.value: _keyword_overlap_score(q_terms, _doc_terms(chunk_id, meta, doc or "")),
             CtxKeys.N_CHARS.value: meta.get(ChunkKeys.NCHARS) or len(doc or ""),
         })
 
     # --- ab hier NACH der Schleife ---
-    from collections import defaultdict
     groups: DefaultDict[str, list[CtxItem]] = defaultdict(list)
     for x in items:
         groups[x[CtxKeys.URL.value]].append(x)
@@ -55,24 +189,63 @@ def postprocess_results(
         ))
         selected.extend(grp[:max_per_url])
 
+    if custom_settings.RAG_STITCH_CHUNKS:
+        selected = stitch_adjacent(selected, fetch_neighbours)
+
+    if compress_with is not None:
+        selected = compress_context(selected, compress_with)
+
     # Globales Ranking
     selected.sort(key=lambda x: (x[CtxKeys.DISTANCE.value], -x[CtxKeys.OVERLAP.value]))
 
     # Kontext begrenzen
+    if max_ctx_tokens is None:
+        return [x for x in selected if (x[CtxKeys.DOC.value] or "").strip()]
+    return pack_context(selected, max_ctx_tokens)
+
+
+def format_context_block(i: int, item: CtxItem) -> str:
+    """Ein nummerierter Kontextblock, wie er im User-Prompt landet."""
+    header_parts = [item[CtxKeys.TITLE.value], item[CtxKeys.HEADING.value], item[CtxKeys.SECTION.value]]
+    header = " - ".join(p for p in header_parts if p) or "Source"
+    quote = item[CtxKeys.DOC.value].strip()
+    return f"[{i}] {header}\n{quote}\n(URL: {item[CtxKeys.URL.value]})"
+
+
+def _trim_to_tokens(text: str, budget: int) -> str:
+    """Kürzt auf ganze Sätze/Absätze, sodass der Text in `budget` Tokens passt."""
+    bounds = [m.start() for m in _SENTENCE_END_RE.finditer(text)]
+    best = ""
+    for end in bounds:
+        candidate = text[:end].strip()
+        if count_tokens(candidate) > budget:
+            break
+        best = candidate
+    return best
+
+
+def pack_context(ranked: list[CtxItem], max_ctx_tokens: int) -> list[CtxItem]:
+    """
+    Packt ganze Snippets (inkl. Blockkopf) in Rangfolge ins Token-Budget; passt ein Snippet nicht mehr,
+    wird mit kleineren weitergemacht. Nur wenn gar nichts passt, wird das beste Snippet satzweise gekürzt.
+    """
     ctx: list[CtxItem] = []
     acc = 0
-    for x in selected:
+    for x in ranked:
         snippet = (x[CtxKeys.DOC.value] or "").strip()
         if not snippet:
             continue
-        if acc + len(snippet) > max_ctx_chars:
-            remain = max_ctx_chars - acc
-            if remain <= 0:
-                break
-            snippet = snippet[:remain]
-        acc += len(snippet)
-        ctx.append({**x, CtxKeys.DOC.value: snippet})
-        if acc >= max_ctx_chars:
-            break
+        item: CtxItem = {**x, CtxKeys.DOC.value: snippet}
+        cost = count_tokens(format_context_block(len(ctx) + 1, item)) + 2  # + Trenner zwischen Blöcken
+        if acc + cost > max_ctx_tokens:
+            continue
+        acc += cost
+        ctx.append(item)
 
+    if not ctx and ranked:
+        best = ranked[0]
+        header_cost = count_tokens(format_context_block(1, {**best, CtxKeys.DOC.value: ""}))
+        trimmed = _trim_to_tokens((best[CtxKeys.DOC.value] or "").strip(), max_ctx_tokens - header_cost)
+        if trimmed:
+            ctx.append({**best, CtxKeys.DOC.value: trimmed, CtxKeys.N_CHARS.value: len(trimmed)})
     return ctx
@@ -1,9 +1,18 @@
-from typing import Sequence, Tuple
+import asyncio
+import time
+from typing import Any, Callable, NamedTuple, Sequence, Tuple
+from loguru import logger
 from definitions.custom_types import CtxItem
-from definitions.custom_enums import CtxKeys
-from vector_database.query_chroma import query_db
-from rag.postprocess import postprocess_results
-from rag.llm_ollama import call_llm_ollama
+from definitions.errors import DeadlineExceededError, LLMError
+from definitions.custom_enums import ChromaQueryKeys, CtxKeys
+from vector_database.query_chroma import fetch_chunks_by_index, merge_results, query_db
+from rag.postprocess import format_context_block, postprocess_results
+from rag.tokens import count_tokens
+from rag.llm_ollama import acall_llm_ollama, call_llm_ollama
+from rag.router import route_sections, section_filter, validate_section
+from rag.answer_cache import get_answer_cache
+from rag.deadline import Deadline, GenerationPlan, extractive_answer, plan_generation
+from vector_database.embedding import embed_query
 from config.settings import AppSettings, get_settings
 
 custom_settings: AppSettings = get_settings()
@@ -16,13 +25,7 @@ def build_user_prompt(question: str, ctx_items: Sequence[CtxItem]) -> str:
             f"{custom_settings.NO_CONTEXT_PROMPT}"
         )
 
-    blocks: list[str] = []
-    for i, item in enumerate(ctx_items, start=1):
-        header_parts = [item[CtxKeys.TITLE.value], item[CtxKeys.HEADING.value], item[CtxKeys.SECTION.value]]
-        header = " - ".join(p for p in header_parts if p) or "Source"
-
-        quote = item["doc"].strip()
-        blocks.append(f"[{i}] {header}\n{quote}\n(URL: {item['url']})")
+    blocks: list[str] = [format_context_block(i, item) for i, item in enumerate(ctx_items, start=1)]
 
     context = "\n\n".join(blocks)
     return (
@@ -32,17 +35,245 @@ def build_user_prompt(question: str, ctx_items: Sequence[CtxItem]) -> str:
     )
 
 
-def answer_question(question: str,) -> Tuple[str, list[CtxItem]]:
+def context_token_budget(
+    question: str,
+    *,
+    num_ctx: int = custom_settings.OLLAMA_CONTEXT_WINDOW_TOKENS,
+    max_tokens: int = custom_settings.OLLAMA_MAX_TOKENS,
+    system_prompt: str = custom_settings.SYSTEM_PROMPT,
+) -> int:
+    """Tokens, die für Kontextblöcke bleiben: Fenster minus Antwortlänge, System-Prompt und Prompt-Gerüst."""
+    scaffold = (
+        f"Question:\n{question}\n\n"
+        f"Context:\n\n\n"
+        f"{custom_settings.CONTEXT_PROMPT}"
+    )
+    overhead = count_tokens(system_prompt) + count_tokens(scaffold) + custom_settings.RAG_PROMPT_TOKEN_MARGIN
+    return max(0, num_ctx - max_tokens - overhead)
+
+
+def retrieve(question: str, section: str | None = None, query_embedding: list[float] | None = None) -> Any:
     """
-    Führt Retrieval -> Postprocessing -> LLM-Aufruf aus und gibt (Antwort, verwendete Kontexte) zurück.
+    Vektor-Suche mit Section-Filter.
+    - Explizite `section`: Suche strikt in dieser Section.
+    - Sonst: Router wählt Sections; liefert der gefilterte Lauf zu wenige Treffer, werden die fehlenden
+      aus den übrigen Sections ergänzt (die gefilterten Treffer bleiben, nichts wird doppelt gesucht).
+    """
+    if section:
+        return query_db(question, where=section_filter([validate_section(section)]), query_embedding=query_embedding)
+
+    sections = route_sections(question)
+    if not sections:
+        return query_db(question, query_embedding=query_embedding)
+    query_embedding = query_embedding or embed_query(question)  # für beide Läufe nur einmal einbetten
+    raw = query_db(question, where=section_filter(sections), query_embedding=query_embedding)
+    n_found = len(raw.get(ChromaQueryKeys.IDS, [[]])[0]) if raw else 0
+    missing = custom_settings.CHROMA_N_RESULTS - n_found
+    if missing > 0:
+        logger.info(f"Section filter returned {n_found} results, adding {missing} from the other sections")
+        rest = query_db(question, n_res=missing, where=section_filter(sections, exclude=True), query_embedding=query_embedding)
+        return merge_results([raw, rest], custom_settings.CHROMA_N_RESULTS)
+    return raw
+
+
+def retrieve_context(question: str, section: str | None = None, max_ctx_tokens: int | None = None) -> list[CtxItem]:
     """
-    raw = query_db(question)
-    ctx_items: list[CtxItem] = postprocess_results(raw, question)
+    Nur Retrieval + Postprocessing, ohne LLM: gerankte Snippets für Clients, die selbst antworten.
+    `max_ctx_tokens` begrenzt die Snippets (Default: dasselbe Budget wie für den LLM-Kontext).
+    """
+    query_embedding = embed_query(question)
+    raw = retrieve(question, section=section, query_embedding=query_embedding)
+    return postprocess_results(
+        raw,
+        question,
+        max_ctx_tokens=max_ctx_tokens or context_token_budget(question),
+        fetch_neighbours=fetch_chunks_by_index if custom_settings.RAG_FILL_CHUNK_GAPS else None,
+        compress_with=query_embedding if custom_settings.RAG_COMPRESS_CONTEXT else None,
+    )
+
+
+class PreparedQuestion(NamedTuple):
+    """Ergebnis von Embedding, Cache-Lookup und Retrieval – alles vor dem LLM-Aufruf."""
+    query_embedding: list[float]
+    cached: Tuple[str, list[CtxItem]] | None
+    ctx_items: list[CtxItem]
+    user_prompt: str
+    plan: GenerationPlan
+
+
+def prepare_question(
+    question: str,
+    section: str | None = None,
+    use_cache: bool = True,
+    deadline: Deadline | None = None,
+) -> PreparedQuestion:
+    """
+    Embedding -> Antwort-Cache -> Retrieval -> Postprocessing -> Prompt (ohne LLM).
+    Mit aktiver `deadline` werden Kontext, num_predict und optionale Stufen an die Restzeit angepasst.
+    """
+    deadline = deadline or Deadline(None)
+    query_embedding = embed_query(question)
+    budget = context_token_budget(question)
+    cache = get_answer_cache() if use_cache and custom_settings.RAG_ANSWER_CACHE_ENABLED else None
+    if cache is not None:
+        cached = cache.lookup(question, query_embedding, section=section)
+        if cached is not None:
+            return PreparedQuestion(query_embedding, cached, [], "", GenerationPlan(budget, custom_settings.OLLAMA_MAX_TOKENS))
+
+    raw = retrieve(question, section=section, query_embedding=query_embedding)
+    fixed_prompt_tokens = custom_settings.OLLAMA_CONTEXT_WINDOW_TOKENS - custom_settings.OLLAMA_MAX_TOKENS - budget
+    plan = plan_generation(deadline, ctx_tokens=budget, fixed_prompt_tokens=fixed_prompt_tokens)
+    if plan.steps:
+        logger.info(f"Deadline {deadline.seconds}s, {deadline.remaining():.2f}s left after retrieval: {', '.join(plan.steps)}")
+    optional = not plan.skip_optional
+    ctx_items: list[CtxItem] = postprocess_results(
+        raw,
+        question,
+        max_ctx_tokens=plan.ctx_tokens,
+        fetch_neighbours=fetch_chunks_by_index if custom_settings.RAG_FILL_CHUNK_GAPS and optional else None,
+        compress_with=query_embedding if custom_settings.RAG_COMPRESS_CONTEXT and optional else None,
+    )
     user_prompt = build_user_prompt(question, ctx_items)
-    answer: str = call_llm_ollama(user_prompt=user_prompt)
-    unique_ctx_items:list[CtxItem] = deduplicate_urls(ctx_items)
+    logger.info(f"Context: {len(ctx_items)} snippet(s), prompt ~{count_tokens(user_prompt)} tokens (context budget {plan.ctx_tokens})")
+    return PreparedQuestion(query_embedding, None, ctx_items, user_prompt, plan)
+
+
+def _finish_answer(
+    question: str,
+    prepared: PreparedQuestion,
+    answer: str,
+    *,
+    section: str | None,
+    use_cache: bool,
+    llm_seconds: float,
+) -> Tuple[str, list[CtxItem]]:
+    unique_ctx_items: list[CtxItem] = deduplicate_urls(prepared.ctx_items)
+    # Unter Zeitdruck gekürzte Antworten nicht cachen
+    if use_cache and custom_settings.RAG_ANSWER_CACHE_ENABLED and not prepared.plan.steps:
+        get_answer_cache().store(
+            question, prepared.query_embedding, answer, unique_ctx_items, section=section, llm_seconds=llm_seconds
+        )
     return answer, unique_ctx_items
 
+
+def _collecting(deadline: Deadline, streamed: list[str], on_token: Callable[[str], None] | None) -> Callable[[str], None]:
+    """Token-Callback, der die Teilantwort sammelt und bei abgelaufener Frist abbricht."""
+    def emit(delta: str) -> None:
+        streamed.append(delta)
+        if on_token is not None:
+            on_token(delta)
+        if deadline.expired():
+            raise DeadlineExceededError(f"deadline of {deadline.seconds}s reached during generation")
+    return emit
+
+
+def _degraded_answer(
+    question: str,
+    prepared: PreparedQuestion,
+    streamed: list[str],
+    on_token: Callable[[str], None] | None,
+) -> Tuple[str, list[CtxItem]]:
+    """Bereits gestreamte Teilantwort abschließen, sonst extraktive Antwort aus den Treffern."""
+    if streamed:
+        answer = "".join(streamed).strip() + " …"
+        if on_token is not None:
+            on_token(" …")
+    else:
+        answer = extractive_answer(question, prepared.ctx_items)
+        if on_token is not None:
+            on_token(answer)
+    return answer, deduplicate_urls(prepared.ctx_items)
+
+
+def answer_question(
+    question: str,
+    section: str | None = None,
+    use_cache: bool = True,
+    on_token: Callable[[str], None] | None = None,
+    deadline_s: float | None = None,
+) -> Tuple[str, list[CtxItem]]:
+    """
+    Führt Retrieval -> Postprocessing -> LLM-Aufruf aus und gibt (Antwort, verwendete Kontexte) zurück.
+    `section` beschränkt die Suche optional auf eine Section (sonst automatisches Routing).
+    Wiederholte oder sehr ähnliche Fragen werden aus dem Antwort-Cache beantwortet.
+    Mit `on_token` wird die Antwort gestreamt (bei Cache-Treffern in einem Stück).
+    `deadline_s` (Default RAG_DEADLINE_S, 0 = keine Frist) ist ein Latenzziel: bei knapper Zeit wird gekürzt,
+    eine nicht rechtzeitig fertige Generierung abgebrochen bzw. extraktiv aus den Treffern geantwortet.
+    """
+    deadline = Deadline(custom_settings.RAG_DEADLINE_S if deadline_s is None else deadline_s)
+    prepared = prepare_question(question, section=section, use_cache=use_cache, deadline=deadline)
+    if prepared.cached is not None:
+        if on_token is not None:
+            on_token(prepared.cached[0])
+        return prepared.cached
+
+    streamed: list[str] = []
+    if prepared.plan.extractive:
+        return _degraded_answer(question, prepared, streamed, on_token)
+
+    started = time.perf_counter()
+    if not deadline.active:
+        answer: str = call_llm_ollama(user_prompt=prepared.user_prompt, on_token=on_token)
+    else:
+        try:
+            answer = call_llm_ollama(
+                user_prompt=prepared.user_prompt,
+                max_tokens=prepared.plan.max_tokens,
+                timeout_s=max(0.1, deadline.remaining()),
+                on_token=_collecting(deadline, streamed, on_token),
+            )
+        except LLMError as e:
+            logger.warning(f"LLM did not answer within the deadline ({e!r}), degrading")
+            return _degraded_answer(question, prepared, streamed, on_token)
+    return _finish_answer(
+        question, prepared, answer,
+        section=section, use_cache=use_cache, llm_seconds=time.perf_counter() - started,
+    )
+
+
+async def answer_question_async(
+    question: str,
+    section: str | None = None,
+    use_cache: bool = True,
+    on_token: Callable[[str], None] | None = None,
+    deadline_s: float | None = None,
+) -> Tuple[str, list[CtxItem]]:
+    """
+    Wie `answer_question`, aber der LLM-Aufruf läuft über den asynchronen, gepoolten Client:
+    Retrieval (CPU/Chroma) in einem Thread, das Warten auf die Generierung belegt keinen Thread.
+    """
+    deadline = Deadline(custom_settings.RAG_DEADLINE_S if deadline_s is None else deadline_s)
+    prepared = await asyncio.to_thread(prepare_question, question, section, use_cache, deadline)
+    if prepared.cached is not None:
+        if on_token is not None:
+            on_token(prepared.cached[0])
+        return prepared.cached
+
+    streamed: list[str] = []
+    if prepared.plan.extractive:
+        return _degraded_answer(question, prepared, streamed, on_token)
+
+    started = time.perf_counter()
+    if not deadline.active:
+        answer: str = await acall_llm_ollama(user_prompt=prepared.user_prompt, on_token=on_token)
+    else:
+        try:
+            answer = await asyncio.wait_for(
+                acall_llm_ollama(
+                    user_prompt=prepared.user_prompt,
+                    max_tokens=prepared.plan.max_tokens,
+                    on_token=_collecting(deadline, streamed, on_token),
+                ),
+                timeout=deadline.remaining(),
+            )
+        except (LLMError, asyncio.TimeoutError) as e:
+            logger.warning(f"LLM did not answer within the deadline ({e!r}), degrading")
+            return _degraded_answer(question, prepared, streamed, on_token)
+    return _finish_answer(
+        question, prepared, answer,
+        section=section, use_cache=use_cache, llm_seconds=time.perf_counter() - started,
+    )
+
 def deduplicate_urls(ctx_items: list[CtxItem]) -> list[CtxItem]:
     seen_urls: set[str] = set()
     unique_ctx_items: list[CtxItem] = []
@@ -0,0 +1,74 @@
+import re
+from functools import lru_cache
+from typing import Any
+from loguru import logger
+from definitions.custom_enums import ChunkKeys
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+
+@lru_cache
+def _section_patterns() -> dict[str, re.Pattern[str]]:
+    """Kompiliert pro Section ein Regex aus den konfigurierten Keywords (Wortgrenzen)."""
+    patterns: dict[str, re.Pattern[str]] = {}
+    for section, keywords in custom_settings.RAG_SECTION_KEYWORDS.items():
+        words = [re.escape(k.lower()) for k in keywords if k.strip()]
+        if words:
+            patterns[section] = re.compile(r"\b(?:" + "|".join(words) + r")\b")
+    return patterns
+
+
+def score_sections(query: str) -> dict[str, int]:
+    """Anzahl Keyword-Treffer pro Section (nur Sections mit Treffern)."""
+    q = query.lower()
+    scores: dict[str, int] = {}
+    for section, pattern in _section_patterns().items():
+        hits = len(pattern.findall(q))
+        if hits:
+            scores[section] = hits
+    return scores
+
+
+def route_sections(query: str) -> list[str] | None:
+    """
+    Wählt wahrscheinliche Sections für eine Query.
+    Gibt None zurück, wenn das Routing deaktiviert ist oder die Zuordnung nicht eindeutig genug ist
+    (dann wird die gesamte Collection durchsucht).
+    """
+    if not custom_settings.RAG_SECTION_ROUTING:
+        return None
+    scores = score_sections(query)
+    if not scores:
+        return None
+    ranked = sorted(scores.values(), reverse=True)
+    top, runner_up = ranked[0], (ranked[1] if len(ranked) > 1 else 0)
+    confidence = top / sum(ranked)
+    if (
+        top < custom_settings.RAG_SECTION_MIN_SCORE
+        or top - runner_up < custom_settings.RAG_SECTION_MIN_MARGIN
+        or confidence < custom_settings.RAG_SECTION_MIN_CONFIDENCE
+    ):
+        logger.info(f"Section routing skipped (scores={scores}, confidence={confidence:.2f})")
+        return None
+    sections = sorted(s for s, v in scores.items() if v == top)
+    logger.info(f"Section routing: {sections} (scores={scores}, confidence={confidence:.2f})")
+    return sections
+
+
+def section_filter(sections: list[str] | None, *, exclude: bool = False) -> dict[str, Any] | None:
+    """Baut den Chroma-`where`-Filter für eine oder mehrere Sections (mit `exclude` für alle übrigen)."""
+    if not sections:
+        return None
+    if exclude:
+        return {ChunkKeys.SECTION.value: {"$nin": sections}}
+    if len(sections) == 1:
+        return {ChunkKeys.SECTION.value: sections[0]}
+    return {ChunkKeys.SECTION.value: {"$in": sections}}
+
+
+def validate_section(section: str) -> str:
+    allowed = [*custom_settings.SECTION_CATEGORIES, custom_settings.SECTION_UNKNOWN]
+    if section not in allowed:
+        raise ValueError(f"Unknown section {section!r}. Allowed: {allowed}")
+    return section
@@ -0,0 +1,37 @@
+from functools import lru_cache
+from math import ceil
+from pathlib import Path
+from typing import Any
+from loguru import logger
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+
+@lru_cache
+def _load_tokenizer() -> Any | None:
+    """
+    Lädt optional den Tokenizer des LLMs (`tokenizers`, wird mit chromadb installiert).
+    RAG_TOKENIZER: Pfad zu einer tokenizer.json oder Name eines Hugging-Face-Repos.
+    """
+    name = custom_settings.RAG_TOKENIZER
+    if not name:
+        return None
+    try:
+        from tokenizers import Tokenizer # type: ignore
+        if Path(name).is_file():
+            return Tokenizer.from_file(name)
+        return Tokenizer.from_pretrained(name)
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer {name!r}, falling back to estimate: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokenanzahl mit dem LLM-Tokenizer, sonst kalibrierte Schätzung über Zeichen pro Token."""
+    if not text:
+        return 0
+    tokenizer = _load_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    return ceil(len(text) / custom_settings.RAG_CHARS_PER_TOKEN)
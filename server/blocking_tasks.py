@@ -4,11 +4,17 @@ from crawler.sitemap_crawler import DocsSpider
 from loguru import logger
 from content_processor.chunker import build_chunks
 from vector_database.create_chromadb import ingest_chunks_to_chroma
+from pipeline.docs_pipeline import run_docs_pipeline
 from definitions.custom_enums import CtxKeys
-from rag.qa import answer_question
-from typing import Any
+from rag.qa import answer_question_async, retrieve_context
+from definitions.custom_types import CtxItem
+from typing import Any, Callable
+from config.settings import AppSettings, get_settings
+from helpers.utils import cancel_requested, raise_if_cancelled
 import sys, subprocess
 
+custom_settings: AppSettings = get_settings()
+
 # --- Blocking-Funktionen als Callables ---
 
 def crawl_blocking(*, log_path: Path) -> None:
@@ -36,26 +42,67 @@ def ingest_blocking(*, log_path: Path | None = None) -> None:
     ingest_chunks_to_chroma()
     logger.info("Ingest finished")
 
-def ask_blocking(*, question: str, log_path: Path | None = None) -> dict[str, Any]:
-    logger.info(f"ASK(job): {question!r}")
-    ans, used = answer_question(question=question)
+def _format_sources(used: list[CtxItem]) -> list[dict[str, Any]]:
     # kompaktes Quellenformat:
-    sources: list[dict[str,Any]] = [{
+    return [{
         "url": it.get(CtxKeys.URL.value, ""),
         "title": it.get(CtxKeys.TITLE.value, ""),
         "heading": it.get(CtxKeys.HEADING.value, ""),
         "distance": float(it.get(CtxKeys.DISTANCE.value, 0.0)),
         "overlap": int(it.get(CtxKeys.OVERLAP.value, 0)),
     } for it in used]
+
+def search_blocking(*, question: str, section: str | None = None, max_tokens: int | None = None) -> dict[str, Any]:
+    # Retrieval ohne LLM: Snippets mit Fundstelle (URL inkl. Anker) in Rangfolge
+    used = retrieve_context(question, section=section, max_ctx_tokens=max_tokens)
+    logger.info(f"SEARCH: {question!r} (section={section!r}) -> {len(used)} snippet(s)")
+    return {"snippets": [{
+        "rank": rank,
+        "url": it.get(CtxKeys.URL.value, ""),
+        "anchor": it.get(CtxKeys.ANCHOR.value, ""),
+        "link": f"{it.get(CtxKeys.URL.value, '')}#{it[CtxKeys.ANCHOR.value]}" if it.get(CtxKeys.ANCHOR.value) else it.get(CtxKeys.URL.value, ""),
+        "title": it.get(CtxKeys.TITLE.value, ""),
+        "heading_path": it.get(CtxKeys.HEADING_PATH.value, ""),
+        "section": it.get(CtxKeys.SECTION.value, ""),
+        "distance": float(it.get(CtxKeys.DISTANCE.value, 0.0)),
+        "overlap": int(it.get(CtxKeys.OVERLAP.value, 0)),
+        "text": it.get(CtxKeys.DOC.value, ""),
+    } for rank, it in enumerate(used, start=1)]}
+
+async def ask_async(
+    *,
+    question: str,
+    section: str | None = None,
+    deadline_s: float | None = None,
+    log_path: Path | None = None,
+    on_partial: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    # ask-Job auf der Event-Loop des JobManagers: LLM-Wartezeit belegt keinen Worker-Thread
+    logger.info(f"ASK(async job): {question!r} (section={section!r})")
+    ans, used = await answer_question_async(question=question, section=section, on_token=on_partial, deadline_s=deadline_s)
     logger.info("ANSWER ready")
-    return {"answer": ans, "sources": sources}
-
-def pipeline_blocking(*,log_path:Path) -> None:
-     # 1) Crawl als Subprozess – stdout/stderr in dasselbe Job-Log
-    with log_path.open("a", encoding="utf-8", errors="ignore") as lf:
-        rc = subprocess.call([sys.executable, "-u", "scraper_main.py"], stdout=lf, stderr=lf)
-    if rc != 0:
-        raise RuntimeError(f"crawl subprocess exit code {rc}")
-    # 2) Chunking & Ingest
-    chunk_blocking(log_path=log_path)
-    ingest_blocking(log_path=log_path)
\ No newline at end of file
+    return {"answer": ans, "sources": _format_sources(used)}
+
+def _wait_cancellable(proc: subprocess.Popen[bytes], poll_s: float = 0.5) -> int:
+    # Subprozess eines Thread-Jobs: bei Abbruch des Jobs beenden statt bis zum Ende zu warten
+    while True:
+        try:
+            return proc.wait(timeout=poll_s)
+        except subprocess.TimeoutExpired:
+            if cancel_requested():
+                proc.terminate()
+                try:
+                    proc.wait(timeout=custom_settings.JOBS_CANCEL_GRACE_S)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                raise_if_cancelled()
+
+def pipeline_blocking(*, log_path: Path, force: tuple[str, ...] = ()) -> None:
+    # Stages mit Checkpoints: unveränderte Stages werden übersprungen, abgebrochener Ingest setzt fort
+    def crawl() -> None:
+        # Crawl als Subprozess – stdout/stderr in dasselbe Job-Log
+        with log_path.open("a", encoding="utf-8", errors="ignore") as lf:
+            rc = _wait_cancellable(subprocess.Popen([sys.executable, "-u", "scraper_main.py"], stdout=lf, stderr=lf))
+        if rc != 0:
+            raise RuntimeError(f"crawl subprocess exit code {rc}")
+    run_docs_pipeline(crawl, force=force)
\ No newline at end of file
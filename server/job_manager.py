@@ -1,13 +1,98 @@
 # job_manager.py
 
+import asyncio
+import bisect
+import codecs
+import contextvars
+import inspect
+import os
+import time
 import uuid
 import threading
 import subprocess
-from concurrent.futures import ThreadPoolExecutor
+import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Callable, Optional, Dict
+from typing import Any, Callable, Hashable, Optional, Dict, TypeVar
 
 from loguru import logger
+from definitions.custom_enums import JobClass, JobLogMode
+from definitions.errors import JobCancelledError, JobTimeoutError
+from helpers.utils import cancel_event
+from server.job_store import FINISHED, JobStore, SQLiteJobStore
+
+
+TAIL_BLOCK_BYTES = 64 * 1024
+
+T = TypeVar("T")
+
+
+def tail_lines(path: Path, lines: int, block_size: int = TAIL_BLOCK_BYTES) -> str:
+    """Letzte `lines` Zeilen einer Datei: liest blockweise rückwärts ab Dateiende statt der ganzen Datei."""
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        blocks: list[bytes] = []
+        newlines = 0
+        # Eine Zeile mehr als verlangt suchen; eine abschließende Zeilenumbruch-Zeile zählt nicht
+        while pos > 0 and newlines <= lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+    data = b"".join(reversed(blocks))
+    text = data.decode("utf-8", errors="ignore")
+    return "".join(text.splitlines(True)[-max(1, lines):])
+
+
+def read_from(path: Path, offset: int, max_bytes: int) -> tuple[str, int, int]:
+    """
+    Neue Bytes ab `offset` (höchstens `max_bytes`): (Text, nächster Offset, Dateigröße).
+    Ein am Ende abgeschnittenes UTF-8-Zeichen wird erst beim nächsten Aufruf geliefert.
+    Ist die Datei kürzer als `offset` (neu angelegt/gekürzt), wird von vorn gelesen.
+    """
+    size = path.stat().st_size
+    if offset > size:
+        offset = 0
+    with path.open("rb") as f:
+        f.seek(offset)
+        data = f.read(max(0, max_bytes))
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    text = decoder.decode(data, final=False)
+    pending = len(decoder.getstate()[0])
+    return text, offset + len(data) - pending, size
+
+
+def _wake(fut: asyncio.Future[None]) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class _PartialBuffer:
+    """Teilausgabe als Liste von Stücken: Anhängen in O(1), Lesen ab Offset verbindet nur die neuen Stücke."""
+
+    __slots__ = ("chunks", "ends")
+
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+        self.ends: list[int] = []  # kumulierte Länge nach jedem Stück
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+    def append(self, text: str) -> None:
+        self.chunks.append(text)
+        self.ends.append(len(self) + len(text))
+
+    def since(self, offset: int) -> str:
+        i = bisect.bisect_right(self.ends, offset)
+        if i >= len(self.chunks):
+            return ""
+        start = self.ends[i] - len(self.chunks[i])
+        return "".join(self.chunks[i:])[max(0, offset - start):]
 
 
 class JobManager:
@@ -20,35 +105,351 @@ class JobManager:
     Die Worker-Funktion im Thread-Job sollte die Signatur `fn(*, log_path: Path) -> Any` unterstützen
     und darf ein Ergebnis zurückgeben, das unter jobs[jid]["result"] gespeichert wird.
 
+    Streaming-Jobs (`stream=True`) erhalten zusätzlich `on_partial(text)`; die bisher erzeugte Teilausgabe
+    ist über `partial(job_id, offset)` inkrementell abrufbar.
+
+    Ist `fn` eine Coroutine-Funktion (`async def`), läuft der Job auf einer gemeinsamen Event-Loop
+    in einem Hintergrund-Thread statt im ThreadPool – Warten auf I/O (z. B. LLM) belegt dann keinen Worker.
+
+    Job-Klassen (`job_class`): jede Klasse hat einen eigenen ThreadPool mit eigener Größe, damit kurze
+    interaktive Arbeit nicht hinter stundenlangen Batch-Jobs (crawl/chunk/ingest/pipeline) wartet. Wartende
+    Thread-/Subprozess-Jobs bekommen in `status()` ihre Position in der Warteschlange ihrer Klasse.
+    Async-Jobs (ask) belegen selbst keinen Worker; ihre blockierenden Schritte (`asyncio.to_thread`, z. B. das
+    Retrieval) laufen im interaktiven Pool, ebenso kurze Arbeit ohne Job über `run_blocking` (search_docs).
+
+    Logs: Jeder Job läuft in `logger.contextualize(job_id=...)`; sein Sink filtert auf diese job_id, so dass
+    parallele Jobs nur ihre eigenen Zeilen erhalten. `log_mode="file"` schreibt gepuffert (enqueue) in eine
+    eigene Datei, `log_mode="memory"` hält die letzten Zeilen in einem Ringpuffer (für kurze Jobs wie ask),
+    `log_mode="none"` legt gar keinen Sink an und hält nur bei Fehlern den Traceback fest.
+    `start_log_sweeper` löscht alte Job-Logdateien.
+
+    Die Job-Tabelle ist ein `JobStore`: abgeschlossene Jobs verfallen nach `ttl_s` und werden bei mehr als
+    `max_entries` Jobs bzw. `max_result_bytes` an Ergebnissen verdrängt (LRU), damit der Speicher nicht wächst.
+    Mit `store_path` liegt sie stattdessen in SQLite (`SQLiteJobStore`): mehrere Serverprozesse auf einem Host
+    sehen dann die Jobs der anderen (Status, Ergebnis, Logdatei, `wait` per Polling), und abgeschlossene Jobs
+    überstehen Neustarts. Teilausgaben, Speicher-Logs, Single-Flight und Abbruch bleiben pro Prozess.
+
+    Abbruch (`cancel`): wartende Jobs verlassen sofort die Warteschlange, async-Jobs werden per Task-Cancel
+    beendet (offene LLM-Requests werden geschlossen), Subprozesse erhalten SIGTERM und nach `cancel_grace_s`
+    SIGKILL. Thread-Jobs enden kooperativ beim nächsten `raise_if_cancelled()` (helpers.utils). Der Status ist
+    sofort `cancelled`; spätere Ergebnisse werden verworfen. `timeouts` (Sekunden pro Job-Name ab Start) brechen
+    Jobs mit Status `error` / `JobTimeoutError` ab. `abandon` bricht erst ab, wenn kein Wartender mehr übrig ist.
+    Threads, die ein Job selbst startet, müssen den Kontext mitnehmen (`contextvars.copy_context().run`).
+
     MCP-Hinweis:
       - Keine STDOUT-Ausgaben in Worker/Subprozessen – STDOUT ist für MCP reserviert.
-      - Der JobManager fügt pro Job einen Loguru-Sink auf die Job-Logdatei hinzu und entfernt ihn am Ende.
+      - Der JobManager fügt pro Job einen Loguru-Sink hinzu und entfernt ihn am Ende.
     """
 
-    def __init__(self, *, max_workers: int = 3, logs_dir: Path | None = None) -> None:
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.jobs: Dict[str, Dict[str, Any]] = {}
+    def __init__(
+        self,
+        *,
+        workers: Dict[str, int] | None = None,
+        logs_dir: Path | None = None,
+        ring_lines: int = 500,
+        ttl_s: float = 3600.0,
+        max_entries: int = 10_000,
+        max_result_bytes: int = 64 * 1024 * 1024,
+        store_path: Path | None = None,
+        remote_poll_s: float = 0.2,
+        timeouts: Dict[str, float] | None = None,
+        cancel_grace_s: float = 10.0,
+    ) -> None:
+        self.workers: Dict[str, int] = dict(workers or {JobClass.INTERACTIVE: 4, JobClass.BATCH: 2})
+        self.executors: Dict[str, ThreadPoolExecutor] = {
+            cls: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"jobs-{cls}") for cls, n in self.workers.items()
+        }
+        # Wartende Thread-/Subprozess-Jobs pro Klasse in Startreihenfolge (FIFO wie der ThreadPool)
+        self._queued: Dict[str, list[str]] = {cls: [] for cls in self.workers}
+        # Jobs anderer Prozesse (gemeinsamer SQLite-Store) haben hier keine Future: `wait` fragt in diesem Takt ab
+        self.remote_poll_s = remote_poll_s
         self._lock = threading.Lock()
+        # Benachrichtigt Wartende bei Status- und Teilausgabe-Änderungen
+        self._changed = threading.Condition(self._lock)
+        self._partials: Dict[str, _PartialBuffer] = {}
+        self._rings: Dict[str, deque[str]] = {}
+        # Erfüllt, sobald der Job endet; zugleich Kennzeichen für Jobs dieses Prozesses
+        self._done: Dict[str, Future[None]] = {}
+        # Laufende `wait`-Aufrufe: (Loop, Future) pro Job, bei Job-Ende geweckt, bei Timeout wieder entfernt.
+        # Eigener Lock, nie während Store-Zugriffen gehalten: `wait` blockiert die Event-Loop nicht auf SQLite
+        self._wakeups: Dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]]] = {}
+        self._wakeup_lock = threading.Lock()
+        # Single-Flight: dedupe_key -> laufender Job (und zurück), siehe `submit(dedupe_key=...)`
+        self._inflight: Dict[Hashable, str] = {}
+        self._inflight_keys: Dict[str, Hashable] = {}
+        # Abbruch: Pool-/Loop-Future, Subprozess, Abbruch-Signal und Laufzeit-Timer laufender Jobs
+        self._futures: Dict[str, Future[Any]] = {}
+        self._procs: Dict[str, subprocess.Popen[bytes]] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._timers: Dict[str, threading.Timer | asyncio.TimerHandle] = {}
+        self._sinks: Dict[str, int] = {}
+        self._cancelled: set[str] = set()
+        # Anzahl Wartender pro Job (1 + angehängte identische Anfragen), siehe `abandon`
+        self._waiters: Dict[str, int] = {}
+        # Beendete eigene Jobs -> Endzeitpunkt: ihre Daten in diesem Prozess werden nach `ttl_s` (eigene Uhr)
+        # freigegeben. Im SQLite-Store löscht evtl. ein anderer Prozess die Zeile, dann kommt hier kein on_evict an.
+        self._local_finished: OrderedDict[str, float] = OrderedDict()
+        self.ttl_s = ttl_s
+        self.timeouts: Dict[str, float] = dict(timeouts or {})
+        self.cancel_grace_s = cancel_grace_s
+        self.ring_lines = ring_lines
         self.logs_dir = (logs_dir or Path("./job_logs")).resolve()
         self.logs_dir.mkdir(parents=True, exist_ok=True)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._sweeper_started = False
+        # Zuletzt: der SQLite-Store räumt schon beim Öffnen abgelaufene Jobs per `_forget` ab
+        limits: Dict[str, Any] = {"ttl_s": ttl_s, "max_entries": max_entries, "max_result_bytes": max_result_bytes}
+        self.jobs: JobStore | SQLiteJobStore = (
+            SQLiteJobStore(store_path, on_evict=self._forget, **limits)
+            if store_path is not None
+            else JobStore(on_evict=self._forget, **limits)
+        )
 
     # ---------- intern ----------
 
-    def _new_job(self, name: str, log_path: Path) -> str:
-        jid = str(uuid.uuid4())
+    def _new_job(
+        self, jid: str, name: str, log_mode: str, job_class: str, queued: bool, dedupe_key: Hashable | None,
+    ) -> str:
+        """Legt den Job an; läuft schon ein Job mit demselben `dedupe_key`, wird stattdessen dessen ID geliefert."""
         with self._lock:
-            self.jobs[jid] = {
+            self._expire_local()
+            if dedupe_key is not None:
+                leader = self._inflight.get(dedupe_key)
+                if leader is not None:
+                    self.jobs.update(leader, coalesced=self.jobs.get(leader)["coalesced"] + 1)
+                    self._waiters[leader] = self._waiters.get(leader, 0) + 1
+                    return leader
+                self._inflight[dedupe_key] = jid
+                self._inflight_keys[jid] = dedupe_key
+            if queued:
+                self._queued[job_class].append(jid)
+            self._done[jid] = Future()
+            self._waiters[jid] = 1
+            self.jobs.add(jid, {
                 "id": jid,
                 "name": name,
+                "job_class": job_class,
                 "status": "queued",     # queued | running | success | error
-                "log": str(log_path),
+                "log": None,
+                "log_mode": log_mode,
                 "error": None,
+                "error_type": None,     # Klassenname der Exception, z. B. "LLMBusyError"
                 "pid": None,
                 "cwd": str(Path.cwd()),
                 "result": None,         # optionales Rückgabeobjekt der Thread-Worker-Funktion
-            }
+                "coalesced": 0,         # weitere identische Anfragen, die an diesen Job angehängt wurden
+            })
         return jid
 
+    def _forget(self, jid: str) -> None:
+        """Vom JobStore verdrängter Job: zugehörige Teilausgabe und Speicher-Log freigeben (Lock gehalten)."""
+        self._local_finished.pop(jid, None)
+        self._partials.pop(jid, None)
+        self._rings.pop(jid, None)
+        self._done.pop(jid, None)
+        with self._wakeup_lock:
+            self._wakeups.pop(jid, None)
+        self._waiters.pop(jid, None)
+        self._cancelled.discard(jid)
+        self._release_key(jid)
+        self._release_handles(jid)
+
+    def _expire_local(self, now: float | None = None) -> None:
+        """Daten eigener Jobs freigeben, die seit `ttl_s` beendet sind (Lock gehalten)."""
+        now = now if now is not None else time.monotonic()
+        while self._local_finished:
+            jid, finished_at = next(iter(self._local_finished.items()))
+            if now - finished_at < self.ttl_s:
+                break
+            self._forget(jid)
+
+    def _release_handles(self, jid: str) -> None:
+        """Abbruch-Handles eines beendeten Jobs freigeben und seinen Laufzeit-Timer stoppen (Lock gehalten)."""
+        self._futures.pop(jid, None)
+        self._procs.pop(jid, None)
+        self._cancel_events.pop(jid, None)
+        timer = self._timers.pop(jid, None)
+        if isinstance(timer, asyncio.TimerHandle) and self._loop is not None:
+            # Loop-Timer sind nicht thread-sicher: Abbruch auf der Job-Loop ausführen
+            try:
+                self._loop.call_soon_threadsafe(timer.cancel)
+            except RuntimeError:
+                pass  # Job-Loop ist schon geschlossen
+        elif timer is not None:
+            timer.cancel()
+
+    def _get_meta(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Store-Lookup; der SQLite-Store (eine Verbindung pro Thread) wird ohne `_lock` gelesen, keine Platten-I/O darunter."""
+        if isinstance(self.jobs, SQLiteJobStore):
+            return self.jobs.get(job_id)
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _release_key(self, jid: str) -> None:
+        key = self._inflight_keys.pop(jid, None)
+        if key is not None and self._inflight.get(key) == jid:
+            del self._inflight[key]
+
+    def _add_sink(self, jid: str, name: str, log_mode: str) -> tuple[int | None, Path | None]:
+        """Loguru-Sink nur für Zeilen dieses Jobs (job_id aus `logger.contextualize`)."""
+        def only_this_job(record: Any) -> bool:
+            return record["extra"].get("job_id") == jid
+
+        if log_mode == JobLogMode.NONE:
+            return None, None
+        if log_mode == JobLogMode.MEMORY:
+            ring: deque[str] = deque(maxlen=self.ring_lines)
+            with self._lock:
+                self._rings[jid] = ring
+            return logger.add(ring.append, level="INFO", filter=only_this_job), None
+        log_path = (self.logs_dir / f"job_{name}_{uuid.uuid4().hex[:8]}.log").resolve()
+        # enqueue: Schreiben in einem Hintergrund-Thread, der Job wartet nicht auf die Platte
+        return logger.add(str(log_path), level="INFO", filter=only_this_job, enqueue=True), log_path
+
+    def _apply(self, jid: str, fields: Dict[str, Any]) -> None:
+        self.jobs.update(jid, **fields)
+        if fields.get("status") in FINISHED:
+            done = self._done.get(jid)
+            if done is not None and not done.done():
+                done.set_result(None)
+            with self._wakeup_lock:
+                wakeups = self._wakeups.pop(jid, ())
+            for loop, wakeup in wakeups:
+                try:
+                    loop.call_soon_threadsafe(_wake, wakeup)
+                except RuntimeError:
+                    pass  # Loop des Wartenden ist schon geschlossen
+            self._release_key(jid)
+            if jid in self._done:
+                self._local_finished[jid] = time.monotonic()
+            self.jobs.finish(jid)
+            self._expire_local()
+        self._changed.notify_all()
+
+    def _update(self, jid: str, **fields: Any) -> None:
+        with self._changed:
+            if jid in self._cancelled:
+                return  # abgebrochen: späte Ergebnisse/Fehler verwerfen
+            self._apply(jid, fields)
+
+    def _fail(self, jid: str, name: str, e: Exception, sink_id: int | None) -> None:
+        if jid in self._cancelled:
+            logger.info(f"[{jid}] STOPPED {name} after cancel ({type(e).__name__})")
+            return
+        if sink_id is None:
+            # Job ohne Sink: wenigstens den Traceback für job_log_tail festhalten (vor dem Ende, s. `_expire_local`)
+            with self._lock:
+                self._rings[jid] = deque(traceback.format_exc().splitlines(True), maxlen=self.ring_lines)
+        self._update(jid, status="error", error=repr(e), error_type=type(e).__name__)
+        logger.exception(f"[{jid}] FAILED {name}: {e}")
+
+    def _start(self, jid: str, timeout_s: float) -> bool:
+        """
+        Worker hat den Job übernommen: aus der Warteschlange nehmen, auf `running` setzen und ggf. den
+        Laufzeit-Timer starten. False, wenn der Job schon abgebrochen wurde.
+        """
+        with self._changed:
+            for queue in self._queued.values():
+                if jid in queue:
+                    queue.remove(jid)
+            if jid in self._cancelled:
+                return False
+            self.jobs.update(jid, status="running")
+            if timeout_s > 0:
+                try:
+                    # async-Job: Timer auf der Job-Loop statt eines Threads pro Frage
+                    self._timers[jid] = asyncio.get_running_loop().call_later(timeout_s, self._expire, jid, timeout_s)
+                except RuntimeError:
+                    timer = threading.Timer(timeout_s, self._expire, (jid, timeout_s))
+                    timer.daemon = True
+                    timer.start()
+                    self._timers[jid] = timer
+            self._changed.notify_all()
+        return True
+
+    def _finished(self, jid: str) -> None:
+        with self._lock:
+            self._release_handles(jid)
+        self._drop_sink(jid)
+
+    def _drop_sink(self, jid: str) -> None:
+        """Log-Sink des Jobs entfernen (genau einmal: Runner-Ende oder Abbruch vor dem Start)."""
+        with self._lock:
+            sink_id = self._sinks.pop(jid, None)
+        if sink_id is not None:
+            logger.remove(sink_id)
+
+    def _expire(self, jid: str, timeout_s: float) -> None:
+        self._abort(jid, "error", f"timed out after {timeout_s:g}s", JobTimeoutError.__name__)
+
+    def _abort(self, jid: str, status: str, error: str, error_type: str) -> Dict[str, Any]:
+        """Job beenden (Status sofort setzen) und seine Arbeit stoppen; siehe Klassendoku."""
+        with self._changed:
+            meta = self.jobs.get(jid)
+            if not meta:
+                return {"status": "unknown", "error": "job not found"}
+            if meta["status"] in FINISHED:
+                return {"status": meta["status"], "cancelled": False}
+            if jid not in self._done:
+                return {"status": meta["status"], "cancelled": False, "error": "job runs in another server process"}
+            was_queued = meta["status"] == "queued"
+            for queue in self._queued.values():
+                if jid in queue:
+                    queue.remove(jid)
+            self._apply(jid, {"status": status, "error": error, "error_type": error_type})
+            self._cancelled.add(jid)
+            name = meta["name"]
+            fut, proc, event = self._futures.get(jid), self._procs.get(jid), self._cancel_events.get(jid)
+            self._release_handles(jid)
+        if was_queued:
+            # Runner startet evtl. nie (Future abgebrochen) und räumt dann auch seinen Sink nicht ab
+            self._drop_sink(jid)
+        logger.info(f"[{jid}] CANCELLED {name}: {error}")
+        if fut is not None:
+            fut.cancel()    # wartend: läuft nie an; async: CancelledError im Task; laufender Thread: keine Wirkung
+        if event is not None:
+            event.set()
+        if proc is not None:
+            self._terminate(proc)
+        return {"status": status, "cancelled": True}
+
+    def _terminate(self, proc: subprocess.Popen[bytes]) -> None:
+        """SIGTERM, nach `cancel_grace_s` SIGKILL, falls der Prozess dann noch läuft."""
+        if proc.poll() is not None:
+            return
+        proc.terminate()
+
+        def kill() -> None:
+            if proc.poll() is None:
+                proc.kill()
+
+        timer = threading.Timer(self.cancel_grace_s, kill)
+        timer.daemon = True
+        timer.start()
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Startet bei Bedarf die Event-Loop für async-Jobs (ein Daemon-Thread pro JobManager)."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                # asyncio.to_thread in async-Jobs (Retrieval von ask) nutzt den interaktiven Pool
+                if JobClass.INTERACTIVE in self.executors:
+                    loop.set_default_executor(self.executors[JobClass.INTERACTIVE])
+                threading.Thread(target=loop.run_forever, name="jobs-async", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def append_partial(self, jid: str, text: str) -> None:
+        """Hängt Teilausgabe (z. B. LLM-Token) an den Puffer eines Streaming-Jobs an."""
+        with self._changed:
+            if jid not in self._done or jid in self._local_finished:
+                return  # Job schon beendet/freigegeben: späte Tokens nicht mehr puffern
+            buf = self._partials.get(jid)
+            if buf is None:
+                buf = self._partials[jid] = _PartialBuffer()
+            buf.append(text)
+            self._changed.notify_all()
+
     # ---------- public API ----------
 
     def submit(
@@ -60,6 +461,11 @@ class JobManager:
         args: Optional[list[str]] = None,
         cwd: Optional[Path] = None,
         env: Optional[dict[str, str]] = None,
+        stream: bool = False,
+        job_class: str = JobClass.BATCH,
+        log_mode: str = JobLogMode.FILE,
+        dedupe_key: Hashable | None = None,
+        timeout_s: float | None = None,
     ) -> str:
         """
         Entweder `fn` im Thread ausführen ODER Subprozess mit `args` starten.
@@ -71,91 +477,233 @@ class JobManager:
         - Subprozess-Job:
             submit("crawl", use_subprocess=True, args=[sys.executable, "-u", "scraper_main.py"])
 
+        - Streaming-Job (`stream=True`): Worker erhält zusätzlich `on_partial: Callable[[str], None]`.
+
+        - Async-Job: `fn` ist `async def` mit derselben Signatur; läuft auf der Job-Event-Loop
+          (belegt keinen Worker, wartet also nicht in der Klassen-Warteschlange).
+
+        - `job_class` wählt den Worker-Pool (Default: Batch), z. B. `job_class=JobClass.INTERACTIVE` für Fragen.
+
+        - `log_mode`: "file" (eigene Logdatei) oder "memory" (Ringpuffer, nicht für Subprozesse).
+
+        - `dedupe_key` (Single-Flight): läuft oder wartet bereits ein Job mit demselben Schlüssel, wird nichts
+          gestartet und dessen job_id zurückgegeben (Zähler `coalesced` im Status).
+
+        - `timeout_s`: harte Laufzeitgrenze ab Start (Default: `timeouts[name]`, 0 = keine).
+
         Rückgabe: job_id (str)
         """
-        log_path = (self.logs_dir / f"job_{name}_{uuid.uuid4().hex[:8]}.log").resolve()
-        sink_id = logger.add(str(log_path), level="INFO")
-        jid = self._new_job(name, log_path)
+        if job_class not in self.executors:
+            raise ValueError(f"Unknown job class {job_class!r}, expected one of {sorted(self.executors)}")
+        if use_subprocess and log_mode != JobLogMode.FILE:
+            raise ValueError("subprocess jobs need log_mode='file'")
+        is_async = not use_subprocess and inspect.iscoroutinefunction(fn)
+        timeout_s = self.timeouts.get(name, 0.0) if timeout_s is None else timeout_s
+        jid = str(uuid.uuid4())
+        leader = self._new_job(jid, name, log_mode, job_class, queued=not is_async, dedupe_key=dedupe_key)
+        if leader != jid:
+            return leader
+        sink_id, log_path = self._add_sink(jid, name, log_mode)
+        with self._lock:
+            if sink_id is not None:
+                self._sinks[jid] = sink_id
+            if log_path is not None:
+                self.jobs.update(jid, log=str(log_path))
 
-        def run_thread(log_path: Path = log_path):
-            try:
-                logger.info(f"[{jid}] START {name} (thread)")
-                with self._lock:
-                    self.jobs[jid]["status"] = "running"
-
-                if fn is None:
-                    raise ValueError("fn must be provided for thread jobs")
-
-                # Konvention: Worker akzeptiert log_path als Keyword-Argument
-                res = fn(log_path=log_path)
-                with self._lock:
-                    self.jobs[jid]["result"] = res
-                    self.jobs[jid]["status"] = "success"
-
-                logger.info(f"[{jid}] DONE {name}")
-            except Exception as e:
-                with self._lock:
-                    self.jobs[jid]["status"] = "error"
-                    self.jobs[jid]["error"] = repr(e)
-                logger.exception(f"[{jid}] FAILED {name}: {e}")
-            finally:
-                logger.remove(sink_id)
+        event = threading.Event()
+
+        def run_thread(log_path: Path | None = log_path):
+            with logger.contextualize(job_id=jid):
+                token = cancel_event.set(event)
+                try:
+                    logger.info(f"[{jid}] START {name} (thread)")
+                    if not self._start(jid, timeout_s):
+                        return
+
+                    if fn is None:
+                        raise ValueError("fn must be provided for thread jobs")
+
+                    # Konvention: Worker akzeptiert log_path als Keyword-Argument
+                    if stream:
+                        res = fn(log_path=log_path, on_partial=lambda text: self.append_partial(jid, text))
+                    else:
+                        res = fn(log_path=log_path)
+                    self._update(jid, result=res, status="success")
+
+                    logger.info(f"[{jid}] DONE {name}")
+                except Exception as e:
+                    self._fail(jid, name, e, sink_id)
+                finally:
+                    cancel_event.reset(token)
+                    self._finished(jid)
+
+        async def run_async(log_path: Path | None = log_path):
+            with logger.contextualize(job_id=jid):
+                try:
+                    logger.info(f"[{jid}] START {name} (async)")
+                    if not self._start(jid, timeout_s):
+                        return
+                    assert fn is not None
+                    if stream:
+                        res = await fn(log_path=log_path, on_partial=lambda text: self.append_partial(jid, text))
+                    else:
+                        res = await fn(log_path=log_path)
+                    self._update(jid, result=res, status="success")
 
-        def run_subprocess():
-            try:
-                logger.info(f"[{jid}] START {name} (subprocess)")
-                with self._lock:
-                    self.jobs[jid]["status"] = "running"
-
-                if not args:
-                    raise ValueError("args must be provided for subprocess jobs")
-
-                # STDOUT/STDERR in die Job-Logdatei umleiten
-                with log_path.open("a", encoding="utf-8", errors="ignore") as lf:
-                    proc = subprocess.Popen(
-                        args,
-                        stdout=lf,
-                        stderr=lf,
-                        cwd=str(cwd) if cwd else None,
-                        env=env,   # None: erbt aktuelle ENV (EMAIL, SCRAPELIST, ...)
-                        shell=False,
-                    )
-                    with self._lock:
-                        self.jobs[jid]["pid"] = proc.pid
-                    rc = proc.wait()
-
-                if rc == 0:
-                    with self._lock:
-                        self.jobs[jid]["status"] = "success"
                     logger.info(f"[{jid}] DONE {name}")
-                else:
-                    raise RuntimeError(f"Subprocess exit code {rc}")
-            except Exception as e:
-                with self._lock:
-                    self.jobs[jid]["status"] = "error"
-                    self.jobs[jid]["error"] = repr(e)
-                logger.exception(f"[{jid}] FAILED {name}: {e}")
-            finally:
-                logger.remove(sink_id)
+                except asyncio.CancelledError:
+                    logger.info(f"[{jid}] STOPPED {name} after cancel")
+                    raise
+                except Exception as e:
+                    self._fail(jid, name, e, sink_id)
+                finally:
+                    self._finished(jid)
+
+        def run_subprocess():
+            with logger.contextualize(job_id=jid):
+                try:
+                    logger.info(f"[{jid}] START {name} (subprocess)")
+                    if not self._start(jid, timeout_s):
+                        return
+
+                    assert log_path is not None
+                    if not args:
+                        raise ValueError("args must be provided for subprocess jobs")
+
+                    # STDOUT/STDERR in die Job-Logdatei umleiten
+                    with log_path.open("a", encoding="utf-8", errors="ignore") as lf:
+                        proc = subprocess.Popen(
+                            args,
+                            stdout=lf,
+                            stderr=lf,
+                            cwd=str(cwd) if cwd else None,
+                            env=env,   # None: erbt aktuelle ENV (EMAIL, SCRAPELIST, ...)
+                            shell=False,
+                        )
+                        with self._lock:
+                            self.jobs.update(jid, pid=proc.pid)
+                            self._procs[jid] = proc
+                            cancelled = jid in self._cancelled
+                        if cancelled:
+                            # Abbruch kam zwischen Start und Popen
+                            self._terminate(proc)
+                        rc = proc.wait()
+
+                    if rc == 0:
+                        self._update(jid, status="success")
+                        logger.info(f"[{jid}] DONE {name}")
+                    else:
+                        raise RuntimeError(f"Subprocess exit code {rc}")
+                except Exception as e:
+                    self._fail(jid, name, e, sink_id)
+                finally:
+                    self._finished(jid)
 
         if use_subprocess:
-            self.executor.submit(run_subprocess)
+            fut = self.executors[job_class].submit(run_subprocess)
+        elif is_async:
+            fut = asyncio.run_coroutine_threadsafe(run_async(), self._event_loop())
         else:
-            self.executor.submit(run_thread)
+            with self._lock:
+                self._cancel_events[jid] = event
+            fut = self.executors[job_class].submit(run_thread)
+        with self._lock:
+            done = self._done.get(jid)
+            if done is not None and not done.done():
+                self._futures[jid] = fut
 
         return jid
 
+    async def run_blocking(self, job_class: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Kurze blockierende Arbeit ohne eigenen Job (z. B. search_docs) im Pool einer Job-Klasse ausführen."""
+        ctx = contextvars.copy_context()
+        return await asyncio.wrap_future(self.executors[job_class].submit(ctx.run, fn, *args, **kwargs))
+
+    def cancel(self, job_id: str, reason: str = "cancelled by client") -> Dict[str, Any]:
+        """
+        Bricht einen wartenden oder laufenden Job ab (Status `cancelled`, error_type `JobCancelledError`):
+          {"status": ..., "cancelled": bool}
+        Abgeschlossene Jobs und Jobs anderer Prozesse bleiben unverändert.
+        """
+        return self._abort(job_id, "cancelled", reason, JobCancelledError.__name__)
+
+    def abandon(self, job_id: str, reason: str = "client disconnected") -> Dict[str, Any]:
+        """
+        Ein Wartender gibt den Job auf (z. B. HTTP-Client getrennt). Abgebrochen wird erst, wenn auch alle
+        per Single-Flight angehängten Anfragen aufgegeben haben.
+        """
+        with self._lock:
+            waiters = self._waiters.get(job_id, 0) - 1
+            if waiters > 0:
+                self._waiters[job_id] = waiters
+                return {"status": "running", "cancelled": False, "waiters": waiters}
+            self._waiters.pop(job_id, None)
+        return self.cancel(job_id, reason)
+
+    def sweep_logs(self, max_age_s: float) -> int:
+        """Löscht Job-Logdateien, die älter als `max_age_s` sind und keinem laufenden/wartenden Job gehören."""
+        cutoff = time.time() - max_age_s
+        with self._lock:
+            active = {m["log"] for m in self.jobs.active() if m["log"]}
+        removed = 0
+        for p in self.logs_dir.glob("job_*.log"):
+            try:
+                if str(p) not in active and p.stat().st_mtime < cutoff:
+                    p.unlink()
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove old job log {p}: {e}")
+        if removed:
+            logger.info(f"Removed {removed} old job log file(s) from {self.logs_dir}")
+        return removed
+
+    def start_log_sweeper(self, max_age_s: float, interval_s: float) -> None:
+        """Startet `sweep_logs` periodisch in einem Daemon-Thread (einmal pro JobManager; `interval_s <= 0` = aus)."""
+        with self._lock:
+            if self._sweeper_started or interval_s <= 0:
+                return
+            self._sweeper_started = True
+
+        def loop() -> None:
+            while True:
+                self.sweep_logs(max_age_s)
+                time.sleep(interval_s)
+
+        threading.Thread(target=loop, name="job-log-sweeper", daemon=True).start()
+
     def status(self, job_id: str) -> Dict[str, Any]:
+        """Metadaten des Jobs; wartende Jobs zusätzlich mit `queue_position` (1 = als Nächstes) in ihrer Klasse."""
         with self._lock:
+            self._expire_local()
             meta = self.jobs.get(job_id)
-            return meta.copy() if meta else {"status": "unknown", "error": "job not found"}
+            if not meta:
+                return {"status": "unknown", "error": "job not found"}
+            out = meta.copy()
+            queue = self._queued[meta["job_class"]]
+            if meta["status"] == "queued" and job_id in queue:
+                out["queue_position"] = queue.index(job_id) + 1
+            return out
+
+    def queue_stats(self) -> Dict[str, Dict[str, int]]:
+        """Pro Job-Klasse: Poolgröße, laufende und wartende Jobs."""
+        with self._lock:
+            own = self.jobs.active(own=True)
+            return {
+                cls: {
+                    "workers": n,
+                    "running": sum(1 for m in own if m["job_class"] == cls and m["status"] == "running"),
+                    "queued": len(self._queued[cls]),
+                }
+                for cls, n in self.workers.items()
+            }
 
     def result(self, job_id: str) -> Dict[str, Any]:
         """
         Liefert den aktuellen Status plus ggf. Ergebnis/Fehler:
-          {"status": "running|success|error|queued", "result": {...} | None, "error": str | None}
+          {"status": "running|success|error|queued", "result": {...} | None, "error": str | None, "error_type": str | None}
         """
         with self._lock:
+            self._expire_local()
             meta = self.jobs.get(job_id)
         if not meta:
             return {"status": "unknown", "error": "job not found"}
@@ -163,6 +711,77 @@ class JobManager:
             "status": meta["status"],
             "result": meta.get("result"),
             "error": meta.get("error"),
+            "error_type": meta.get("error_type"),
+        }
+
+    async def wait(self, job_id: str, timeout_s: float) -> Dict[str, Any]:
+        """
+        Wartet (ohne Polling) bis der Job endet, höchstens `timeout_s`, und liefert dann `result()`.
+        Nach Ablauf ist `status` noch queued/running.
+        """
+        entry: tuple[asyncio.AbstractEventLoop, asyncio.Future[None]] | None = None
+        done = self._done.get(job_id)
+        if done is not None:
+            # Reihenfolge wie in `_apply` (erst done setzen, dann _wakeups leeren): kein Wecken geht verloren
+            with self._wakeup_lock:
+                if not done.done():
+                    loop = asyncio.get_running_loop()
+                    entry = (loop, loop.create_future())
+                    self._wakeups.setdefault(job_id, set()).add(entry)
+            if entry is not None:
+                try:
+                    await asyncio.wait_for(entry[1], timeout=max(0.0, timeout_s))
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    # Nichts bleibt am Job hängen, auch wenn ein Client lange Jobs per Long-Polling abfragt
+                    with self._wakeup_lock:
+                        pending = self._wakeups.get(job_id)
+                        if pending is not None:
+                            pending.discard(entry)
+                            if not pending:
+                                del self._wakeups[job_id]
+            return await asyncio.to_thread(self.result, job_id)
+        # Job eines anderen Prozesses: Status im gemeinsamen Store abfragen
+        deadline = time.monotonic() + max(0.0, timeout_s)
+        while True:
+            meta = await asyncio.to_thread(self.result, job_id)
+            remaining = deadline - time.monotonic()
+            if meta["status"] not in ("queued", "running") or remaining <= 0:
+                return meta
+            await asyncio.sleep(min(self.remote_poll_s, remaining))
+
+    def partial(self, job_id: str, offset: int = 0, wait_s: float = 0.0) -> Dict[str, Any]:
+        """
+        Teilausgabe eines Streaming-Jobs ab Zeichen-`offset`:
+          {"status": ..., "text": neuer Text, "offset": neuer Offset, "done": bool}
+        Mit `wait_s > 0` wird blockierend gewartet, bis neuer Text da ist oder der Job endet.
+        """
+        deadline = time.monotonic() + max(0.0, wait_s)
+        while True:
+            meta = self._get_meta(job_id)
+            if not meta:
+                return {"status": "unknown", "error": "job not found"}
+            with self._changed:
+                buf = self._partials.get(job_id)
+                own = self._done.get(job_id)
+                length = len(buf) if buf is not None else 0
+                # Ende eines eigenen Jobs auch dann erkennen, wenn es nach dem Lesen von `meta` kam
+                done = meta["status"] in FINISHED or (own is not None and own.done())
+                remaining = deadline - time.monotonic()
+                if length > offset or done or remaining <= 0:
+                    text = buf.since(offset) if buf is not None else ""
+                    break
+                # Eigene Jobs melden Token/Ende per notify, fremde werden im `remote_poll_s`-Takt neu gelesen
+                self._changed.wait(remaining if own is not None else min(remaining, self.remote_poll_s))
+        if done and meta["status"] not in FINISHED:
+            meta = self._get_meta(job_id) or meta
+        return {
+            "status": meta["status"],
+            "text": text,
+            "offset": length,
+            "done": done,
+            "error": meta.get("error"),
         }
 
     def log_tail(self, job_id: str, lines: int = 200) -> Dict[str, Any]:
@@ -170,34 +789,73 @@ class JobManager:
             meta = self.jobs.get(job_id)
         if not meta:
             return {"error": "job not found"}
+        with self._lock:
+            ring = self._rings.get(job_id)
+            if ring is not None:
+                return {"log": "".join(list(ring)[-max(1, lines):])}
+        if not meta["log"]:
+            return {"log": ""}
         p = Path(meta["log"])
         if not p.exists():
             return {"log": "", "note": "log not yet created"}
         try:
-            text = p.read_text(encoding="utf-8", errors="ignore")
-            tail = text.splitlines(True)[-max(1, lines):]
-            return {"log": "".join(tail)}
+            return {"log": tail_lines(p, lines)}
+        except Exception as e:
+            return {"error": repr(e)}
+
+    def log_follow(self, job_id: str, offset: int = 0, max_bytes: int = 256 * 1024) -> Dict[str, Any]:
+        """
+        Inkrementelles Mitlesen des Job-Logs: neue Bytes ab `offset` (aus dem vorherigen Aufruf).
+          {"text": ..., "offset": nächster Offset, "size": Dateigröße, "done": Job beendet}
+        `offset=-1` beginnt am aktuellen Dateiende. Jobs ohne Logdatei liefern ihr Speicher-Log wie `log_tail`.
+        """
+        with self._lock:
+            meta = self.jobs.get(job_id)
+            if not meta:
+                return {"error": "job not found"}
+            done = meta["status"] in FINISHED
+            ring = self._rings.get(job_id)
+            if ring is not None or not meta["log"]:
+                return {"text": "".join(ring or ()), "offset": 0, "size": 0, "done": done, "note": "in-memory log"}
+        p = Path(meta["log"])
+        if not p.exists():
+            return {"text": "", "offset": 0, "size": 0, "done": done}
+        try:
+            if offset < 0:
+                offset = p.stat().st_size
+            text, next_offset, size = read_from(p, offset, max_bytes)
+            return {"text": text, "offset": next_offset, "size": size, "done": done}
         except Exception as e:
             return {"error": repr(e)}
 
     def get_log_path(self, job_id: str) -> Optional[Path]:
         with self._lock:
             meta = self.jobs.get(job_id)
-        if not meta:
+        if not meta or not meta["log"]:
             return None
         return Path(meta["log"])
 
-    def list_jobs(self) -> list[dict[str, Any]]:
+    def list_jobs(
+        self, *, status: str | None = None, name: str | None = None, offset: int = 0, limit: int = 100,
+    ) -> Dict[str, Any]:
+        """Neueste Jobs zuerst, optional nach `status` und `name` gefiltert, seitenweise (`offset`, `limit`)."""
         with self._lock:
+            total, page = self.jobs.page(status=status, name=name, offset=offset, limit=limit)
             # Logpfad nicht mitschicken (kann groß sein); bei Bedarf separat abfragen
-            return [
+            jobs = [
                 {
                     "id": jid,
                     "name": meta.get("name"),
+                    "job_class": meta.get("job_class"),
                     "status": meta.get("status"),
                     "pid": meta.get("pid"),
                     "cwd": meta.get("cwd"),
                     "error": meta.get("error"),
                 }
-                for jid, meta in self.jobs.items()
+                for jid, meta in page
             ]
+        return {"jobs": jobs, "total": total, "offset": offset, "limit": limit}
+
+    def store_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self.jobs.stats()
@@ -0,0 +1,385 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from itertools import islice
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+FINISHED = ("success", "error", "cancelled")
+
+# Kennung dieses Prozesses (PIDs werden nach einem Neustart wiederverwendet, z. B. PID 1 im Container)
+_PROCESS_TOKEN = uuid.uuid4().hex
+
+
+def result_size(result: Any) -> int:
+    """Grobe Größe eines Job-Ergebnisses in Bytes (JSON-Länge, wie es auch an Clients geht)."""
+    if result is None:
+        return 0
+    try:
+        return len(json.dumps(result, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return len(repr(result))
+
+
+class JobStore:
+    """
+    Job-Tabelle mit begrenzter Größe (nicht thread-safe, der JobManager hält seinen Lock).
+
+    - Lookups per job_id in O(1).
+    - Abgeschlossene Jobs verfallen `ttl_s` Sekunden nach Ende.
+    - Höchstens `max_entries` Jobs bzw. `max_result_bytes` an Ergebnissen: darüber werden die am längsten
+      nicht abgefragten abgeschlossenen Jobs verdrängt (LRU). Wartende/laufende Jobs werden nie verdrängt.
+    - `on_evict(job_id)` räumt zugehörige Daten (Teilausgaben, Speicher-Logs) mit ab.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_s: float = 3600.0,
+        max_entries: int = 10_000,
+        max_result_bytes: int = 64 * 1024 * 1024,
+        on_evict: Callable[[str], None] | None = None,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_result_bytes = max_result_bytes
+        self.on_evict = on_evict
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._finished_at: OrderedDict[str, float] = OrderedDict()   # Endzeitpunkt, in Ende-Reihenfolge (TTL)
+        self._lru: OrderedDict[str, int] = OrderedDict()             # abgeschlossene Jobs -> Ergebnisgröße, LRU-Reihenfolge
+        self._result_bytes = 0
+        # Trefferzahlen für `page` je (Status, Name); None = beliebig
+        self._counts: Counter[tuple[str | None, str | None]] = Counter()
+        self.evicted = 0
+        self.expired = 0
+
+    def _count(self, meta: Dict[str, Any], delta: int) -> None:
+        for key in ((None, None), (meta["status"], None), (None, meta["name"]), (meta["status"], meta["name"])):
+            self._counts[key] += delta
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(self, job_id: str, meta: Dict[str, Any]) -> None:
+        self._jobs[job_id] = {**meta, "owner": os.getpid()}
+        self._count(self._jobs[job_id], 1)
+        self.prune()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        meta = self._jobs[job_id]
+        if "status" in fields and fields["status"] != meta["status"]:
+            self._count(meta, -1)
+            meta.update(fields)
+            self._count(meta, 1)
+        else:
+            meta.update(fields)
+
+    def active(self, *, own: bool = False) -> list[Dict[str, Any]]:
+        """Wartende und laufende Jobs (hier immer die des eigenen Prozesses)."""
+        return [meta for meta in self._jobs.values() if meta["status"] not in FINISHED]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Lookup; zählt bei abgeschlossenen Jobs als Zugriff für die LRU-Verdrängung."""
+        meta = self._jobs.get(job_id)
+        if meta is not None and job_id in self._lru:
+            self._lru.move_to_end(job_id)
+        return meta
+
+    def finish(self, job_id: str, now: float | None = None) -> None:
+        """Job ist abgeschlossen: Ergebnisgröße erfassen, TTL starten, ggf. verdrängen."""
+        meta = self._jobs.get(job_id)
+        if meta is None or job_id in self._lru:
+            return
+        size = result_size(meta.get("result"))
+        self._finished_at[job_id] = now if now is not None else time.monotonic()
+        self._lru[job_id] = size
+        self._result_bytes += size
+        self.prune()
+
+    def _drop(self, job_id: str) -> None:
+        meta = self._jobs.pop(job_id, None)
+        if meta is not None:
+            self._count(meta, -1)
+        self._finished_at.pop(job_id, None)
+        self._result_bytes -= self._lru.pop(job_id, 0)
+        if self.on_evict is not None:
+            self.on_evict(job_id)
+
+    def prune(self, now: float | None = None) -> None:
+        now = now if now is not None else time.monotonic()
+        while self._finished_at:
+            job_id, finished_at = next(iter(self._finished_at.items()))
+            if now - finished_at < self.ttl_s:
+                break
+            self._drop(job_id)
+            self.expired += 1
+        while self._lru and (len(self._jobs) > self.max_entries or self._result_bytes > self.max_result_bytes):
+            self._drop(next(iter(self._lru)))
+            self.evicted += 1
+
+    def page(
+        self, *, status: str | None = None, name: str | None = None, offset: int = 0, limit: int = 100,
+    ) -> tuple[int, list[tuple[str, Dict[str, Any]]]]:
+        """
+        Neueste Jobs zuerst, optional nach Status und Name gefiltert: (Anzahl Treffer gesamt, Seite).
+        Gesamtzahl aus Zählern; durchlaufen werden nur die Jobs bis zum Ende der Seite.
+        """
+        matches = (
+            (jid, meta) for jid, meta in reversed(self._jobs.items())
+            if (status is None or meta["status"] == status) and (name is None or meta["name"] == name)
+        )
+        start = max(0, offset)
+        return self._counts[(status, name)], list(islice(matches, start, start + max(0, limit)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "jobs": len(self._jobs),
+            "finished": len(self._lru),
+            "result_bytes": self._result_bytes,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SQLiteJobStore:
+    """
+    Job-Tabelle in SQLite (WAL-Modus) mit derselben Schnittstelle wie `JobStore` (ebenfalls ohne eigenen Lock).
+    Mehrere Serverprozesse auf einem Host (z. B. uvicorn-Worker) teilen sich so Status und Ergebnisse,
+    und abgeschlossene Jobs überstehen einen Neustart.
+
+    - Eine Verbindung pro Thread; WAL erlaubt Leser parallel zu einem Schreiber, `busy_timeout` puffert Schreibkonflikte.
+    - Indizes auf status, name und Endzeitpunkt; Metadaten und Ergebnis liegen als JSON in der Zeile.
+    - TTL wie beim `JobStore` (Wanduhr, da prozessübergreifend). Über `max_entries`/`max_result_bytes` hinaus werden
+      die am frühesten beendeten Jobs verdrängt statt LRU, damit Lesen keinen Schreibzugriff braucht.
+      Die Grenzen werden höchstens alle `prune_interval_s` Sekunden geprüft.
+    - Beim Öffnen werden wartende/laufende Jobs beendeter Prozesse auf `error` (JobInterrupted) gesetzt.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ttl_s: float = 3600.0,
+        max_entries: int = 10_000,
+        max_result_bytes: int = 64 * 1024 * 1024,
+        on_evict: Callable[[str], None] | None = None,
+        prune_interval_s: float = 1.0,
+    ) -> None:
+        self.path = Path(path).resolve()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_result_bytes = max_result_bytes
+        self.on_evict = on_evict
+        self.prune_interval_s = prune_interval_s
+        self._local = threading.local()
+        self._last_prune = 0.0
+        self.evicted = 0
+        self.expired = 0
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                owner_pid INTEGER NOT NULL,
+                owner_token TEXT NOT NULL,
+                finished_at REAL,
+                result_bytes INTEGER NOT NULL DEFAULT 0,
+                meta TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq);
+            CREATE INDEX IF NOT EXISTS jobs_name ON jobs (name, seq);
+            CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at, result_bytes);
+        """)
+        self.recover()
+        self.prune()
+
+    def _db(self) -> sqlite3.Connection:
+        db: sqlite3.Connection | None = getattr(self._local, "db", None)
+        if db is None:
+            # isolation_level=None: Autocommit, Transaktionen nur explizit über `_tx`
+            db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def _dump(meta: Dict[str, Any]) -> str:
+        return json.dumps(meta, ensure_ascii=False, default=str)
+
+    def __contains__(self, job_id: str) -> bool:
+        return self._db().execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def add(self, job_id: str, meta: Dict[str, Any]) -> None:
+        meta = {**meta, "owner": os.getpid()}
+        with self._tx() as db:
+            db.execute(
+                "INSERT INTO jobs (id, name, status, owner_pid, owner_token, meta) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, meta["name"], meta["status"], os.getpid(), _PROCESS_TOKEN, self._dump(meta)),
+            )
+        self._maybe_prune()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db().execute("SELECT meta FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._tx() as db:
+            row = db.execute("SELECT meta FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError(job_id)
+            meta = {**json.loads(row[0]), **fields}
+            db.execute("UPDATE jobs SET status = ?, meta = ? WHERE id = ?", (meta["status"], self._dump(meta), job_id))
+
+    def finish(self, job_id: str, now: float | None = None) -> None:
+        """Job ist abgeschlossen: Ergebnisgröße erfassen, TTL starten, ggf. verdrängen."""
+        with self._tx() as db:
+            row = db.execute("SELECT meta FROM jobs WHERE id = ? AND finished_at IS NULL", (job_id,)).fetchone()
+            if row is None:
+                return
+            size = result_size(json.loads(row[0]).get("result"))
+            db.execute(
+                "UPDATE jobs SET finished_at = ?, result_bytes = ? WHERE id = ?",
+                (now if now is not None else time.time(), size, job_id),
+            )
+        self._maybe_prune()
+
+    def active(self, *, own: bool = False) -> list[Dict[str, Any]]:
+        """Wartende und laufende Jobs aller Prozesse (`own=True`: nur die dieses Prozesses)."""
+        sql = "SELECT meta FROM jobs WHERE status IN ('queued', 'running')"
+        params: tuple[Any, ...] = ()
+        if own:
+            sql += " AND owner_token = ?"
+            params = (_PROCESS_TOKEN,)
+        return [json.loads(row[0]) for row in self._db().execute(sql, params)]
+
+    def recover(self) -> int:
+        """Wartende/laufende Jobs, deren Prozess nicht mehr läuft, als abgebrochen markieren."""
+        now = time.time()
+        interrupted = 0
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT id, owner_pid, owner_token, meta FROM jobs WHERE status IN ('queued', 'running')",
+            ).fetchall()
+            for job_id, pid, token, raw in rows:
+                if token == _PROCESS_TOKEN or (pid != os.getpid() and _pid_alive(pid)):
+                    continue
+                meta = {
+                    **json.loads(raw),
+                    "status": "error",
+                    "error": f"interrupted: server process {pid} ended before the job finished",
+                    "error_type": "JobInterrupted",
+                }
+                db.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, meta = ? WHERE id = ?",
+                    ("error", now, self._dump(meta), job_id),
+                )
+                interrupted += 1
+        return interrupted
+
+    def _maybe_prune(self) -> None:
+        if time.monotonic() - self._last_prune >= self.prune_interval_s:
+            self.prune()
+
+    def prune(self, now: float | None = None) -> None:
+        self._last_prune = time.monotonic()
+        now = now if now is not None else time.time()
+        dropped: list[str] = []
+        with self._tx() as db:
+            expired = [r[0] for r in db.execute("SELECT id FROM jobs WHERE finished_at < ?", (now - self.ttl_s,))]
+            db.executemany("DELETE FROM jobs WHERE id = ?", ((jid,) for jid in expired))
+            self.expired += len(expired)
+            dropped += expired
+
+            entries = db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            result_bytes = db.execute(
+                "SELECT COALESCE(SUM(result_bytes), 0) FROM jobs WHERE finished_at IS NOT NULL",
+            ).fetchone()[0]
+            if entries > self.max_entries or result_bytes > self.max_result_bytes:
+                evict: list[str] = []
+                oldest = db.execute(
+                    "SELECT id, result_bytes FROM jobs WHERE finished_at IS NOT NULL ORDER BY finished_at",
+                )
+                for jid, size in oldest:
+                    if entries <= self.max_entries and result_bytes <= self.max_result_bytes:
+                        break
+                    evict.append(jid)
+                    entries -= 1
+                    result_bytes -= size
+                db.executemany("DELETE FROM jobs WHERE id = ?", ((jid,) for jid in evict))
+                self.evicted += len(evict)
+                dropped += evict
+        if self.on_evict is not None:
+            for jid in dropped:
+                self.on_evict(jid)
+
+    def page(
+        self, *, status: str | None = None, name: str | None = None, offset: int = 0, limit: int = 100,
+    ) -> tuple[int, list[tuple[str, Dict[str, Any]]]]:
+        """Neueste Jobs zuerst, optional nach Status und Name gefiltert: (Anzahl Treffer gesamt, Seite)."""
+        where, params = [], []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if name is not None:
+            where.append("name = ?")
+            params.append(name)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        db = self._db()
+        total = db.execute(f"SELECT COUNT(*) FROM jobs{clause}", params).fetchone()[0]
+        rows = db.execute(
+            f"SELECT id, meta FROM jobs{clause} ORDER BY seq DESC LIMIT ? OFFSET ?",
+            (*params, max(0, limit), max(0, offset)),
+        ).fetchall()
+        return total, [(jid, json.loads(raw)) for jid, raw in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        db = self._db()
+        jobs, finished, result_bytes = db.execute(
+            "SELECT COUNT(*), COUNT(finished_at), COALESCE(SUM(result_bytes), 0) FROM jobs",
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "jobs": jobs,
+            "finished": finished,
+            "result_bytes": result_bytes,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -1,11 +1,20 @@
 from mcp.server.fastmcp import FastMCP
 from loguru import logger
 from server.job_manager import JobManager
-from server.blocking_tasks import chunk_blocking, ingest_blocking, ask_blocking, pipeline_blocking
-from typing import Any
+from server.blocking_tasks import chunk_blocking, ingest_blocking, ask_async, pipeline_blocking, search_blocking
+from typing import Any, Callable
+import asyncio
 import sys
 from pathlib import Path
 from config.settings import get_settings, AppSettings
+from definitions.custom_enums import JobClass, JobStoreBackend
+from rag.router import validate_section
+from rag.answer_cache import get_answer_cache, normalize_question
+from rag.llm_router import get_llm_router
+from rag.admission import get_admission_controller
+from rag.llm_warmup import get_warmth_stats
+from rag.deadline import get_speed_estimator
+from pipeline.docs_pipeline import pipeline_status as read_pipeline_status, validate_force
 import logging
 
 custom_settings: AppSettings = get_settings()
@@ -39,13 +48,42 @@ logging.getLogger("asyncio").setLevel(logging.ERROR)
 logging.captureWarnings(True)
 
 mcp = FastMCP("Doc RAG")
-jobman = JobManager(max_workers=3, logs_dir=Path("./job_logs"))
+jobman = JobManager(
+    workers={
+        JobClass.INTERACTIVE: custom_settings.JOBS_INTERACTIVE_WORKERS,
+        JobClass.BATCH: custom_settings.JOBS_BATCH_WORKERS,
+    },
+    logs_dir=Path("./job_logs"),
+    ring_lines=custom_settings.JOBS_LOG_RING_LINES,
+    ttl_s=custom_settings.JOBS_TTL_S,
+    max_entries=custom_settings.JOBS_MAX_ENTRIES,
+    max_result_bytes=custom_settings.JOBS_MAX_RESULT_BYTES,
+    store_path=Path(custom_settings.JOBS_STORE_PATH) if custom_settings.JOBS_STORE == JobStoreBackend.SQLITE else None,
+    timeouts=custom_settings.JOBS_TIMEOUT_S,
+    cancel_grace_s=custom_settings.JOBS_CANCEL_GRACE_S,
+)
+
+def start_job_log_sweeper() -> None:
+    """Beim Serverstart: alte Job-Logdateien regelmäßig löschen."""
+    jobman.start_log_sweeper(custom_settings.JOBS_LOG_MAX_AGE_S, custom_settings.JOBS_LOG_SWEEP_INTERVAL_S)
+
+
+def abandon_job(job_id: str) -> None:
+    """
+    Chat-API: Client hat die Verbindung getrennt – Job abbrechen, sofern niemand sonst auf ihn wartet.
+    Läuft im Hintergrund-Thread ohne await, damit es auch in einem bereits abgebrochenen Request ausgeführt wird.
+    """
+    asyncio.get_running_loop().run_in_executor(None, jobman.abandon, job_id)
+
 
 # --- MCP Tools (nicht blockierend) ---
+# Aufrufe des JobManagers laufen per asyncio.to_thread: mit JOBS_STORE=sqlite warten Schreibzugriffe bei
+# Konflikten zwischen Serverprozessen bis zum busy_timeout und dürfen die Event-Loop nicht blockieren
 @mcp.tool()
 async def start_crawl() -> dict[str, Any]:
     # Subprozess: ruft bestehendes CLI auf (keine stdout-Ausgabe dort)
-    jid = jobman.submit(
+    jid = await asyncio.to_thread(
+            jobman.submit,
             "crawl",
             use_subprocess=True,
             args=[sys.executable, "-u", "scraper_main.py"],  # -u = unbuffered (ok, gehen in Logdatei)
@@ -57,50 +95,173 @@ async def start_crawl() -> dict[str, Any]:
 @mcp.tool()
 async def start_chunk() -> dict[str,Any]:
     """Startet Chunking im Hintergrund. Gibt job_id zurück."""
-    jid = jobman.submit("chunk", chunk_blocking)
+    jid = await asyncio.to_thread(jobman.submit, "chunk", chunk_blocking)
     return {"job_id": jid}
 
 @mcp.tool()
 async def start_ingest() -> dict[str,Any]:
     """Startet Ingest im Hintergrund. Gibt job_id zurück."""
-    jid = jobman.submit("ingest", ingest_blocking)
+    jid = await asyncio.to_thread(jobman.submit, "ingest", ingest_blocking)
     return {"job_id": jid}
 
 
 @mcp.tool()
-async def start_pipeline() -> dict[str,Any]:
-    jid = jobman.submit("pipeline", pipeline_blocking)
+async def start_pipeline(force: list[str] | None = None) -> dict[str,Any]:
+    """
+    crawl → chunk → ingest; Stages mit unveränderter Konfiguration und Eingabe werden übersprungen,
+    ein abgebrochener Ingest setzt fort. `force`: Stages trotzdem neu ausführen (crawl, chunk, ingest oder all).
+    """
+    force_stages = validate_force(force or ())
+    def runner(*, log_path: Path) -> None:
+        pipeline_blocking(log_path=log_path, force=force_stages)
+    jid = await asyncio.to_thread(jobman.submit, "pipeline", runner)
     return {"job_id": jid}
 
 
+@mcp.tool()
+async def pipeline_status() -> dict[str,Any]:
+    """Letzter erfolgreicher Lauf jeder Pipeline-Stage (Artefakt, Digest, Dauer) und offene Ingest-Checkpoints."""
+    return await asyncio.to_thread(read_pipeline_status)
+
+
 @mcp.tool()
 async def job_status(job_id: str) -> dict[str,Any]:
-    """Status eines Jobs: queued | running | success | error."""
-    return jobman.status(job_id)
+    """
+    Status eines Jobs: queued | running | success | error | cancelled.
+    Wartende Thread-Jobs (crawl/chunk/ingest/pipeline) enthalten `queue_position` in ihrer Job-Klasse, dazu `job_queues`.
+    Bei ask-Jobs zusätzlich `llm_admission`: laufende/wartende LLM-Requests, Wartezeiten, Ablehnungen.
+    """
+    def status() -> dict[str, Any]:
+        meta = jobman.status(job_id)
+        if meta.get("status") == "queued":
+            meta["job_queues"] = jobman.queue_stats()
+        return meta
+    meta = await asyncio.to_thread(status)
+    if meta.get("name") == "ask":
+        meta["llm_admission"] = get_admission_controller().stats()
+    return meta
 
 @mcp.tool()
 async def job_log_tail(job_id: str, lines: int = 200) -> dict[str,Any]:
-    """Letzte Logzeilen eines Jobs (aus dem Job-Logfile)."""
-    return jobman.log_tail(job_id, lines=lines)
+    """Letzte Logzeilen eines Jobs (aus dem Job-Logfile bzw. bei ask-Jobs aus dem Speicher-Log)."""
+    return await asyncio.to_thread(jobman.log_tail, job_id, lines)
 
 
 @mcp.tool()
-async def list_jobs() -> list[dict[str,Any]]:
-    return jobman.list_jobs()
+async def job_log_follow(job_id: str, offset: int = 0, max_bytes: int = 256 * 1024) -> dict[str,Any]:
+    """
+    Log eines Jobs inkrementell mitlesen: liefert nur die Bytes ab `offset` (höchstens `max_bytes`) und den
+    `offset` für den nächsten Aufruf; `offset=-1` startet am aktuellen Ende. `done` zeigt das Job-Ende an.
+    """
+    return await asyncio.to_thread(jobman.log_follow, job_id, offset, max_bytes)
+
+
+@mcp.tool()
+async def list_jobs(status: str | None = None, name: str | None = None, offset: int = 0, limit: int = 50) -> dict[str,Any]:
+    """
+    Jobs, neueste zuerst; optional nur ein `status` (queued | running | success | error) und/oder ein `name`
+    (crawl | chunk | ingest | pipeline | ask), seitenweise über `offset`/`limit`.
+    `total` ist die Anzahl aller Treffer, `store` zeigt Größe und Verdrängungen der Job-Tabelle.
+    """
+    return await asyncio.to_thread(
+        lambda: {**jobman.list_jobs(status=status, name=name, offset=offset, limit=limit), "store": jobman.store_stats()}
+    )
 
 
 
 @mcp.tool()
 async def job_result(job_id: str) -> dict[str,Any]:
     """Gibt Ergebnis (answer + sources) zurück, sobald Status=success."""
-    return jobman.result(job_id)
+    return await asyncio.to_thread(jobman.result, job_id)
 
 @mcp.tool()
 async def ask_job(
     question: str,
+    section: str | None = None,
+    deadline_s: float | None = None,
 ) -> dict[str,str]:
-    """Startet Q&A als Hintergrund-Job und gibt job_id zurück."""
-    def runner(*, log_path: Path | None = None) -> dict[str,Any]:
-        return ask_blocking(question=question)
-    jid = jobman.submit("ask", runner)
-    return {"job_id": jid}
\ No newline at end of file
+    """
+    Startet Q&A als Hintergrund-Job und gibt job_id zurück.
+    Optional `section` (z. B. "tutorial", "reference") schränkt die Suche ein; ohne Angabe wird automatisch geroutet.
+    Optional `deadline_s`: Latenzziel in Sekunden (Default RAG_DEADLINE_S, 0 = keine Frist); bei knapper Zeit
+    wird die Antwort gekürzt oder extraktiv aus den Treffern gebildet.
+    Läuft dieselbe Frage (normalisiert, gleiche Section/Frist) gerade schon, wird deren job_id geliefert.
+    """
+    if section:
+        validate_section(section)
+    async def runner(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str,Any]:
+        return await ask_async(question=question, section=section, deadline_s=deadline_s, on_partial=on_partial)
+    dedupe_key = ("ask", normalize_question(question), section, deadline_s) if custom_settings.JOBS_COALESCE_ASKS else None
+    jid = await asyncio.to_thread(
+        jobman.submit,
+        "ask", runner, stream=True, job_class=JobClass.INTERACTIVE, log_mode=custom_settings.JOBS_ASK_LOG_MODE,
+        dedupe_key=dedupe_key,
+    )
+    return {"job_id": jid}
+
+
+@mcp.tool()
+async def search_docs(
+    question: str,
+    section: str | None = None,
+    max_tokens: int | None = None,
+) -> dict[str,Any]:
+    """
+    Sofortige Suche ohne LLM und ohne Job: gerankte, aufbereitete Doku-Snippets (Text, `heading_path`,
+    kanonische URL, Anker/Link) für Clients, die selbst antworten. Optional `section` und `max_tokens`
+    (Umfang der Snippets, Default wie der LLM-Kontext).
+    """
+    if section:
+        validate_section(section)
+    return await jobman.run_blocking(
+        JobClass.INTERACTIVE, search_blocking, question=question, section=section, max_tokens=max_tokens,
+    )
+
+
+@mcp.tool()
+async def wait_job(job_id: str, timeout_s: float = 30.0) -> dict[str,Any]:
+    """
+    Wartet bis der Job fertig ist (höchstens `timeout_s`) und liefert dann dasselbe wie `job_result`.
+    Ersetzt Polling: die Antwort kommt unmittelbar nach Job-Ende. Ist `status` noch queued/running, lief die Zeit ab.
+    """
+    return await jobman.wait(job_id, timeout_s)
+
+
+@mcp.tool()
+async def cancel_job(job_id: str) -> dict[str,Any]:
+    """
+    Bricht einen wartenden oder laufenden Job ab (Status `cancelled`) und gibt seinen Worker-Platz frei:
+    wartende Jobs starten nicht mehr, Fragen beenden ihren LLM-Request, Subprozesse (crawl) werden beendet,
+    chunk/ingest stoppen beim nächsten Batch. Rückgabe: {"status": ..., "cancelled": bool}.
+    """
+    return await asyncio.to_thread(jobman.cancel, job_id)
+
+
+@mcp.tool()
+async def job_partial(job_id: str, offset: int = 0, wait_s: float = 0.0) -> dict[str,Any]:
+    """
+    Teilantwort eines laufenden ask-Jobs ab Zeichen-`offset` (gestreamte LLM-Ausgabe).
+    Rückgabe enthält den neuen `offset` für den nächsten Aufruf; `wait_s` wartet bis zu so lange auf neuen Text.
+    """
+    return await asyncio.to_thread(jobman.partial, job_id, offset, wait_s)
+
+
+@mcp.tool()
+async def answer_cache_stats() -> dict[str,Any]:
+    """Trefferquote des Antwort-Caches (exakt/semantisch) und eingesparte LLM-Zeit in Sekunden."""
+    return get_answer_cache().stats()
+
+
+@mcp.tool()
+async def llm_endpoint_stats() -> list[dict[str,Any]]:
+    """Zustand der Ollama-Instanzen: Health, Circuit Breaker, offene Requests, Fehler, mittlere Latenz."""
+    return get_llm_router().stats()
+
+
+@mcp.tool()
+async def llm_warmup_stats() -> dict[str,Any]:
+    """
+    Kalte vs. warme Antworten (Latenz bis zur ersten Ausgabe), Modell-Ladezeiten und Preload-Dauer je Instanz,
+    dazu die gemessene Geschwindigkeit (Prefill/Decode Tokens/s), mit der Fristen geplant werden.
+    """
+    return {**get_warmth_stats().stats(), "speed": get_speed_estimator().stats()}
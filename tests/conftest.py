@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# Pflichtfelder der Settings für Tests belegen, ohne echtes Ollama/Crawl-Ziel
+os.environ.setdefault("SCRAPE_URL", "https://docs.example.org")
+os.environ.setdefault("EMAIL", "tests@example.org")
+os.environ.setdefault("OLLAMA_PRELOAD", "False")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+import pytest
+from definitions.errors import LLMBusyError
+from rag.admission import AdmissionController
+
+
+def test_rejects_immediately_when_queue_is_full() -> None:
+    admission = AdmissionController(max_in_flight=1, max_queue=0, max_wait_s=5.0)
+    admission.acquire()
+    started = time.monotonic()
+    with pytest.raises(LLMBusyError, match="queue full"):
+        admission.acquire()
+    assert time.monotonic() - started < 0.5
+    assert admission.stats()["rejected_queue_full"] == 1
+
+
+def test_rejects_when_estimated_wait_is_too_long() -> None:
+    admission = AdmissionController(max_in_flight=1, max_queue=10, max_wait_s=1.0)
+    with admission.slot():
+        pass
+    admission.release(10.0)  # mittlere Bearbeitungszeit hochziehen
+    admission.acquire()
+    with pytest.raises(LLMBusyError, match="estimated wait"):
+        admission.acquire()
+    assert admission.stats()["rejected_estimated_wait"] == 1
+
+
+def test_queued_request_times_out_and_leaves_the_queue() -> None:
+    admission = AdmissionController(max_in_flight=1, max_queue=1, max_wait_s=0.1)
+    admission.acquire()
+    with pytest.raises(LLMBusyError, match="no slot"):
+        admission.acquire()
+    stats = admission.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["queued"] == 0 and stats["in_flight"] == 1
+
+
+def test_release_hands_the_slot_to_the_queued_request() -> None:
+    admission = AdmissionController(max_in_flight=1, max_queue=1, max_wait_s=5.0)
+    admission.acquire()
+    admitted = threading.Event()
+
+    def waiter() -> None:
+        admission.acquire()
+        admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    while admission.stats()["queued"] == 0:
+        time.sleep(0.01)
+    admission.release(0.01)
+    assert admitted.wait(2.0)
+    thread.join()
+    assert admission.stats()["in_flight"] == 1
+
+
+def test_async_timeout_and_cancel_free_the_queue_position() -> None:
+    admission = AdmissionController(max_in_flight=1, max_queue=2, max_wait_s=0.1)
+
+    async def scenario() -> None:
+        await admission.acquire_async()
+        with pytest.raises(LLMBusyError):
+            await admission.acquire_async()
+        admission.max_wait_s = 5.0
+        task = asyncio.ensure_future(admission.acquire_async())
+        await asyncio.sleep(0.05)
+        assert admission.stats()["queued"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert admission.stats()["queued"] == 0
+        admission.release(0.01)
+        assert admission.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,123 @@
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable
+from definitions.custom_enums import JobClass, JobLogMode
+from server.job_manager import JobManager
+
+
+def _done(*, log_path: Path | None = None) -> dict[str, int]:
+    return {"answer": 42}
+
+
+def _slow_ask(started: list[str], stopped: list[str]) -> Callable[..., Any]:
+    """Async-Runner wie ask_async: läuft, bis er abgebrochen wird."""
+    async def runner(*, log_path: Path | None = None, on_partial: Callable[[str], None] | None = None) -> dict[str, Any]:
+        started.append("ask")
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            stopped.append("ask")
+            raise
+        return {"answer": "late"}
+    return runner
+
+
+def _submit_ask(jobs: JobManager, runner: Callable[..., Any], key: str) -> str:
+    return jobs.submit(
+        "ask", runner, stream=True, job_class=JobClass.INTERACTIVE, log_mode=JobLogMode.NONE, dedupe_key=key,
+    )
+
+
+def _wait_until(predicate: Callable[[], bool], timeout_s: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_restart_with_expired_jobs_in_sqlite_store(tmp_path: Path) -> None:
+    store = tmp_path / "jobs.sqlite3"
+    first = JobManager(logs_dir=tmp_path / "logs", store_path=store, ttl_s=0.2)
+    jid = first.submit("done", _done, log_mode=JobLogMode.NONE)
+    assert asyncio.run(first.wait(jid, 5.0))["status"] == "success"
+    time.sleep(0.5)
+    # Neustart: der Store verdrängt den abgelaufenen Job schon beim Öffnen
+    second = JobManager(logs_dir=tmp_path / "logs", store_path=store, ttl_s=0.2)
+    assert second.status(jid)["status"] == "unknown"
+    assert not second._done and not second._local_finished
+
+
+def test_restart_keeps_unexpired_results_and_interrupts_orphaned_jobs(tmp_path: Path) -> None:
+    store = tmp_path / "jobs.sqlite3"
+    first = JobManager(logs_dir=tmp_path / "logs", store_path=store)
+    finished = first.submit("done", _done, log_mode=JobLogMode.NONE)
+    assert asyncio.run(first.wait(finished, 5.0))["status"] == "success"
+    orphan = first.submit("done", _done, log_mode=JobLogMode.NONE)
+    asyncio.run(first.wait(orphan, 5.0))
+    # Zeile so umschreiben, als liefe der Job noch in einem inzwischen beendeten Prozess
+    with sqlite3.connect(store) as db:
+        db.execute(
+            "UPDATE jobs SET status = 'running', finished_at = NULL, owner_pid = ?, owner_token = 'gone', "
+            "meta = json_set(meta, '$.status', 'running') WHERE id = ?",
+            (2**22 + 12345, orphan),
+        )
+
+    second = JobManager(logs_dir=tmp_path / "logs", store_path=store)
+    assert second.result(finished) == {"status": "success", "result": {"answer": 42}, "error": None, "error_type": None}
+    interrupted = second.status(orphan)
+    assert interrupted["status"] == "error"
+    assert interrupted["error_type"] == "JobInterrupted"
+
+
+def test_memory_store_forgets_jobs_after_ttl(tmp_path: Path) -> None:
+    jobs = JobManager(logs_dir=tmp_path, ttl_s=0.1)
+    jid = jobs.submit("done", _done, log_mode=JobLogMode.NONE)
+    assert asyncio.run(jobs.wait(jid, 5.0))["status"] == "success"
+    time.sleep(0.2)
+    # Der Speicher-Store räumt beim nächsten Schreibzugriff ab
+    asyncio.run(jobs.wait(jobs.submit("done", _done, log_mode=JobLogMode.NONE), 5.0))
+    assert jobs.status(jid)["status"] == "unknown"
+    assert jid not in jobs._done and jid not in jobs._local_finished
+
+
+def test_abandon_coalesced_ask_cancels_after_last_waiter(tmp_path: Path) -> None:
+    jobs = JobManager(logs_dir=tmp_path)
+    started: list[str] = []
+    stopped: list[str] = []
+    runner = _slow_ask(started, stopped)
+    leader = _submit_ask(jobs, runner, "q")
+    assert _submit_ask(jobs, runner, "q") == leader
+    _wait_until(lambda: jobs.status(leader)["status"] == "running")
+    assert jobs.status(leader)["coalesced"] == 1
+
+    first = jobs.abandon(leader)
+    assert first["cancelled"] is False and first["waiters"] == 1
+    assert jobs.status(leader)["status"] == "running"
+
+    assert jobs.abandon(leader)["cancelled"] is True
+    assert jobs.status(leader)["status"] == "cancelled"
+    _wait_until(lambda: stopped == ["ask"])
+    assert started == ["ask"]
+
+
+def test_cancel_coalesced_ask_releases_dedupe_key(tmp_path: Path) -> None:
+    jobs = JobManager(logs_dir=tmp_path)
+    runner = _slow_ask([], [])
+    leader = _submit_ask(jobs, runner, "q")
+    _submit_ask(jobs, runner, "q")
+
+    async def both_waiters() -> list[dict[str, Any]]:
+        waits = [asyncio.ensure_future(jobs.wait(leader, 5.0)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(jobs.cancel, leader)
+        return await asyncio.gather(*waits)
+
+    results = asyncio.run(both_waiters())
+    assert [r["status"] for r in results] == ["cancelled", "cancelled"]
+    assert results[0]["error_type"] == "JobCancelledError"
+    # Eine neue identische Frage startet einen neuen Job statt sich an den abgebrochenen zu hängen
+    follower = _submit_ask(jobs, runner, "q")
+    assert follower != leader
+    jobs.cancel(follower)
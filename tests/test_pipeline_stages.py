@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Any
+import pytest
+from pipeline.stages import Stage, run_stages
+
+
+class _Stages:
+    """Zwei Stages (source -> double) mit Zählern; `double` kann einmalig nach dem ersten Batch abbrechen."""
+
+    def __init__(self, tmp_path: Path) -> None:
+        self.out = tmp_path / "out"
+        self.out.mkdir()
+        self.runs: dict[str, int] = {"source": 0, "double": 0}
+        self.factor = 2
+        self.source_text = "1\n2\n3\n"
+        self.fail_after_first_batch = False
+        self.resumed_from: list[str] = []
+
+    def source(self, inputs: dict[str, Path], checkpoint: Path) -> Path:
+        self.runs["source"] += 1
+        path = self.out / "source.txt"
+        path.write_text(self.source_text, encoding="utf-8")
+        return path
+
+    def double(self, inputs: dict[str, Path], checkpoint: Path) -> Path:
+        self.runs["double"] += 1
+        numbers = inputs["source"].read_text(encoding="utf-8").split()
+        done = checkpoint.read_text(encoding="utf-8").split() if checkpoint.exists() else []
+        self.resumed_from = list(done)
+        for n in numbers[len(done):]:
+            done.append(str(int(n) * self.factor))
+            checkpoint.write_text("\n".join(done), encoding="utf-8")
+            if self.fail_after_first_batch:
+                self.fail_after_first_batch = False
+                raise RuntimeError("interrupted")
+        path = self.out / "double.txt"
+        path.write_text("\n".join(done), encoding="utf-8")
+        return path
+
+    def stages(self) -> list[Stage]:
+        return [
+            Stage("source", self.source),
+            Stage("double", self.double, deps=("source",), config=lambda: {"factor": self.factor}),
+        ]
+
+
+def _skipped(results: list[Any]) -> dict[str, bool]:
+    return {r.name: r.skipped for r in results}
+
+
+def test_unchanged_stages_are_skipped(tmp_path: Path) -> None:
+    pipeline = _Stages(tmp_path)
+    state = tmp_path / "state"
+    assert _skipped(run_stages(pipeline.stages(), state)) == {"source": False, "double": False}
+    assert _skipped(run_stages(pipeline.stages(), state)) == {"source": True, "double": True}
+    assert pipeline.runs == {"source": 1, "double": 1}
+
+
+def test_config_change_reruns_only_that_stage(tmp_path: Path) -> None:
+    pipeline = _Stages(tmp_path)
+    state = tmp_path / "state"
+    run_stages(pipeline.stages(), state)
+    pipeline.factor = 3
+    assert _skipped(run_stages(pipeline.stages(), state)) == {"source": True, "double": False}
+    assert (pipeline.out / "double.txt").read_text(encoding="utf-8") == "3\n6\n9"
+
+
+def test_forced_stage_with_identical_output_keeps_downstream_skipped(tmp_path: Path) -> None:
+    pipeline = _Stages(tmp_path)
+    state = tmp_path / "state"
+    run_stages(pipeline.stages(), state)
+    assert _skipped(run_stages(pipeline.stages(), state, force=["source"])) == {"source": False, "double": True}
+    pipeline.source_text = "4\n5\n"
+    assert _skipped(run_stages(pipeline.stages(), state, force=["source"])) == {"source": False, "double": False}
+
+
+def test_modified_artifact_is_rebuilt(tmp_path: Path) -> None:
+    pipeline = _Stages(tmp_path)
+    state = tmp_path / "state"
+    run_stages(pipeline.stages(), state)
+    (pipeline.out / "double.txt").write_text("tampered", encoding="utf-8")
+    assert _skipped(run_stages(pipeline.stages(), state)) == {"source": True, "double": False}
+    assert (pipeline.out / "double.txt").read_text(encoding="utf-8") == "2\n4\n6"
+
+
+def test_failed_stage_resumes_from_its_checkpoint(tmp_path: Path) -> None:
+    pipeline = _Stages(tmp_path)
+    state = tmp_path / "state"
+    pipeline.fail_after_first_batch = True
+    with pytest.raises(RuntimeError, match="interrupted"):
+        run_stages(pipeline.stages(), state)
+    assert len(list(state.glob("double_*.ckpt"))) == 1
+
+    assert _skipped(run_stages(pipeline.stages(), state)) == {"source": True, "double": False}
+    assert pipeline.resumed_from == ["2"]
+    assert (pipeline.out / "double.txt").read_text(encoding="utf-8") == "2\n4\n6"
+    assert not list(state.glob("*.ckpt"))
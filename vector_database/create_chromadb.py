@@ -1,35 +1,31 @@
 # the code structure and docstrings were improved through AI generation
+import contextvars
 import json
+import os
 import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Iterator, Any
+from typing import Callable, Iterator, Any
 from math import ceil
 
 from chromadb import PersistentClient
 from chromadb.api import ClientAPI
-from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
 from loguru import logger
 
-from definitions.custom_enums import Names, ChunkKeys
+from definitions.custom_enums import Names, ChunkKeys, ShardStrategy
 from definitions import constants
 from definitions.errors import ChromaError
-from helpers.utils import count_lines
+from helpers.utils import count_lines, raise_if_cancelled
+from vector_database.index_version import write_index_version
+from vector_database.embedding import get_embedding_function, gpu_available
+from vector_database.sharding import shard_names, shard_for_record
 
 from config.settings import get_settings, AppSettings
 
 custom_settings: AppSettings = get_settings()
 
-pkg = None
-if custom_settings.CHROMA_USE_GPU:
-    try:
-        import onnxruntime as ort # type: ignore
-        pkg = True
-    except ImportError as ie:
-        pkg = None
-
-if pkg is None:
-    logger.warning("ONNXRuntime or ChromaDB with ONNX support not installed. Falling back to CPU embeddings.")
-
 def get_base_and_dirs() -> tuple[Path, Path, Path]:
     """
     Liefert:
@@ -81,17 +77,15 @@ def init_chroma_client(database_path: Path) -> ClientAPI:
 
 
 def get_collection(client: ClientAPI, name: str) -> Any:
-    if custom_settings.CHROMA_USE_GPU and pkg is not None:
-        ef = ONNXMiniLM_L6_V2(preferred_providers=custom_settings.ONNX_PREFERRED_PROVIDERS)
-        collection = client.get_or_create_collection(name=name, embedding_function=ef) # type: ignore
-        logger.info("Created Chroma collection with GPU embeddings")
-        return collection
     """Erstellt/öffnet die Zielsammlung."""
-    ef = ONNXMiniLM_L6_V2()
-    collection = client.get_or_create_collection(name=name, embedding_function=ef) # type: ignore
-    logger.info("Created Chroma collection with CPU embeddings")
+    collection = client.get_or_create_collection(name=name, embedding_function=get_embedding_function()) # type: ignore
+    logger.info(f"Created Chroma collection {name!r} with {'GPU' if gpu_available() else 'CPU'} embeddings")
     return collection
 
+# Bei Änderungen an `create_metadata` erhöhen: die Pipeline ingestiert dann neu (2: term_hashes statt terms)
+INGEST_SCHEMA_VERSION = 2
+
+
 def create_metadata(rec: dict[str, Any]) -> dict[str, Any]:
     def s(x:Any) -> str: return "" if x is None else str(x)
     def i(x:Any):
@@ -108,70 +102,183 @@ def create_metadata(rec: dict[str, Any]) -> dict[str, Any]:
         "heading": s(rec.get("heading")),
         "heading_path": s(rec.get("heading_path")),
         "canonical_url": s(rec.get("canonical_url")),
+        "term_hashes": s(rec.get("term_hashes")),
     }
 
 
 
-def add_records_in_batches(filepath: Path, collection: Any, batch_size: int) -> None:
+class IngestCheckpoint:
+    """
+    Fortschritt eines Ingests: pro geschriebenem Batch eine JSON-Zeile mit dessen Chunk-IDs (append-only).
+    Ein abgebrochener Ingest derselben Chunk-Datei überspringt beim nächsten Lauf alle hier verzeichneten Chunks.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def committed_ids(self) -> set[str]:
+        ids: set[str] = set()
+        if not self.path.exists():
+            return ids
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ids.update(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # beim Absturz halb geschriebene letzte Zeile
+        return ids
+
+    def commit(self, ids: list[str]) -> None:
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(ids) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def _add_batch(
+    collection: Any,
+    ids: list[Any],
+    texts: list[Any],
+    metadatas: list[Any],
+    batch_no: int,
+    total: int,
+    upsert: bool = False,
+    on_committed: Callable[[list[str]], None] | None = None,
+) -> None:
+    raise_if_cancelled()  # abgebrochener Job: wartende Batches nicht mehr einbetten
+    logger.info(f"Created chunk for collection {collection.name!r} (size: {len(texts)})")
+    # Fortgesetzter Ingest: upsert, falls ein Batch geschrieben, aber nicht mehr verzeichnet wurde
+    (collection.upsert if upsert else collection.add)(ids=ids, documents=texts, metadatas=metadatas)
+    if on_committed is not None:
+        on_committed(ids)
+    logger.info(f"Added chunk {batch_no}/{total} to collection {collection.name!r}")
+
+
+def add_records_in_batches(
+    filepath: Path,
+    collections: dict[str, Any],
+    batch_size: int,
+    workers: int = custom_settings.CHROMA_INGEST_WORKERS,
+    shard_by: ShardStrategy = custom_settings.CHROMA_SHARD_BY,
+    checkpoint: IngestCheckpoint | None = None,
+) -> None:
     """
-    Liest Datensätze aus JSONL und fügt sie in Batches der Chroma-Sammlung hinzu.
+    Liest Datensätze aus JSONL und fügt sie in Batches den Chroma-Sammlungen (Shards) hinzu.
+    Jeder Datensatz wird per `shard_for_record` einer Collection zugeordnet; volle Batches
+    werden parallel (bis zu `workers` gleichzeitig) eingebettet und geschrieben.
+    Mit `checkpoint` wird jeder geschriebene Batch verzeichnet und bereits verzeichnete Chunks übersprungen.
     Erwartet Felder:
       - ChunkKeys.ID
       - ChunkKeys.TEXT
     """
-    total_lines: int = count_lines(filepath)
-    total_chunks: int = ceil(total_lines / batch_size)
+    committed = checkpoint.committed_ids() if checkpoint is not None else set()
+    on_committed = checkpoint.commit if checkpoint is not None else None
+    if committed:
+        logger.info(f"Resuming ingest: skipping {len(committed)} already committed chunk(s)")
+    total_lines: int = count_lines(filepath) - len(committed)
+    # Bei mehreren Shards entstehen zusätzliche Rest-Batches
+    total_chunks: int = ceil(total_lines / batch_size) + (len(collections) - 1)
 
-    ids_part: list[Any] = []
-    texts_part: list[Any] = []
-    metadata_part: list[Any] = []
+    names = list(collections)
+    buffers: dict[str, tuple[list[Any], list[Any], list[Any]]] = {n: ([], [], []) for n in names}
+    pending: set[Future[None]] = set()
     chunk_counter: int = 0
 
-    for line_counter, rec in enumerate(iter_jsonl(filepath), start=1):
-        ids_part.append(rec.get(ChunkKeys.ID))
-        texts_part.append(rec.get(ChunkKeys.TEXT))
-        metadata_part.append(create_metadata(rec))
-        if line_counter % batch_size == 0:
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def flush(name: str) -> None:
+            nonlocal chunk_counter, pending
+            raise_if_cancelled()
+            ids_part, texts_part, metadata_part = buffers[name]
+            if not ids_part:
+                return
+            buffers[name] = ([], [], [])
             chunk_counter += 1
-            logger.info(f"Created chunk for collection (size: {len(texts_part)})")
-            collection.add(ids=ids_part, documents=texts_part, metadatas=metadata_part)
-            logger.info(f"Added chunk {chunk_counter}/{total_chunks} to collection")
-            ids_part.clear()
-            texts_part.clear()
-            metadata_part.clear()
-
-    # Restliche Elemente hinzufügen
-    if ids_part or texts_part:
-        chunk_counter += 1
-        logger.info(f"Created chunk for collection (size: {len(texts_part)})")
-        collection.add(ids=ids_part, documents=texts_part, metadatas=metadata_part)
-        logger.info(f"Added chunk {chunk_counter}/{total_chunks} to collection")
+            # Kontext mitgeben, damit Log-Zeilen der Writer im Job-Log landen (logger.contextualize)
+            pending.add(pool.submit(
+                contextvars.copy_context().run,
+                _add_batch, collections[name], ids_part, texts_part, metadata_part, chunk_counter, total_chunks,
+                bool(committed), on_committed,
+            ))
+            # Rückstau begrenzen, damit nicht die ganze Datei im Speicher landet
+            if len(pending) >= 2 * max(1, workers):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    f.result()
+
+        for rec in iter_jsonl(filepath):
+            if rec.get(ChunkKeys.ID) in committed:
+                continue
+            name = shard_for_record(rec, names, shard_by=shard_by)
+            ids_part, texts_part, metadata_part = buffers[name]
+            ids_part.append(rec.get(ChunkKeys.ID))
+            texts_part.append(rec.get(ChunkKeys.TEXT))
+            metadata_part.append(create_metadata(rec))
+            if len(ids_part) >= batch_size:
+                flush(name)
+
+        # Restliche Elemente hinzufügen
+        for name in names:
+            flush(name)
+        for f in pending:
+            f.result()
 
     logger.info("Filled Chroma collection")
 
 
-def ingest_chunks_to_chroma() -> None:
+def ingest_chunks_to_chroma(
+    database_path: Path | None = None,
+    n_shards: int = custom_settings.CHROMA_N_SHARDS,
+    shard_by: ShardStrategy = custom_settings.CHROMA_SHARD_BY,
+    filepath: Path | None = None,
+    checkpoint_path: Path | None = None,
+) -> None:
     """
     Verhalten:
       1) Löschen von alter Datenbank, falls sie existiert
       1) Auflösung der relevanten Pfade
-      2) Neueste Chunk-Datei finden
-      3) Chroma initialisieren und Collection öffnen/erstellen
+      2) Neueste Chunk-Datei finden (oder `filepath`)
+      3) Chroma initialisieren und Collections (Shards) öffnen/erstellen
       4) JSONL in Batches hinzufügen
+
+    Mit `checkpoint_path` ist der Ingest fortsetzbar: liegt dort der Fortschritt eines abgebrochenen Ingests
+    (derselben Chunk-Datei) und existiert die Datenbank noch, wird sie behalten und nur der Rest geschrieben.
     """
-    _, chunks_dir, database_path = get_base_and_dirs()
-    if database_path.exists() and custom_settings.CHROMA_REMOVE_OLD:
+    if filepath is None or database_path is None:
+        _, chunks_dir, default_database_path = get_base_and_dirs()
+        filepath = filepath or get_latest_chunk_file(chunks_dir)
+        database_path = database_path or default_database_path
+    checkpoint = IngestCheckpoint(checkpoint_path) if checkpoint_path is not None else None
+    resume = checkpoint is not None and checkpoint.path.exists() and database_path.exists()
+    if checkpoint is not None and not resume:
+        checkpoint.clear()
+    if resume:
+        logger.info(f"Found checkpoint {checkpoint_path}. Continuing ingestion into existing database")
+    elif database_path.exists() and custom_settings.CHROMA_REMOVE_OLD:
         logger.warning("Found vector database. Removing...")
         shutil.rmtree(database_path)
         logger.info("Successfully removed old database")
     elif database_path.exists():
         logger.error("Found vector database. Keeping existing data. Aborting ingestion.")
         raise ChromaError("Vector database already exists. Set CHROMA_REMOVE_OLD to True to overwrite.")
-    filepath = get_latest_chunk_file(chunks_dir)
+    if checkpoint is not None:
+        # Ab jetzt gehört die Datenbank zu diesem Ingest: auch ein Abbruch vor dem ersten Batch ist fortsetzbar
+        checkpoint.path.parent.mkdir(parents=True, exist_ok=True)
+        checkpoint.path.touch()
+    started = time.perf_counter()
     client = init_chroma_client(database_path)
-    collection = get_collection(client, name=Names.VECTOR_DATABASE_COLLECTION)
+    names = shard_names(n_shards=n_shards, shard_by=shard_by)
+    collections = {name: get_collection(client, name=name) for name in names}
     add_records_in_batches(
         filepath=filepath,
-        collection=collection,
+        collections=collections,
         batch_size=custom_settings.CHROMA_BATCH_SIZE,
+        shard_by=shard_by,
+        checkpoint=checkpoint,
     )
+    version = write_index_version(database_path)
+    logger.info(f"Index version: {version}")
+    logger.info(f"Ingest finished in {time.perf_counter() - started:.2f}s ({len(names)} collection(s))")
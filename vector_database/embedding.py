@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+from loguru import logger
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+
+def gpu_available() -> bool:
+    """True, wenn GPU-Embeddings konfiguriert sind und onnxruntime importierbar ist."""
+    if not custom_settings.CHROMA_USE_GPU:
+        return False
+    try:
+        import onnxruntime as ort # type: ignore # noqa: F401
+    except ImportError:
+        logger.warning("ONNXRuntime or ChromaDB with ONNX support not installed. Falling back to CPU embeddings.")
+        return False
+    return True
+
+
+# Modell von Ingest und Query; Teil des Ingest-Schlüssels der Pipeline (neues Modell -> neuer Index)
+EMBEDDING_MODEL_NAME = ONNXMiniLM_L6_V2.MODEL_NAME
+
+
+@lru_cache
+def get_embedding_function() -> ONNXMiniLM_L6_V2:
+    """
+    Gemeinsame Embedding-Funktion für Ingest und Query.
+    Einmal pro Prozess erzeugt, damit die ONNX-Session nicht bei jeder Query neu geladen wird.
+    """
+    if gpu_available():
+        logger.info(f"Using ONNXRuntime embeddings with preferred providers: {custom_settings.ONNX_PREFERRED_PROVIDERS}")
+        return ONNXMiniLM_L6_V2(preferred_providers=custom_settings.ONNX_PREFERRED_PROVIDERS)
+    logger.info("Using ONNXRuntime embeddings on CPU")
+    return ONNXMiniLM_L6_V2()
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embeddings für mehrere Texte in einem Batch."""
+    if not texts:
+        return []
+    ef = get_embedding_function()
+    return [list(map(float, v)) for v in ef(texts)]
+
+
+class QueryEmbedder:
+    """
+    Gemeinsamer Query-Embedder für parallele Anfragen:
+      - LRU-Cache für zuletzt eingebettete Queries,
+      - Micro-Batching: Queries, die innerhalb von `window_ms` eintreffen, werden in einer
+        einzigen ONNX-Inferenz eingebettet statt in vielen Batch-1-Läufen.
+    Ein Hintergrund-Thread sammelt die Anfragen; Aufrufer blockieren nur auf ihr Future.
+    """
+
+    def __init__(self, *, cache_size: int, window_ms: float, max_batch: int) -> None:
+        self.cache_size = cache_size
+        self.window_s = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._cache: OrderedDict[str, list[float]] = OrderedDict()
+        self._pending: list[tuple[str, Future[list[float]]]] = []
+        self._cond = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self._hits = 0
+        self._misses = 0
+        self._batches = 0
+        self._batched_texts = 0
+
+    # ---------- intern ----------
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+            self._worker.start()
+
+    def _take_batch(self) -> list[tuple[str, Future[list[float]]]]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # Kurz warten, damit gleichzeitig eintreffende Queries in denselben Batch fallen
+            deadline = time.monotonic() + self.window_s
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, embed_texts(texts)))
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            with self._cond:
+                self._batches += 1
+                self._batched_texts += len(texts)
+                for text, vec in vectors.items():
+                    self._remember(text, vec)
+            for text, fut in batch:
+                fut.set_result(vectors[text])
+
+    def _remember(self, text: str, vec: list[float]) -> None:
+        self._cache[text] = vec
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ---------- public API ----------
+
+    def embed(self, text: str) -> list[float]:
+        fut: Future[list[float]] | None = None
+        with self._cond:
+            vec = self._cache.get(text)
+            if vec is not None:
+                self._cache.move_to_end(text)
+                self._hits += 1
+                return vec
+            self._misses += 1
+            if self.window_s > 0:
+                self._ensure_worker()
+                fut = Future()
+                self._pending.append((text, fut))
+                self._cond.notify_all()
+        if fut is None:
+            vec = embed_texts([text])[0]
+            with self._cond:
+                self._remember(text, vec)
+            return vec
+        return fut.result()
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "cache_entries": len(self._cache),
+                "cache_hits": self._hits,
+                "cache_misses": self._misses,
+                "batches": self._batches,
+                "avg_batch_size": (self._batched_texts / self._batches) if self._batches else 0.0,
+            }
+
+
+# Singleton
+@lru_cache
+def get_query_embedder() -> QueryEmbedder:
+    return QueryEmbedder(
+        cache_size=custom_settings.EMBED_QUERY_CACHE_SIZE,
+        window_ms=custom_settings.EMBED_BATCH_WINDOW_MS,
+        max_batch=custom_settings.EMBED_MAX_BATCH,
+    )
+
+
+def embed_query(text: str) -> list[float]:
+    """Embedding einer einzelnen Query (gecacht, parallel eintreffende Queries werden gebündelt)."""
+    return get_query_embedder().embed(text)
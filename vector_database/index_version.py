@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime, UTC
+from pathlib import Path
+from definitions import constants
+
+INDEX_VERSION_FILE = "index_version"
+
+
+def default_database_path() -> Path:
+    base_dir = Path(__file__).resolve().parents[1]
+    return base_dir / constants.VECTOR_DATABASE / constants.VECTOR_DATABASE_DATA
+
+
+def write_index_version(database_path: Path | None = None) -> str:
+    """Schreibt nach erfolgreichem Ingest eine neue Indexversion (invalidiert z. B. den Antwort-Cache)."""
+    path = (database_path or default_database_path()) / INDEX_VERSION_FILE
+    version = f"{datetime.now(UTC).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+    path.write_text(version, encoding="utf-8")
+    return version
+
+
+# Pfad -> ((mtime_ns, Größe), Version): die Datei wird nur nach einem neuen Ingest erneut gelesen
+_version_cache: dict[Path, tuple[tuple[int, int], str]] = {}
+
+
+def current_index_version(database_path: Path | None = None) -> str:
+    """Aktuelle Indexversion (auch prozessübergreifend gültig); pro Request nur ein `stat`, gelesen wird bei Änderung."""
+    path = (database_path or default_database_path()) / INDEX_VERSION_FILE
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return ""
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _version_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        version = path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return ""
+    _version_cache[path] = (stamp, version)
+    return version
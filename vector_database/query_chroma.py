@@ -1,35 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from chromadb import PersistentClient
 from chromadb.api import ClientAPI
-from definitions.custom_enums import Names
+from definitions.custom_enums import ChromaQueryKeys, ChunkKeys
 from pathlib import Path
-from definitions import constants
+from definitions.errors import ChromaError
 from config.settings import AppSettings, get_settings
 from loguru import logger
+from vector_database.embedding import embed_query, get_embedding_function
+from vector_database.index_version import default_database_path
+from vector_database.sharding import is_shard_name, shards_for_filter
 
 settings: AppSettings = get_settings()
 
-def query_db(query: str,n_res: int = settings.CHROMA_N_RESULTS) -> Any:
-    base_dir = Path(__file__).resolve().parents[1]
-    database_path = base_dir / constants.VECTOR_DATABASE / constants.VECTOR_DATABASE_DATA
-    client: ClientAPI = PersistentClient(path=database_path)
-    if settings.CHROMA_USE_GPU:
-        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
-        import onnxruntime as ort # type: ignore
-        PREFERRED = settings.ONNX_PREFERRED_PROVIDERS
-        logger.info(f"Using ONNXRuntime for Query with preferred providers: {PREFERRED}")
-        ef = ONNXMiniLM_L6_V2(preferred_providers=PREFERRED)
-        collection = client.get_collection(name=Names.VECTOR_DATABASE_COLLECTION, embedding_function=ef) # type: ignore
+# Gemeinsamer Pool für das parallele Abfragen der Shards
+_shard_pool = ThreadPoolExecutor(max_workers=max(1, settings.CHROMA_QUERY_WORKERS), thread_name_prefix="chroma-shard")
+
+
+def get_query_collections(client: ClientAPI) -> dict[str, Any]:
+    """Öffnet alle Collections der Datenbank, die zum Docs-Index gehören (ein oder mehrere Shards)."""
+    ef = get_embedding_function()
+    names = sorted(c.name for c in client.list_collections() if is_shard_name(c.name))
+    if not names:
+        raise ChromaError("No document collection found in vector database. Run ingest first.")
+    return {name: client.get_collection(name=name, embedding_function=ef) for name in names} # type: ignore
+
+
+def merge_results(results: list[Any], n_res: int) -> dict[str, list[list[Any]]]:
+    """Führt die Top-k-Ergebnisse mehrerer Shards nach Distanz zusammen (Chroma-Ergebnisformat)."""
+    rows: list[tuple[float, Any, Any, Any]] = []
+    for res in results:
+        ids = res.get(ChromaQueryKeys.IDS, [[]])[0]
+        docs = res.get(ChromaQueryKeys.DOCS, [[]])[0]
+        metas = res.get(ChromaQueryKeys.METAS, [[]])[0]
+        dists = res.get(ChromaQueryKeys.DISTS, [[]])[0]
+        rows.extend(zip(dists, ids, docs, metas))
+    rows.sort(key=lambda r: r[0])
+    rows = rows[:n_res]
+    return {
+        ChromaQueryKeys.IDS.value: [[r[1] for r in rows]],
+        ChromaQueryKeys.DOCS.value: [[r[2] for r in rows]],
+        ChromaQueryKeys.METAS.value: [[r[3] for r in rows]],
+        ChromaQueryKeys.DISTS.value: [[r[0] for r in rows]],
+    }
+
+
+def query_db(
+    query: str,
+    n_res: int = settings.CHROMA_N_RESULTS,
+    where: dict[str, Any] | None = None,
+    database_path: Path | None = None,
+    query_embedding: list[float] | None = None,
+) -> Any:
+    """
+    Vektor-Suche; `where` schränkt optional per Metadaten-Filter ein (z. B. auf Sections).
+    Bei mehreren Shards wird die Query einmal eingebettet, parallel an alle passenden Shards
+    geschickt und das Top-k über alle Shards nach Distanz gemischt.
+    Ein bereits berechnetes `query_embedding` wird wiederverwendet.
+    """
+    client: ClientAPI = PersistentClient(path=database_path or default_database_path())
+    collections = get_query_collections(client)
+    names = shards_for_filter(list(collections), where)
+    if query_embedding is None:
+        query_embedding = embed_query(query)
+
+    def run(name: str) -> Any:
+        return collections[name].query(
+            query_embeddings=[query_embedding],
+            n_results=n_res,
+            where=where,
+        )
+
+    if len(names) == 1:
+        results = run(names[0])
     else:
-        logger.info("Using default embedding function (SentenceTransformer) for Query on CPU.")
-        ef = ONNXMiniLM_L6_V2() # type: ignore
-        collection = client.get_collection(name=Names.VECTOR_DATABASE_COLLECTION, embedding_function=ef) # type: ignore
-    results = collection.query(
-        query_texts=[query],
-        n_results=n_res
-    )
-    if len(results) ==0:
+        results = merge_results(list(_shard_pool.map(run, names)), n_res)
+    n_found = len(results[ChromaQueryKeys.IDS][0])
+    if n_found == 0:
         logger.warning("Query returned no results.")
     else:
-        logger.info(f"Query returned {len(results['ids'][0])} results.")
-    return results
\ No newline at end of file
+        logger.info(f"Query returned {n_found} results from {len(names)} collection(s).")
+    return results
+
+
+def fetch_chunks_by_index(url: str, indices: list[int], database_path: Path | None = None) -> dict[int, str]:
+    """Lädt Chunks einer Seite über `chunk_index` nach (z. B. um Lücken zwischen Treffern zu schließen)."""
+    if not indices:
+        return {}
+    client: ClientAPI = PersistentClient(path=database_path or default_database_path())
+    where: dict[str, Any] = {"$and": [
+        {"$or": [{ChunkKeys.URL.value: url}, {ChunkKeys.CANONICAL_URL.value: url}]},
+        {ChunkKeys.INDEX.value: {"$in": indices}},
+    ]}
+    found: dict[int, str] = {}
+    for collection in get_query_collections(client).values():
+        res = collection.get(where=where, include=["documents", "metadatas"])
+        for doc, meta in zip(res.get(ChromaQueryKeys.DOCS) or [], res.get(ChromaQueryKeys.METAS) or []):
+            if doc and meta:
+                found[int(meta.get(ChunkKeys.INDEX, -1))] = doc
+    return found
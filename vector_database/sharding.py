@@ -0,0 +1,67 @@
+import hashlib
+from typing import Any
+from definitions.custom_enums import ChunkKeys, Names, ShardStrategy
+from config.settings import AppSettings, get_settings
+
+custom_settings: AppSettings = get_settings()
+
+
+def shard_names(
+    n_shards: int = custom_settings.CHROMA_N_SHARDS,
+    shard_by: ShardStrategy = custom_settings.CHROMA_SHARD_BY,
+) -> list[str]:
+    """
+    Namen der Collections, auf die beim Ingest verteilt wird.
+    - hash: `docs` (1 Shard, kompatibel zu bestehenden Datenbanken) bzw. `docs_0` … `docs_{n-1}`
+    - section: eine Collection pro Section (`docs_tutorial`, …, `docs_unknown`)
+    """
+    base = Names.VECTOR_DATABASE_COLLECTION.value
+    if shard_by == ShardStrategy.SECTION:
+        sections = [*custom_settings.SECTION_CATEGORIES, custom_settings.SECTION_UNKNOWN]
+        return [f"{base}_{s}" for s in dict.fromkeys(sections)]
+    if n_shards <= 1:
+        return [base]
+    return [f"{base}_{i}" for i in range(n_shards)]
+
+
+def is_shard_name(name: str) -> bool:
+    base = Names.VECTOR_DATABASE_COLLECTION.value
+    return name == base or name.startswith(f"{base}_")
+
+
+def _stable_hash(value: str) -> int:
+    return int(hashlib.sha1(value.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def shard_for_record(
+    rec: dict[str, Any],
+    names: list[str],
+    shard_by: ShardStrategy = custom_settings.CHROMA_SHARD_BY,
+) -> str:
+    """Ordnet einen Chunk deterministisch einer Collection zu (alle Chunks einer URL landen im selben Shard)."""
+    if len(names) == 1:
+        return names[0]
+    if shard_by == ShardStrategy.SECTION:
+        base = Names.VECTOR_DATABASE_COLLECTION.value
+        name = f"{base}_{rec.get(ChunkKeys.SECTION) or custom_settings.SECTION_UNKNOWN}"
+        return name if name in names else f"{base}_{custom_settings.SECTION_UNKNOWN}"
+    url = str(rec.get(ChunkKeys.CANONICAL_URL) or rec.get(ChunkKeys.URL) or "")
+    return names[_stable_hash(url) % len(names)]
+
+
+def shards_for_filter(names: list[str], where: dict[str, Any] | None) -> list[str]:
+    """
+    Bei Section-Sharding nur die Collections abfragen, die zum Section-Filter passen.
+    Bei Hash-Sharding (oder ohne Filter) werden alle Collections abgefragt.
+    """
+    if not where or ChunkKeys.SECTION.value not in where:
+        return names
+    cond = where[ChunkKeys.SECTION.value]
+    base = Names.VECTOR_DATABASE_COLLECTION.value
+    if isinstance(cond, dict) and "$nin" in cond:
+        excluded = {f"{base}_{s}" for s in cond["$nin"]}
+        return [n for n in names if n not in excluded] or names
+    sections = cond.get("$in", []) if isinstance(cond, dict) else [cond]
+    wanted = {f"{base}_{s}" for s in sections}
+    subset = [n for n in names if n in wanted]
+    return subset or names